@@ -0,0 +1,35 @@
+"""add data_version
+
+Revision ID: 3b9f2c7d1a4e
+Revises: dfbe45e8ec1c
+Create Date: 2026-10-18 10:12:41.503118
+
+"""
+from typing import Sequence, Union
+from sqlalchemy.sql import func
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b9f2c7d1a4e'
+down_revision: Union[str, None] = 'dfbe45e8ec1c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # OMOP 스키마별 데이터 버전, scripts/load_omop.py 가 적재 후 version 을 올림
+    op.create_table(
+        'data_version',
+        sa.Column('schema_name', sa.String(length=63), nullable=False),
+        sa.Column('version', sa.BigInteger(), nullable=False, server_default='1'),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False, server_default=func.now()),
+        sa.PrimaryKeyConstraint('schema_name')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('data_version')
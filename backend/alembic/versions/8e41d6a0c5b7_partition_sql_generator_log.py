@@ -0,0 +1,134 @@
+"""partition sql_generator_log by month
+
+Revision ID: 8e41d6a0c5b7
+Revises: 3b9f2c7d1a4e
+Create Date: 2026-10-18 14:03:27.884215
+
+"""
+from datetime import datetime
+from typing import Sequence, Union
+from sqlalchemy.sql import func
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8e41d6a0c5b7'
+down_revision: Union[str, None] = '3b9f2c7d1a4e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# 현재 달 이후로 미리 만들어 둘 파티션 수 (이후에는 src/modules/log/service.py 의 maintenance 가 관리)
+PARTITIONS_AHEAD = 2
+
+COLUMNS = (
+    'log_id, input_received_timestamp, user_input_text, pre_llm_filter_status, pre_llm_filter_reason, '
+    'pre_llm_filter_complete_timestamp, generated_sql, llm_request_timestamp, llm_response_timestamp, '
+    'llm_validation_reason, llm_model_used'
+)
+
+
+def _add_months(month: datetime, months: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def _create_partition(month: datetime) -> None:
+    op.execute(
+        f"CREATE TABLE sql_generator_log_y{month.year:04d}m{month.month:02d} PARTITION OF sql_generator_log "
+        f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{_add_months(month, 1):%Y-%m-%d}')"
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.rename_table('sql_generator_log', 'sql_generator_log_unpartitioned')
+    op.execute(
+        "ALTER TABLE sql_generator_log_unpartitioned RENAME CONSTRAINT sql_generator_log_pkey TO sql_generator_log_unpartitioned_pkey"
+    )
+
+    # 파티션 테이블의 PK 에는 파티션 키가 포함되어야 하므로 (log_id, input_received_timestamp)
+    op.create_table(
+        'sql_generator_log',
+        sa.Column('log_id', sa.BigInteger(), sa.Identity(), nullable=False),
+        sa.Column('input_received_timestamp', sa.DateTime(), nullable=False, server_default=func.now()),
+        sa.Column('user_input_text', sa.Text(), nullable=True),
+        sa.Column('pre_llm_filter_status', sa.String(length=50), nullable=True),
+        sa.Column('pre_llm_filter_reason', sa.Text(), nullable=True),
+        sa.Column('pre_llm_filter_complete_timestamp', sa.DateTime(), nullable=True),
+        sa.Column('generated_sql', sa.Text(), nullable=True),
+        sa.Column('llm_request_timestamp', sa.DateTime(), nullable=True),
+        sa.Column('llm_response_timestamp', sa.DateTime(), nullable=True),
+        sa.Column('llm_validation_reason', sa.Text(), nullable=True),
+        sa.Column('llm_model_used', sa.String(length=255), nullable=True),
+        sa.PrimaryKeyConstraint('log_id', 'input_received_timestamp', name='sql_generator_log_pkey'),
+        postgresql_partition_by='RANGE (input_received_timestamp)',
+    )
+
+    # 기존 로그가 있는 가장 오래된 달부터 PARTITIONS_AHEAD 달 뒤까지 월별 파티션 생성
+    oldest = op.get_bind().execute(sa.text(
+        "SELECT min(coalesce(input_received_timestamp, llm_request_timestamp, now()::timestamp)) "
+        "FROM sql_generator_log_unpartitioned"
+    )).scalar()
+    current = datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    month = min(oldest, current).replace(day=1, hour=0, minute=0, second=0, microsecond=0) if oldest else current
+    while month <= _add_months(current, PARTITIONS_AHEAD):
+        _create_partition(month)
+        month = _add_months(month, 1)
+
+    # 예전 로그 중 입력 시각이 비어 있는 행은 LLM 요청 시각(없으면 migration 시각)으로 채움
+    op.execute(
+        f"INSERT INTO sql_generator_log ({COLUMNS}) "
+        f"SELECT {COLUMNS.replace('input_received_timestamp', 'coalesce(input_received_timestamp, llm_request_timestamp, now()::timestamp)')} "
+        "FROM sql_generator_log_unpartitioned"
+    )
+    op.execute(
+        "SELECT setval(pg_get_serial_sequence('sql_generator_log', 'log_id'), "
+        "coalesce((SELECT max(log_id) FROM sql_generator_log), 0) + 1, false)"
+    )
+    op.drop_table('sql_generator_log_unpartitioned')
+
+    # RAG 초기화: 성공한 질문/SQL 을 최신순으로 읽는 쿼리용 (각 파티션에 자동 생성)
+    op.create_index(
+        'ix_sql_generator_log_recent_success',
+        'sql_generator_log',
+        [sa.text('input_received_timestamp DESC')],
+        postgresql_where=sa.text(
+            "user_input_text IS NOT NULL AND user_input_text <> '' "
+            "AND generated_sql IS NOT NULL AND generated_sql <> ''"
+        ),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_table(
+        'sql_generator_log_unpartitioned',
+        sa.Column('log_id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('input_received_timestamp', sa.DateTime(),  nullable=True),
+        sa.Column('user_input_text', sa.Text(), nullable=True),
+        sa.Column('pre_llm_filter_status', sa.String(length=50), nullable=True),
+        sa.Column('pre_llm_filter_reason', sa.Text(), nullable=True),
+        sa.Column('pre_llm_filter_complete_timestamp', sa.DateTime(), nullable=True),
+        sa.Column('generated_sql', sa.Text(), nullable=True),
+        sa.Column('llm_request_timestamp', sa.DateTime(), nullable=True),
+        sa.Column('llm_response_timestamp', sa.DateTime(), nullable=True),
+        sa.Column('llm_validation_reason', sa.Text(), nullable=True),
+        sa.Column('llm_model_used', sa.String(length=255), nullable=True),
+        sa.PrimaryKeyConstraint('log_id', name='sql_generator_log_unpartitioned_pkey')
+    )
+    op.execute(f"INSERT INTO sql_generator_log_unpartitioned ({COLUMNS}) SELECT {COLUMNS} FROM sql_generator_log")
+
+    # 파티션 테이블을 삭제하면 모든 파티션과 인덱스도 함께 삭제됨
+    op.drop_table('sql_generator_log')
+    op.rename_table('sql_generator_log_unpartitioned', 'sql_generator_log')
+    op.execute(
+        "ALTER TABLE sql_generator_log RENAME CONSTRAINT sql_generator_log_unpartitioned_pkey TO sql_generator_log_pkey"
+    )
+    op.execute(
+        "ALTER SEQUENCE sql_generator_log_unpartitioned_log_id_seq RENAME TO sql_generator_log_log_id_seq"
+    )
+    op.execute(
+        "SELECT setval('sql_generator_log_log_id_seq', coalesce((SELECT max(log_id) FROM sql_generator_log), 0) + 1, false)"
+    )
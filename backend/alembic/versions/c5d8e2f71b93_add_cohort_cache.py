@@ -0,0 +1,42 @@
+"""add cohort_cache schema
+
+Revision ID: c5d8e2f71b93
+Revises: 8e41d6a0c5b7
+Create Date: 2026-10-19 09:41:12.307561
+
+"""
+from typing import Sequence, Union
+from sqlalchemy.sql import func
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5d8e2f71b93'
+down_revision: Union[str, None] = '8e41d6a0c5b7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # /cohort 로 materialize 한 cohort 테이블 (cohort_<16 hex>) 과 handle 목록을 두는 schema
+    op.execute("CREATE SCHEMA IF NOT EXISTS cohort_cache")
+    op.create_table(
+        'cohort_handle',
+        sa.Column('handle', sa.String(length=63), nullable=False),
+        sa.Column('sql', sa.Text(), nullable=False),
+        sa.Column('row_count', sa.BigInteger(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False, server_default=func.now()),
+        sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint('handle'),
+        schema='cohort_cache',
+    )
+    # 만료된 handle 정리용
+    op.create_index('ix_cohort_handle_expires_at', 'cohort_handle', ['expires_at'], schema='cohort_cache')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # materialize 된 cohort 테이블도 함께 삭제
+    op.execute("DROP SCHEMA cohort_cache CASCADE")
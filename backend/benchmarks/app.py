@@ -0,0 +1,13 @@
+"""
+가짜 LLM 을 사용하는 벤치마크용 app
+
+실행: uvicorn benchmarks.app:app
+"""
+from benchmarks import fake_llm
+from src.modules.gemini import service as gemini_service
+
+# 스케줄러는 그대로 거치도록 실제 Gemini 호출 부분(_generate_response, _stream_response)만 교체
+gemini_service._generate_response = fake_llm.generate_response
+gemini_service._stream_response = fake_llm.stream_response
+
+from main import app  # noqa: E402
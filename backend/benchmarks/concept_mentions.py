@@ -0,0 +1,161 @@
+"""
+ConceptIndex.find_mentions 벤치마크
+
+Athena 전체 vocabulary 크기(수백만 개 이름)의 가짜 concept 이름을 만들어 색인을 만들고,
+prompt 에 concept 후보를 넣을 때와 같이 질문 문장 전체로 find_mentions 를 호출한 시간을
+모든 질문 trigram 의 posting 을 합쳐서 후보를 만드는 방식(baseline)과 비교합니다. 두 방식의 결과가 같은지도 확인합니다.
+
+사용 예 (backend 디렉토리에서):
+    python -m benchmarks.concept_mentions --concepts 2000000 --questions 200 --output concept_mentions.json
+"""
+import argparse
+import itertools
+import json
+import random
+import statistics
+import time
+
+import numpy as np
+
+from src.modules.concept_search.index import MENTION_MIN_CONTAINMENT, ConceptIndex, normalize, trigrams
+
+# 실제 concept 이름처럼 흔한 영어 단어가 섞이도록 함
+COMMON_WORDS = [
+    "the", "of", "and", "with", "without", "in", "due", "to", "other", "disorder", "disease", "chronic", "acute",
+    "left", "right", "oral", "tablet", "injection", "measurement", "history", "finding", "structure", "procedure",
+]
+# 영어 글자 빈도 (단어를 이루는 글자는 이 빈도로 뽑음)
+LETTER_FREQUENCIES = {
+    "e": 12.7, "t": 9.1, "a": 8.2, "o": 7.5, "i": 7.0, "n": 6.7, "s": 6.3, "h": 6.1, "r": 6.0, "d": 4.3, "l": 4.0,
+    "c": 2.8, "u": 2.8, "m": 2.4, "w": 2.4, "f": 2.2, "g": 2.0, "y": 2.0, "p": 1.9, "b": 1.5, "v": 1.0, "k": 0.8,
+    "j": 0.2, "x": 0.2, "q": 0.1, "z": 0.1,
+}
+# 약품 concept 이름의 용량 표기
+STRENGTHS = ["5 MG", "10 MG", "20 MG", "0.5 ML", "100 MG/ML", "250 MG", "1 MG/ML", "40 MG"]
+QUESTION_TEMPLATES = [
+    "How many patients were diagnosed with {} in 2019?",
+    "Show the number of people who took {} and had {} within a year",
+    "{} 환자 중 {} 처방을 받은 사람의 성별 분포를 보여줘",
+    "List the average age of patients with {} grouped by gender",
+]
+
+
+def _make_vocabulary(concept_count: int, word_count: int, question_count: int, seed: int) -> tuple[list, list, list[str]]:
+    rng = random.Random(seed)
+    letters, letter_weights = list(LETTER_FREQUENCIES), list(LETTER_FREQUENCIES.values())
+    words = ["".join(rng.choices(letters, letter_weights, k=rng.randint(4, 12))) for _ in range(word_count)]
+    # 단어 빈도는 Zipf 분포를 따르도록
+    cum_weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(word_count)))
+
+    def make_name() -> str:
+        name = rng.choices(words, cum_weights=cum_weights, k=rng.randint(1, 4))
+        for _ in range(rng.randint(0, 2)):
+            name.insert(rng.randrange(len(name) + 1), rng.choice(COMMON_WORDS))
+        if rng.random() < 0.3:
+            name.append(rng.choice(STRENGTHS))
+        return " ".join(name)
+
+    concepts = [
+        (concept_id, make_name(), rng.choice(("Condition", "Drug", "Measurement")), "SNOMED", rng.choice(("S", None)))
+        for concept_id in range(1, concept_count + 1)
+    ]
+    synonyms = [(rng.randint(1, concept_count), make_name()) for _ in range(concept_count // 4)]
+
+    questions = []
+    for _ in range(question_count):
+        template = rng.choice(QUESTION_TEMPLATES)
+        names = [rng.choice(concepts)[1] for _ in range(template.count("{}"))]
+        questions.append(template.format(*names))
+    return concepts, synonyms, questions
+
+
+def _baseline_mentions(index: ConceptIndex, text: str, limit: int, min_grams: int = 5) -> list[int]:
+    # 모든 질문 trigram 의 posting 을 합쳐서 정렬하는 방식
+    lists = [
+        index.postings[index.offsets[gram_id]:index.offsets[gram_id + 1]]
+        for gram_id in (index.gram_ids.get(gram) for gram in trigrams(normalize(text)))
+        if gram_id is not None
+    ]
+    if not lists:
+        return []
+    candidates, counts = np.unique(np.concatenate(lists), return_counts=True)
+    entry_counts = index.entry_gram_counts[candidates]
+    containment = counts / entry_counts
+    keep = (containment >= MENTION_MIN_CONTAINMENT) & (entry_counts >= min_grams)
+    candidates, containment, entry_counts = candidates[keep], containment[keep], entry_counts[keep]
+    is_standard = index.standard[index.entry_concepts[candidates]] == "S"
+    ranked = np.lexsort((~is_standard, -entry_counts, -containment))
+    return [match.concept_id for match in index._collect(candidates, containment, ranked, limit)]
+
+
+def _measure(function, questions: list[str], repeat: int) -> tuple[list[float], list]:
+    seconds = []
+    results = []
+    for question in questions:
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = function(question)
+            best = min(best, time.perf_counter() - start)
+        seconds.append(best)
+        results.append(result)
+    return seconds, results
+
+
+def _summary(seconds: list[float]) -> dict:
+    ordered = sorted(seconds)
+    return {
+        "median_ms": statistics.median(ordered) * 1000,
+        "p95_ms": ordered[int(len(ordered) * 0.95) - 1] * 1000,
+        "max_ms": ordered[-1] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concepts", type=int, default=2_000_000)
+    parser.add_argument("--words", type=int, default=200_000, help="number of distinct words in concept names")
+    parser.add_argument("--questions", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    concepts, synonyms, questions = _make_vocabulary(args.concepts, args.words, args.questions, args.seed)
+
+    start = time.perf_counter()
+    index = ConceptIndex.build(concepts, synonyms)
+    build_seconds = time.perf_counter() - start
+    print(f"index: {len(index.entry_names)} names, {len(index.postings)} postings, built in {build_seconds:.1f}s")
+
+    mention_seconds, mention_results = _measure(
+        lambda question: [match.concept_id for match in index.find_mentions(question, args.limit)],
+        questions, args.repeat,
+    )
+    baseline_seconds, baseline_results = _measure(
+        lambda question: _baseline_mentions(index, question, args.limit), questions, args.repeat,
+    )
+
+    report = {
+        "concepts": args.concepts,
+        "names": len(index.entry_names),
+        "build_sec": build_seconds,
+        "find_mentions": _summary(mention_seconds),
+        "baseline": _summary(baseline_seconds),
+        "same_result": sum(a == b for a, b in zip(mention_results, baseline_results)) / len(questions),
+    }
+    for name in ("find_mentions", "baseline"):
+        print(
+            f"{name:<14} median {report[name]['median_ms']:8.2f} ms  p95 {report[name]['p95_ms']:8.2f} ms  "
+            f"max {report[name]['max_ms']:8.2f} ms"
+        )
+    print(f"same_result: {report['same_result']:.1%}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
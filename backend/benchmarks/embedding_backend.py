@@ -0,0 +1,163 @@
+"""
+임베딩 backend(torch / onnx) 벤치마크
+
+backend 마다 별도 프로세스에서 모델을 로드하여
+기동 시간, 단건 encode 지연시간(p50, p99), batch 처리량, 최대 RSS 를 측정하고
+두 backend 의 벡터로 같은 검색을 했을 때 top-k 결과가 얼마나 일치하는지 비교합니다.
+
+사용 예 (backend 디렉토리에서):
+    python -m benchmarks.embedding_backend --onnx-model-dir models/all-MiniLM-L6-v2-onnx
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+CORPUS = [
+    "show person",
+    "성별 환자 수를 보여줘",
+    "2020년에 당뇨병 진단을 받은 환자 수",
+    "고혈압 환자의 평균 나이",
+    "count deaths by year",
+    "number of patients by year of birth",
+    "average measurement value per person",
+    "list drugs prescribed more than 10 times",
+    "visit count per care site",
+    "환자별 방문 횟수",
+    "observation period length distribution",
+    "가장 많이 처방된 약물 10개",
+    "condition era count by concept",
+    "patients with more than 3 visits in 2019",
+    "provider count by specialty",
+    "사망 환자의 성별 분포",
+]
+
+QUERIES = [
+    "show me all persons",
+    "2021년 당뇨 환자 수",
+    "deaths per year",
+    "평균 나이 of hypertension patients",
+    "top 10 prescribed drugs",
+    "how many visits per care site",
+    "gender distribution of deceased patients",
+    "measurement average per patient",
+]
+
+
+def _worker(backend: str, model_name: str, onnx_model_dir: str, repeat: int, output: str):
+    start = time.perf_counter()
+    if backend == "onnx":
+        from src.modules.embedding.onnx_model import OnnxEmbeddingModel
+        model = OnnxEmbeddingModel(onnx_model_dir)
+    else:
+        from sentence_transformers import SentenceTransformer
+        model = SentenceTransformer(model_name, device="cpu")
+    startup = time.perf_counter() - start
+
+    model.encode(CORPUS)
+
+    latencies = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        model.encode([QUERIES[i % len(QUERIES)]])
+        latencies.append(time.perf_counter() - start)
+
+    batch = CORPUS * 8
+    start = time.perf_counter()
+    model.encode(batch, batch_size=len(batch))
+    batch_seconds = time.perf_counter() - start
+
+    np.savez(
+        output,
+        corpus=np.asarray(model.encode(CORPUS), dtype=np.float32),
+        queries=np.asarray(model.encode(QUERIES), dtype=np.float32),
+        stats=json.dumps({
+            "backend": backend,
+            "startup_sec": startup,
+            "single_p50_ms": float(np.percentile(latencies, 50)) * 1000,
+            "single_p99_ms": float(np.percentile(latencies, 99)) * 1000,
+            "batch_sentences_per_sec": len(batch) / batch_seconds,
+            # linux 의 ru_maxrss 단위는 KB
+            "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        }),
+    )
+
+
+def _top_k(corpus: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    distances = (queries ** 2).sum(1)[:, None] - 2 * queries @ corpus.T + (corpus ** 2).sum(1)[None, :]
+    return np.argsort(distances, axis=1)[:, :k]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default="all-MiniLM-L6-v2")
+    parser.add_argument("--onnx-model-dir", default="models/all-MiniLM-L6-v2-onnx")
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--output", help="write results as JSON to this path")
+    parser.add_argument("--worker", choices=("torch", "onnx"), help=argparse.SUPPRESS)
+    parser.add_argument("--worker-output", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        _worker(args.worker, args.model, args.onnx_model_dir, args.repeat, args.worker_output)
+        return
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for backend in ("torch", "onnx"):
+            worker_output = os.path.join(tmp, f"{backend}.npz")
+            subprocess.run([
+                sys.executable, "-m", "benchmarks.embedding_backend",
+                "--worker", backend,
+                "--worker-output", worker_output,
+                "--model", args.model,
+                "--onnx-model-dir", args.onnx_model_dir,
+                "--repeat", str(args.repeat),
+            ], check=True)
+            data = np.load(worker_output)
+            results[backend] = {
+                "stats": json.loads(str(data["stats"])),
+                "corpus": data["corpus"],
+                "queries": data["queries"],
+            }
+
+    torch_result, onnx_result = results["torch"], results["onnx"]
+
+    paired = np.concatenate([torch_result["corpus"], torch_result["queries"]])
+    quantized = np.concatenate([onnx_result["corpus"], onnx_result["queries"]])
+    cosine = (paired * quantized).sum(1) / (np.linalg.norm(paired, axis=1) * np.linalg.norm(quantized, axis=1))
+
+    torch_top = _top_k(torch_result["corpus"], torch_result["queries"], args.top_k)
+    onnx_top = _top_k(onnx_result["corpus"], onnx_result["queries"], args.top_k)
+    # onnx 쿼리 벡터로 torch 로 만든 기존 index 를 검색하는 경우 (재임베딩 없이 backend 만 바꾼 경우)
+    mixed_top = _top_k(torch_result["corpus"], onnx_result["queries"], args.top_k)
+
+    report = {
+        "torch": torch_result["stats"],
+        "onnx": onnx_result["stats"],
+        "agreement": {
+            "cosine_min": float(cosine.min()),
+            "cosine_mean": float(cosine.mean()),
+            "top1_agreement": float((torch_top[:, 0] == onnx_top[:, 0]).mean()),
+            f"top{args.top_k}_overlap": float(np.mean([
+                len(set(a) & set(b)) / args.top_k for a, b in zip(torch_top, onnx_top)
+            ])),
+            "mixed_index_top1_agreement": float((torch_top[:, 0] == mixed_top[:, 0]).mean()),
+        },
+    }
+
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+EmbeddingBatcher 벤치마크
+
+동시 요청 수(concurrency)를 바꿔가며 요청마다 model.encode 를 직접 호출하는 경우와
+EmbeddingBatcher 로 모아서 처리하는 경우의 처리량과 지연시간(p50, p99)을 비교합니다.
+
+사용 예 (backend 디렉토리에서):
+    python -m benchmarks.embedding_batcher --concurrency 1 4 16 64 --requests 512
+"""
+import argparse
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from sentence_transformers import SentenceTransformer
+
+from src.modules.embedding.service import EmbeddingBatcher
+
+SAMPLE_QUESTIONS = [
+    "2020년에 당뇨병 진단을 받은 환자 수",
+    "성별 환자 수를 보여줘",
+    "show the number of patients by year of birth",
+    "average measurement value per person",
+    "list drugs prescribed more than 10 times",
+    "고혈압 환자의 평균 나이",
+    "count deaths by year",
+    "visit count per care site",
+]
+
+
+def _percentile(latencies: list[float], p: float) -> float:
+    return float(np.percentile(latencies, p)) * 1000
+
+
+def run(encode, concurrency: int, total_requests: int) -> dict:
+    latencies = []
+    lock = threading.Lock()
+
+    def one(i: int):
+        start = time.perf_counter()
+        encode([SAMPLE_QUESTIONS[i % len(SAMPLE_QUESTIONS)]])
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.append(elapsed)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(total_requests)))
+    wall = time.perf_counter() - start
+
+    return {
+        "concurrency": concurrency,
+        "requests": total_requests,
+        "throughput_rps": total_requests / wall,
+        "p50_ms": _percentile(latencies, 50),
+        "p99_ms": _percentile(latencies, 99),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default="all-MiniLM-L6-v2")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--requests", type=int, default=512)
+    parser.add_argument("--max-batch-size", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    model = SentenceTransformer(args.model)
+    batcher = EmbeddingBatcher(model, max_batch_size=args.max_batch_size, max_wait_ms=args.max_wait_ms)
+
+    # warm-up
+    model.encode(SAMPLE_QUESTIONS)
+    batcher.encode(SAMPLE_QUESTIONS)
+
+    results = []
+    print(f"{'mode':<8} {'conc':>5} {'rps':>10} {'p50(ms)':>10} {'p99(ms)':>10}")
+    for concurrency in args.concurrency:
+        for mode, encode in (("direct", model.encode), ("batched", batcher.encode)):
+            result = {"mode": mode, **run(encode, concurrency, args.requests)}
+            results.append(result)
+            print(f"{mode:<8} {concurrency:>5} {result['throughput_rps']:>10.1f} "
+                  f"{result['p50_ms']:>10.2f} {result['p99_ms']:>10.2f}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+벤치마크용 가짜 LLM
+
+gemini_service.generate_response 와 같은 시그니처로, 질문 텍스트의 hash 로 정해지는 SQL 을
+설정한 지연시간 뒤에 돌려줍니다. 같은 질문에는 항상 같은 SQL 과 같은 지연시간을 반환합니다.
+stream_response 는 같은 SQL 을 `sql: ...` 형식의 token 으로 나눠 지연시간 동안 고르게 보냅니다.
+
+환경 변수:
+    FAKE_LLM_LATENCY_MS: 평균 지연시간 (기본 800)
+    FAKE_LLM_JITTER_MS: 질문별로 더해지는 최대 지연시간 (기본 200)
+"""
+import hashlib
+import os
+import time
+from typing import Callable
+
+from langchain_core.messages.ai import AIMessage
+
+from src.modules.gemini.service import ResponseEnvelopeParser
+from src.modules.metrics.service import observe_stage, STAGE_DURATION, STAGE_LLM_CALL, STAGE_LLM_FIRST_TOKEN
+from src.modules.sql_generator.dto import SqlGeneratorRequestDto
+
+FAKE_SQLS = [
+    "select gender_concept_id, count(*) from person group by gender_concept_id",
+    "select year_of_birth, count(*) from person group by year_of_birth order by year_of_birth",
+    "select count(*) from death",
+    "select person_id, value_as_number from measurement where value_as_number is not null limit 100",
+    "select device_concept_id, count(*) from device_exposure group by device_concept_id",
+    "select person_id, observation_period_start_date, observation_period_end_date from observation_period limit 200",
+]
+
+
+def _digest(text: str) -> int:
+    return int(hashlib.sha1(text.encode("utf-8")).hexdigest(), 16)
+
+
+def _latency_sec(digest: int) -> float:
+    latency_ms = float(os.getenv("FAKE_LLM_LATENCY_MS", "800"))
+    jitter_ms = float(os.getenv("FAKE_LLM_JITTER_MS", "200"))
+    return (latency_ms + (digest % 1000) / 1000 * jitter_ms) / 1000
+
+
+def generate_response(prompt: str, sqlGeneratorRequest: SqlGeneratorRequestDto) -> AIMessage:
+    digest = _digest(sqlGeneratorRequest.text)
+
+    with observe_stage(STAGE_LLM_CALL):
+        time.sleep(_latency_sec(digest))
+
+    return AIMessage(content={"sql": FAKE_SQLS[digest % len(FAKE_SQLS)]})
+
+
+def stream_response(
+    prompt: str,
+    sqlGeneratorRequest: SqlGeneratorRequestDto,
+    on_delta: Callable[[str, str], None],
+    is_cancelled: Callable[[], bool],
+) -> AIMessage | None:
+    digest = _digest(sqlGeneratorRequest.text)
+    # Gemini 처럼 4 글자 안팎의 token 으로 나눔
+    text = f"sql: {FAKE_SQLS[digest % len(FAKE_SQLS)]}"
+    tokens = [text[i:i + 4] for i in range(0, len(text), 4)]
+    interval = _latency_sec(digest) / len(tokens)
+    parser = ResponseEnvelopeParser()
+
+    start = time.perf_counter()
+    with observe_stage(STAGE_LLM_CALL):
+        for i, token in enumerate(tokens):
+            time.sleep(interval)
+            if i == 0:
+                STAGE_DURATION.labels(stage=STAGE_LLM_FIRST_TOKEN).observe(time.perf_counter() - start)
+            delta = parser.feed(token)
+            if delta:
+                on_delta(parser.key, delta)
+            if is_cancelled():
+                return None
+
+    return AIMessage(content=parser.close())
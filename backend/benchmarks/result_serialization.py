@@ -0,0 +1,120 @@
+"""
+/sql-executor/ 결과 직렬화 벤치마크
+
+OMOP 테이블과 비슷한 타입(int, Decimal, date, datetime, str)의 가짜 결과를 만들어
+기존 경로 (SqlExecutorResponseDto -> jsonable_encoder -> json.dumps) 와
+새 경로 (serializer.serialize_result_set) 의 MB 당 CPU 시간, 응답 크기, gzip / zstd 압축 후 크기를 비교합니다.
+
+사용 예 (backend 디렉토리에서):
+    python -m benchmarks.result_serialization --rows 100000 --output serialization.json
+"""
+import argparse
+import gzip
+import json
+import random
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from fastapi.encoders import jsonable_encoder
+
+from src.config import settings
+from src.modules.sql_executor.dto import SqlExecutorResponseDto
+from src.modules.sql_executor.serializer import ResultSet, serialize_result_set, zstandard
+
+COLUMNS = [
+    "measurement_id", "person_id", "measurement_concept_id", "measurement_date",
+    "measurement_datetime", "value_as_number", "unit_source_value", "measurement_source_value",
+]
+
+
+def _make_result_set(row_count: int, seed: int) -> ResultSet:
+    rng = random.Random(seed)
+    start = datetime(2015, 1, 1)
+    rows = []
+    for i in range(row_count):
+        measured_at = start + timedelta(minutes=rng.randrange(5_000_000))
+        rows.append((
+            i + 1,
+            rng.randrange(1, 100_000),
+            rng.choice((3004410, 3013682, 3027018, 3025315, 3012888)),
+            measured_at.date(),
+            measured_at,
+            Decimal(f"{rng.uniform(0, 300):.2f}") if rng.random() > 0.1 else None,
+            rng.choice(("mg/dL", "mmHg", "kg", "%", None)),
+            f"LAB{rng.randrange(1000):03d}",
+        ))
+    return ResultSet(columns=COLUMNS, rows=rows)
+
+
+def _legacy_serialize(result_set: ResultSet) -> bytes:
+    # 기존 경로: dict 변환 -> pydantic DTO -> jsonable_encoder -> JSONResponse.render
+    data = [dict(zip(result_set.columns, row)) for row in result_set.rows]
+    content = jsonable_encoder(SqlExecutorResponseDto(data=data, error=None))
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def _measure(serialize, result_set: ResultSet, repeat: int) -> dict:
+    cpu_seconds = []
+    wall_seconds = []
+    body = b""
+    for _ in range(repeat):
+        cpu_start, wall_start = time.process_time(), time.perf_counter()
+        body = serialize(result_set)
+        cpu_seconds.append(time.process_time() - cpu_start)
+        wall_seconds.append(time.perf_counter() - wall_start)
+
+    size_mb = len(body) / 1024 / 1024
+    best_cpu = min(cpu_seconds)
+    report = {
+        "bytes": len(body),
+        "cpu_sec": best_cpu,
+        "wall_sec": min(wall_seconds),
+        "cpu_ms_per_mb": best_cpu * 1000 / size_mb if size_mb else 0.0,
+    }
+
+    start = time.process_time()
+    gzipped = gzip.compress(body, compresslevel=settings.response_gzip_level)
+    report["gzip_bytes"] = len(gzipped)
+    report["gzip_cpu_sec"] = time.process_time() - start
+
+    if zstandard is not None:
+        start = time.process_time()
+        compressed = zstandard.ZstdCompressor(level=settings.response_zstd_level).compress(body)
+        report["zstd_bytes"] = len(compressed)
+        report["zstd_cpu_sec"] = time.process_time() - start
+
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    result_set = _make_result_set(args.rows, args.seed)
+
+    legacy = _measure(_legacy_serialize, result_set, args.repeat)
+    fast = _measure(serialize_result_set, result_set, args.repeat)
+
+    # 두 경로의 결과가 같은 JSON 인지 확인
+    assert json.loads(_legacy_serialize(result_set)) == json.loads(serialize_result_set(result_set))
+
+    report = {
+        "rows": args.rows,
+        "legacy": legacy,
+        "fast": fast,
+        "cpu_speedup": legacy["cpu_sec"] / fast["cpu_sec"] if fast["cpu_sec"] else None,
+    }
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
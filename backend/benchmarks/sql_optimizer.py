@@ -0,0 +1,146 @@
+"""
+/sql-executor/ SQL 재작성(src/modules/sql_executor/optimizer.py) 벤치마크
+
+LLM 이 자주 만드는 형태의 쿼리 (불필요한 서브쿼리 / CTE, EXTRACT(YEAR ...) 조건, IN (SELECT ...))를
+benchmarks/docker-compose.yaml 의 seed 된 PostgreSQL 에서 원래 SQL 과 재작성한 SQL 로 번갈아 실행하고
+쿼리별 실행 시간(중앙값)의 차이와 결과가 같은지를 보고합니다.
+
+사용 예 (backend 디렉토리에서):
+    docker compose -f benchmarks/docker-compose.yaml up -d --wait
+    python -m benchmarks.sql_optimizer --repeat 20 --output sql_optimizer.json
+"""
+import argparse
+import json
+import statistics
+import time
+
+import psycopg2
+
+from benchmarks.load_test import DB_ENV
+from src.modules.sql_executor import optimizer
+
+TARGET_SCHEMA = "ohdsi_test"
+
+# seed 데이터가 있는 허용 테이블만 사용
+QUERIES = {
+    "year_equals": (
+        "select count(*) from measurement where extract(year from measurement_date) = 2009"
+    ),
+    "year_between": (
+        "select person_id, count(*) from device_exposure "
+        "where extract(year from device_exposure_start_date) between 2008 and 2009 group by person_id"
+    ),
+    "in_subquery": (
+        "select gender_concept_id, count(*) from person "
+        "where person_id in (select person_id from death) group by gender_concept_id"
+    ),
+    "wide_cte": (
+        "with m as (select measurement_id, person_id, measurement_concept_id, measurement_date, value_as_number, "
+        "unit_source_value from measurement) "
+        "select measurement_concept_id, avg(value_as_number) from m group by measurement_concept_id"
+    ),
+    "redundant_subquery": (
+        "select p.person_id, p.year_of_birth from (select person_id, year_of_birth, gender_concept_id, race_concept_id "
+        "from person) p where p.year_of_birth < 1950"
+    ),
+    "joined_subqueries": (
+        "select o.person_id, o.observation_period_start_date from (select person_id, observation_period_start_date, "
+        "observation_period_end_date from observation_period) o join (select person_id, death_date from death) d "
+        "on d.person_id = o.person_id where extract(year from d.death_date) >= 2009"
+    ),
+    # device_exposure.provider_id 는 seed 데이터에서 NULL 이므로 NOT IN 은 0 행 (join 으로 unnest 하면 결과가 달라짐)
+    "not_in_nullable": (
+        "select count(*) from person where provider_id not in (select provider_id from device_exposure)"
+    ),
+    "in_subquery_with_year": (
+        "select count(distinct person_id) from measurement "
+        "where person_id in (select person_id from person where year_of_birth between 1930 and 1950) "
+        "and extract(year from measurement_date) = 2009"
+    ),
+}
+
+
+def _connect():
+    connection = psycopg2.connect(
+        host=DB_ENV["DB_HOST"],
+        port=DB_ENV["DB_PORT"],
+        user=DB_ENV["POSTGRES_USER"],
+        password=DB_ENV["POSTGRES_PASSWORD"],
+        dbname=DB_ENV["POSTGRES_DB"],
+    )
+    connection.autocommit = True
+    with connection.cursor() as cursor:
+        cursor.execute(f"SET search_path TO {TARGET_SCHEMA}, public")
+    return connection
+
+
+def _run(cursor, sql: str) -> tuple[float, list]:
+    start = time.perf_counter()
+    cursor.execute(sql)
+    rows = cursor.fetchall()
+    return time.perf_counter() - start, rows
+
+
+def _measure(connection, name: str, sql: str, repeat: int) -> dict:
+    optimized = optimizer.optimize(sql)
+    if optimized is None:
+        return {"query": name, "sql": sql, "rewritten": None}
+    rewritten_sql = optimized[0]
+
+    with connection.cursor() as cursor:
+        # 첫 실행(계획, 캐시 적재)은 제외
+        _, original_rows = _run(cursor, sql)
+        _, rewritten_rows = _run(cursor, rewritten_sql)
+
+        # 순서에 따른 영향이 없도록 번갈아 실행
+        original_seconds, rewritten_seconds = [], []
+        for _ in range(repeat):
+            original_seconds.append(_run(cursor, sql)[0])
+            rewritten_seconds.append(_run(cursor, rewritten_sql)[0])
+
+    original_ms = statistics.median(original_seconds) * 1000
+    rewritten_ms = statistics.median(rewritten_seconds) * 1000
+    return {
+        "query": name,
+        "sql": sql,
+        "rewritten": rewritten_sql,
+        "rows": len(original_rows),
+        "same_result": sorted(map(repr, original_rows)) == sorted(map(repr, rewritten_rows)),
+        "original_ms": original_ms,
+        "rewritten_ms": rewritten_ms,
+        "delta_ms": rewritten_ms - original_ms,
+        "speedup": original_ms / rewritten_ms if rewritten_ms else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--query", nargs="*", choices=sorted(QUERIES), help="run only these queries")
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    connection = _connect()
+    try:
+        results = [_measure(connection, name, QUERIES[name], args.repeat) for name in (args.query or QUERIES)]
+    finally:
+        connection.close()
+
+    for result in results:
+        if result["rewritten"] is None:
+            print(f"{result['query']:<24} not rewritten")
+            continue
+        print(
+            f"{result['query']:<24} {result['original_ms']:8.2f} ms -> {result['rewritten_ms']:8.2f} ms "
+            f"({result['delta_ms']:+.2f} ms, x{result['speedup']:.2f}) rows={result['rows']} "
+            f"same_result={result['same_result']}"
+        )
+
+    report = {"repeat": args.repeat, "queries": results}
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
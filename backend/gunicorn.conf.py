@@ -0,0 +1,34 @@
+# 여러 worker 로 실행할 때 사용하는 gunicorn 설정
+# 실행: gunicorn -c gunicorn.conf.py main:app
+#
+# preload_app 으로 master 에서 app 을 한 번 import 하여
+# 임베딩 모델 로드와 RAG 파일 생성을 fork 전에 끝내고,
+# worker 들은 모델 가중치를 copy-on-write 로, RAG index 를 memory-mapped 파일로 공유함
+import multiprocessing
+import os
+import shutil
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+timeout = 300
+
+# worker 들이 공유할 RAG 디렉토리, master pid 를 기동 구분용 key 로 사용
+os.environ.setdefault("RAG_SHARED_DIR", "/tmp/hyu-cdw-rag")
+os.environ.setdefault("RAG_SHARED_BOOT_KEY", str(os.getpid()))
+
+# /metrics 가 모든 worker 의 값을 합쳐서 보여주도록 prometheus multiprocess 모드 사용
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/tmp/hyu-cdw-prometheus")
+
+
+def on_starting(server):
+    # 이전 기동의 metric 파일 제거
+    multiproc_dir = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    shutil.rmtree(multiproc_dir, ignore_errors=True)
+    os.makedirs(multiproc_dir, exist_ok=True)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
@@ -1,6 +1,15 @@
 from fastapi import FastAPI
 from src.modules.sql_generator.router import router as sql_generator_router
 from src.modules.sql_executor.router import router as sql_executor_router
+from src.modules.metrics.router import router as metrics_router
+from src.modules.export.router import router as export_router
+from src.modules.ask_and_run.router import router as ask_and_run_router
+from src.modules.concept_search.router import router as concept_search_router
+from src.modules.cohort.router import router as cohort_router
+from src.modules.tracing.service import tracing_middleware, REQUEST_ID_HEADER
+from src.modules.scheduler.service import user_context_middleware
+from src.modules.log.service import start_log_partition_maintenance
+from src.modules.cohort.service import start_cohort_cleanup
 from fastapi.middleware.cors import CORSMiddleware
 from src.config import settings
 
@@ -8,6 +17,11 @@ app = FastAPI()
 
 app.include_router(sql_generator_router)
 app.include_router(sql_executor_router)
+app.include_router(metrics_router)
+app.include_router(export_router)
+app.include_router(ask_and_run_router)
+app.include_router(concept_search_router)
+app.include_router(cohort_router)
 
 app.add_middleware(
     CORSMiddleware,
@@ -15,8 +29,21 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[REQUEST_ID_HEADER, "Retry-After"],
 )
 
+# 스케줄러의 사용자별 대기열 구분용
+app.middleware("http")(user_context_middleware)
+
+# 요청별 request id 부여 및 span 기록 (마지막에 추가한 middleware 가 가장 바깥에서 실행됨)
+app.middleware("http")(tracing_middleware)
+
+# 로그 테이블의 다음 달 파티션 생성 / 보관 기간이 지난 파티션 삭제, 만료된 cohort handle 삭제
+@app.on_event("startup")
+def start_background_jobs():
+    start_log_partition_maintenance()
+    start_cohort_cleanup()
+
 @app.get("/", response_model=dict, tags=["Health Check"])
 def health_check():
     return {"status": "ok"}
\ No newline at end of file
@@ -1,5 +1,9 @@
 #!/bin/bash
 
+# 컨테이너 최초 생성 시에만 사용되는 순차 적재 스크립트
+# 이미 떠 있는 DB 를 재적재하거나 새 추출본을 추가할 때는 scripts/load_omop.py 사용
+# (인덱스/제약조건을 적재 후 생성하고 테이블을 병렬로 COPY 하므로 훨씬 빠름)
+
 # CSV 파일들이 위치한 디렉토리
 CSV_DIR="/docker-entrypoint-initdb.d/data"
 # 데이터베이스 접속 정보
@@ -0,0 +1,85 @@
+"""
+RAG 임베딩 모델을 ONNX 로 export 하고 int8 동적 양자화를 적용하는 스크립트
+
+PyTorch 와 sentence-transformers 가 설치된 환경에서 한 번 실행하면
+onnx backend(EMBEDDING_BACKEND=onnx)가 사용하는 모델 디렉토리가 만들어집니다.
+
+사용 예 (backend 디렉토리에서):
+    python -m scripts.export_onnx_embedding --model all-MiniLM-L6-v2 --output models/all-MiniLM-L6-v2-onnx
+"""
+import argparse
+import json
+import os
+
+import numpy as np
+import torch
+from onnxruntime.quantization import QuantType, quantize_dynamic
+from sentence_transformers import SentenceTransformer
+from sentence_transformers.models import Normalize
+
+from src.modules.embedding.onnx_model import CONFIG_FILE, MODEL_FILE, TOKENIZER_FILE, OnnxEmbeddingModel
+
+FP32_MODEL_FILE = "model_fp32.onnx"
+CHECK_SENTENCES = [
+    "show person",
+    "2020년에 당뇨병 진단을 받은 환자 수",
+    "average measurement value per person by gender",
+]
+
+
+def export(model_name: str, output_dir: str, opset: int = 14):
+    os.makedirs(output_dir, exist_ok=True)
+
+    st_model = SentenceTransformer(model_name, device="cpu")
+    transformer = st_model[0].auto_model.eval()
+    tokenizer = st_model.tokenizer
+
+    dummy = tokenizer(["hello world"], return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in dummy]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+    fp32_path = os.path.join(output_dir, FP32_MODEL_FILE)
+    with torch.no_grad():
+        torch.onnx.export(
+            transformer,
+            tuple(dummy[name] for name in input_names),
+            fp32_path,
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset,
+        )
+
+    quantize_dynamic(fp32_path, os.path.join(output_dir, MODEL_FILE), weight_type=QuantType.QInt8)
+    os.remove(fp32_path)
+
+    tokenizer.backend_tokenizer.save(os.path.join(output_dir, TOKENIZER_FILE))
+    with open(os.path.join(output_dir, CONFIG_FILE), "w", encoding="utf-8") as f:
+        json.dump({
+            "model_name": model_name,
+            "dimension": st_model.get_sentence_embedding_dimension(),
+            "max_seq_length": st_model.max_seq_length,
+            "pad_token_id": tokenizer.pad_token_id,
+            "normalize": any(isinstance(module, Normalize) for module in st_model),
+        }, f, indent=2)
+
+    # torch 결과와 비교해서 벡터가 크게 달라지지 않았는지 확인
+    expected = st_model.encode(CHECK_SENTENCES)
+    actual = OnnxEmbeddingModel(output_dir).encode(CHECK_SENTENCES)
+    cosine = (expected * actual).sum(axis=1) / (np.linalg.norm(expected, axis=1) * np.linalg.norm(actual, axis=1))
+    print(f"Exported to {output_dir}, cosine similarity to torch: min={cosine.min():.4f} mean={cosine.mean():.4f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default="all-MiniLM-L6-v2")
+    parser.add_argument("--output", default="models/all-MiniLM-L6-v2-onnx")
+    parser.add_argument("--opset", type=int, default=14)
+    args = parser.parse_args()
+
+    export(args.model, args.output, args.opset)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,339 @@
+"""
+OMOP CDM CSV 병렬 적재 스크립트
+
+postgres-init/5-seed.sh 는 테이블마다 psql 프로세스를 띄워 TRUNCATE 하고
+인덱스, PK, FK 가 모두 걸린 상태에서 \\copy 를 한 테이블씩 순서대로 실행합니다.
+이 스크립트는 아래 순서로 같은 데이터를 훨씬 빠르게 적재합니다.
+
+1. (full 모드) 2-indices.sql ~ 4-constraints.sql 에 정의된 인덱스/제약조건 삭제 후
+   스키마의 모든 테이블(--tables 를 주면 그 테이블만)을 한 번의 TRUNCATE 로 비움
+2. 여러 커넥션에서 테이블별 COPY FROM STDIN 을 병렬 실행
+3. (full 모드) PK -> 인덱스(+CLUSTER) -> FK 순서로 재생성, 테이블 단위 병렬
+4. 적재한 테이블에 ANALYZE 실행
+5. data_version 테이블의 버전을 올려 API 의 ETag 캐시를 무효화
+
+append 모드는 새로 추출한 CSV 를 기존 데이터 뒤에 추가하는 용도로,
+인덱스와 제약조건은 그대로 둔 채 COPY, ANALYZE, 버전 갱신만 수행합니다.
+
+사용 예:
+    python -m scripts.load_omop
+    python -m scripts.load_omop --mode append --csv-dir /data/extract_2025_06 --jobs 4
+"""
+import argparse
+import os
+import re
+import sys
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+
+import psycopg2
+
+DB_SCHEMA = "ohdsi_test"
+INIT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "postgres-init")
+CSV_DIR = os.path.join(INIT_DIR, "data")
+
+PRIMARY_KEY_FILE = "3-primary_keys.sql"
+INDEX_FILE = "2-indices.sql"
+CONSTRAINT_FILE = "4-constraints.sql"
+
+# 5-seed.sh 와 동일한 포맷 (탭 구분, 빈 문자열은 NULL)
+COPY_OPTIONS = "DELIMITER E'\\t' NULL ''"
+COPY_BUFFER_SIZE = 1024 * 1024
+
+
+@dataclass
+class LoadResult:
+    table: str
+    rows: int = 0
+    bytes: int = 0
+    seconds: float = 0.0
+    error: str | None = None
+
+    @property
+    def rows_per_sec(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    @property
+    def mb_per_sec(self) -> float:
+        return self.bytes / 1024 / 1024 / self.seconds if self.seconds else 0.0
+
+
+def _get_dsn(dsn: str | None) -> str:
+    # DATABASE_URL 은 sqlalchemy 형식(postgresql+psycopg2://)일 수 있으므로 드라이버 표기 제거
+    dsn = dsn or os.getenv("DATABASE_URL")
+    if not dsn:
+        raise ValueError("DATABASE_URL environment variable is not set")
+    return re.sub(r"^postgresql\+\w+://", "postgresql://", dsn)
+
+
+def _connect(dsn: str, maintenance_work_mem: str | None = None):
+    conn = psycopg2.connect(dsn)
+    conn.autocommit = True
+    with conn.cursor() as cur:
+        # 적재 중에는 WAL flush 대기 불필요
+        cur.execute("SET synchronous_commit TO off")
+        if maintenance_work_mem:
+            cur.execute("SET maintenance_work_mem TO %s", (maintenance_work_mem,))
+    return conn
+
+
+def _read_statements(file_name: str) -> list[str]:
+    """init SQL 파일에서 주석을 제거하고 문장 단위로 나눠 반환합니다."""
+    with open(os.path.join(INIT_DIR, file_name), "r", encoding="utf-8") as f:
+        sql = f.read()
+
+    sql = re.sub(r"/\*.*?\*/", "", sql, flags=re.S)
+    sql = "\n".join(line for line in sql.splitlines() if not line.strip().startswith("--"))
+
+    return [stmt.strip() for stmt in sql.split(";") if stmt.strip()]
+
+
+def _statement_table(stmt: str) -> str:
+    match = re.search(rf"{DB_SCHEMA}\.(\w+)", stmt, flags=re.I)
+    return match.group(1).lower() if match else ""
+
+
+def _group_by_table(statements: list[str]) -> dict[str, list[str]]:
+    # 같은 테이블의 CREATE INDEX -> CLUSTER 순서는 유지해야 하므로 테이블 단위로 묶음
+    groups: dict[str, list[str]] = {}
+    for stmt in statements:
+        groups.setdefault(_statement_table(stmt), []).append(stmt)
+    return groups
+
+
+def _run_groups(dsn: str, groups: dict[str, list[str]], jobs: int, maintenance_work_mem: str | None):
+    def run(table: str, statements: list[str]):
+        conn = _connect(dsn, maintenance_work_mem)
+        try:
+            with conn.cursor() as cur:
+                for stmt in statements:
+                    cur.execute(stmt)
+        finally:
+            conn.close()
+        return table
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        futures = [pool.submit(run, table, statements) for table, statements in groups.items()]
+        for future in as_completed(futures):
+            future.result()
+
+
+def _find_csv_files(csv_dir: str, tables: list[str] | None) -> dict[str, str]:
+    # 파일명은 대소문자 구분 없이 테이블명과 매칭 (person.csv, PERSON.csv 모두 허용)
+    csv_files = {}
+    for file_name in os.listdir(csv_dir):
+        name, ext = os.path.splitext(file_name)
+        if ext.lower() == ".csv":
+            csv_files[name.lower()] = os.path.join(csv_dir, file_name)
+
+    if tables:
+        missing = [table for table in tables if table not in csv_files]
+        if missing:
+            raise FileNotFoundError(f"CSV not found for tables: {', '.join(missing)}")
+        csv_files = {table: csv_files[table] for table in tables}
+
+    return csv_files
+
+
+def _schema_tables(conn) -> list[str]:
+    with conn.cursor() as cur:
+        cur.execute(
+            "SELECT table_name FROM information_schema.tables "
+            "WHERE table_schema = %s AND table_type = 'BASE TABLE'",
+            (DB_SCHEMA,),
+        )
+        return [row[0] for row in cur.fetchall()]
+
+
+def _drop_indexes_and_constraints(conn):
+    """init SQL 에서 만든 FK, PK, 인덱스를 역순으로 삭제합니다."""
+    with conn.cursor() as cur:
+        for file_name in (CONSTRAINT_FILE, PRIMARY_KEY_FILE):
+            for stmt in _read_statements(file_name):
+                match = re.search(r"ADD\s+CONSTRAINT\s+(\w+)", stmt, flags=re.I)
+                if match:
+                    cur.execute(
+                        f"ALTER TABLE {DB_SCHEMA}.{_statement_table(stmt)} "
+                        f"DROP CONSTRAINT IF EXISTS {match.group(1)} CASCADE"
+                    )
+
+        for stmt in _read_statements(INDEX_FILE):
+            match = re.search(r"CREATE\s+INDEX\s+(\w+)", stmt, flags=re.I)
+            if match:
+                cur.execute(f"DROP INDEX IF EXISTS {DB_SCHEMA}.{match.group(1)}")
+
+
+def _copy_table(dsn: str, table: str, csv_file: str) -> LoadResult:
+    result = LoadResult(table=table, bytes=os.path.getsize(csv_file))
+    start = time.perf_counter()
+
+    try:
+        conn = _connect(dsn)
+        try:
+            with conn.cursor() as cur, open(csv_file, "r", encoding="utf-8") as f:
+                cur.copy_expert(f"COPY {DB_SCHEMA}.{table} FROM STDIN WITH {COPY_OPTIONS}", f, size=COPY_BUFFER_SIZE)
+                result.rows = cur.rowcount
+        finally:
+            conn.close()
+    except Exception as e:
+        result.error = str(e).strip()
+
+    result.seconds = time.perf_counter() - start
+    return result
+
+
+def _analyze(dsn: str, tables: list[str], jobs: int):
+    _run_groups(dsn, {table: [f"ANALYZE {DB_SCHEMA}.{table}"] for table in tables}, jobs, None)
+
+
+def _bump_data_version(dsn: str) -> int | None:
+    """
+    data_version 테이블(alembic 으로 생성)의 스키마 버전을 1 올리고 새 버전을 반환합니다.
+    테이블이 없으면 None 을 반환합니다 (API 는 테이블 통계 변화로도 변경을 감지함).
+    """
+    conn = _connect(dsn)
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT to_regclass('public.data_version')")
+            if cur.fetchone()[0] is None:
+                return None
+            cur.execute(
+                "INSERT INTO public.data_version (schema_name, version, updated_at) VALUES (%s, 1, now()) "
+                "ON CONFLICT (schema_name) DO UPDATE SET version = data_version.version + 1, updated_at = now() "
+                "RETURNING version",
+                (DB_SCHEMA,),
+            )
+            return cur.fetchone()[0]
+    finally:
+        conn.close()
+
+
+def load(
+    dsn: str,
+    csv_dir: str = CSV_DIR,
+    mode: str = "full",
+    jobs: int = 4,
+    tables: list[str] | None = None,
+    maintenance_work_mem: str | None = "512MB",
+    cluster: bool = True,
+) -> list[LoadResult]:
+    """
+    CSV 디렉토리의 파일들을 OMOP 스키마에 병렬 COPY 로 적재합니다.
+
+    Args:
+        dsn: PostgreSQL 접속 문자열
+        csv_dir: <table>.csv 파일들이 있는 디렉토리
+        mode: "full" 은 스키마(tables 가 있으면 그 테이블만)를 비우고 인덱스를 적재 후 재생성, "append" 는 기존 데이터에 추가
+        jobs: 동시에 사용할 커넥션 수
+        tables: 적재할 테이블 목록, None 이면 csv_dir 의 모든 CSV
+        maintenance_work_mem: 인덱스/PK 생성 세션에 적용할 maintenance_work_mem
+        cluster: full 모드에서 2-indices.sql 의 CLUSTER 문 실행 여부
+
+    Returns:
+        테이블별 적재 결과 목록
+    """
+    if mode not in ("full", "append"):
+        raise ValueError(f"Unknown mode: {mode}")
+
+    csv_files = _find_csv_files(csv_dir, tables)
+    total_start = time.perf_counter()
+
+    if mode == "full":
+        conn = _connect(dsn)
+        try:
+            step_start = time.perf_counter()
+            _drop_indexes_and_constraints(conn)
+            # --tables 로 일부만 다시 적재할 때는 그 테이블만 비움 (나머지 테이블의 데이터는 유지)
+            schema_tables = list(csv_files) if tables else _schema_tables(conn)
+            with conn.cursor() as cur:
+                cur.execute("TRUNCATE TABLE " + ", ".join(f"{DB_SCHEMA}.{t}" for t in schema_tables))
+            print(f"[prepare] dropped indexes/constraints, truncated {len(schema_tables)} tables "
+                  f"({time.perf_counter() - step_start:.2f}s)")
+        finally:
+            conn.close()
+
+    # 큰 파일부터 시작해야 마지막에 큰 테이블 하나만 남는 상황을 줄일 수 있음
+    ordered = sorted(csv_files.items(), key=lambda item: os.path.getsize(item[1]), reverse=True)
+    results = []
+
+    step_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        futures = [pool.submit(_copy_table, dsn, table, csv_file) for table, csv_file in ordered]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            if result.error:
+                print(f"[copy] {result.table}: FAILED - {result.error}")
+            else:
+                print(f"[copy] {result.table}: {result.rows} rows, {result.bytes / 1024 / 1024:.1f} MB "
+                      f"in {result.seconds:.2f}s ({result.rows_per_sec:,.0f} rows/s, {result.mb_per_sec:.1f} MB/s)")
+    print(f"[copy] done ({time.perf_counter() - step_start:.2f}s)")
+
+    if mode == "full":
+        index_statements = _read_statements(INDEX_FILE)
+        if not cluster:
+            index_statements = [stmt for stmt in index_statements if not stmt.upper().startswith("CLUSTER")]
+
+        # PK 가 있어야 FK 를 만들 수 있으므로 PK -> 인덱스 -> FK 순서
+        # FK 는 참조 테이블에도 lock 을 잡으므로 병렬로 돌리지 않음
+        for label, statements, step_jobs in (
+            ("primary keys", _read_statements(PRIMARY_KEY_FILE), jobs),
+            ("indices", index_statements, jobs),
+            ("constraints", _read_statements(CONSTRAINT_FILE), 1),
+        ):
+            step_start = time.perf_counter()
+            groups = _group_by_table(statements) if step_jobs > 1 else {"": statements}
+            _run_groups(dsn, groups, step_jobs, maintenance_work_mem)
+            print(f"[build] {label}: {len(statements)} statements ({time.perf_counter() - step_start:.2f}s)")
+
+    step_start = time.perf_counter()
+    loaded_tables = [result.table for result in results if not result.error]
+    _analyze(dsn, loaded_tables, jobs)
+    print(f"[analyze] {len(loaded_tables)} tables ({time.perf_counter() - step_start:.2f}s)")
+
+    if loaded_tables:
+        version = _bump_data_version(dsn)
+        print(f"[version] {DB_SCHEMA} data version: {version if version is not None else 'data_version table not found'}")
+
+    total_rows = sum(result.rows for result in results)
+    total_seconds = time.perf_counter() - total_start
+    print(f"Total: {total_rows} rows in {total_seconds:.2f}s")
+    print(f"Success tables: {' '.join(sorted(loaded_tables))}")
+    print(f"Failed tables: {' '.join(sorted(result.table for result in results if result.error))}")
+
+    return results
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Parallel COPY loader for OMOP CDM CSV files")
+    parser.add_argument("--dsn", help="PostgreSQL DSN (default: DATABASE_URL)")
+    parser.add_argument("--csv-dir", default=CSV_DIR, help="directory containing <table>.csv files")
+    parser.add_argument("--mode", choices=("full", "append"), default="full")
+    parser.add_argument("--jobs", type=int, default=4, help="number of parallel connections")
+    parser.add_argument("--tables", nargs="*", help="only load these tables")
+    parser.add_argument("--maintenance-work-mem", default="512MB")
+    parser.add_argument("--no-cluster", action="store_true", help="skip CLUSTER statements in full mode")
+    args = parser.parse_args(argv)
+
+    try:
+        results = load(
+            dsn=_get_dsn(args.dsn),
+            csv_dir=args.csv_dir,
+            mode=args.mode,
+            jobs=args.jobs,
+            tables=[table.lower() for table in args.tables] if args.tables else None,
+            maintenance_work_mem=args.maintenance_work_mem,
+            cluster=not args.no_cluster,
+        )
+    except Exception as e:
+        print(f"Load failed: {e}")
+        traceback.print_exc()
+        return 1
+
+    return 1 if any(result.error for result in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
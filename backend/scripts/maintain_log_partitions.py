@@ -0,0 +1,23 @@
+"""
+로그 테이블 파티션 관리 스크립트
+
+API 서버는 settings.log_partition_maintenance_interval_hours 마다 같은 작업을 실행하지만,
+서버를 띄우지 않는 환경이나 cron 에서 직접 실행할 때 사용합니다.
+이번 달부터 log_partitions_ahead_months 달 뒤까지 파티션을 만들고
+log_retention_months 보다 오래된 파티션을 삭제합니다.
+
+사용 예 (backend 디렉토리에서):
+    python -m scripts.maintain_log_partitions
+"""
+from src.modules.log.service import maintain_log_partitions
+
+
+def main() -> int:
+    report = maintain_log_partitions()
+    print(f"Created partitions: {' '.join(report['created']) or '-'}")
+    print(f"Dropped partitions: {' '.join(report['dropped']) or '-'}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -13,6 +13,85 @@ class _Settings(BaseSettings):
     db_host: str
     db_port: int
     
+    # RAG 임베딩 설정
+    embedding_model_name: str = "all-MiniLM-L6-v2"
+    # "torch" (SentenceTransformer) 또는 "onnx" (scripts/export_onnx_embedding.py 로 만든 int8 모델)
+    embedding_backend: str = "torch"
+    embedding_onnx_model_dir: str = "models/all-MiniLM-L6-v2-onnx"
+    embedding_batch_max_size: int = 64
+    embedding_batch_max_wait_ms: float = 5.0
+    # 임베딩 캐시, dir 이 비어 있으면 메모리 LRU 만 사용
+    embedding_cache_memory_size: int = 10000
+    embedding_cache_dir: str = ""
+    
+    # RAG 예시 추가 시 새 스냅샷 게시 조건 (pending 개수 또는 경과 시간)
+    rag_publish_batch_size: int = 32
+    rag_publish_interval_sec: float = 1.0
+    
+    # 값이 있으면 여러 worker 가 이 디렉토리의 memory-mapped RAG 파일을 공유 (gunicorn.conf.py 참고)
+    rag_shared_dir: str = ""
+    rag_sync_interval_sec: float = 1.0
+    
+    # 값이 있으면 요청별 span 을 이 경로의 JSONL 파일로 기록
+    trace_export_path: str = ""
+    
+    # /sql-generator/batch 설정
+    sql_generator_batch_max_size: int = 200
+    sql_generator_batch_concurrency: int = 8
+    
+    # /export 설정 (COPY TO STDOUT 으로 결과를 파일로 내보내는 background 작업)
+    export_dir: str = "exports"
+    export_max_concurrency: int = 2
+    export_retention_hours: int = 24
+    # gzip 압축 레벨, 낮을수록 빠름 (1 이면 대부분 디스크 속도에 가까움)
+    export_gzip_level: int = 1
+    # parquet 변환 시 한 번에 읽는 CSV block 크기 (byte)
+    export_parquet_block_size: int = 16 * 1024 * 1024
+    
+    # 스케줄러 설정 (worker 프로세스 단위)
+    # interactive: /sql-executor/, /sql-generator/  batch: /export, /sql-generator/batch
+    sql_scheduler_max_concurrency: int = 8
+    sql_scheduler_batch_max_concurrency: int = 2
+    llm_scheduler_max_concurrency: int = 8
+    llm_scheduler_batch_max_concurrency: int = 4
+    scheduler_interactive_weight: float = 4.0
+    scheduler_batch_weight: float = 1.0
+    # lane 별 / 사용자별 최대 대기 수, 넘으면 429
+    # (사용자는 frontend 가 설정한 X-User-ID, 없으면 클라이언트 주소 기준)
+    scheduler_max_queue: int = 64
+    scheduler_user_max_queue: int = 8
+    scheduler_max_wait_sec: float = 30.0
+    
+    # 커넥션마다 보관하는 prepared statement 수 (0 이면 사용 안 함)
+    sql_executor_prepared_cache_size: int = 100
+    # 실행 전에 sqlglot optimizer 로 SQL 재작성 (benchmarks/sql_optimizer.py 로 효과 확인 후 사용)
+    sql_executor_optimize: bool = False
+    
+    # 데이터 버전 확인 주기, /sql-executor/ 의 ETag 에 사용 (0 이면 ETag 사용 안 함)
+    data_version_check_interval_sec: float = 5.0
+    
+    # /ask-and-run/ 응답에서 한 줄(rows event)에 담는 행 수
+    ask_and_run_chunk_rows: int = 1000
+    
+    # /sql-executor/ 결과 응답 압축 (Accept-Encoding 에 따라 zstd 또는 gzip)
+    response_compression_min_size: int = 1024
+    response_gzip_level: int = 5
+    response_zstd_level: int = 3
+    
+    # concept 검색 색인: vocabulary 변경 확인 주기, prompt 에 넣을 concept 후보 수 (0 이면 넣지 않음)
+    concept_index_check_interval_sec: float = 300.0
+    concept_prompt_max_candidates: int = 5
+    
+    # /cohort handle 유지 시간 (분), 만료된 handle 테이블 삭제 주기 (분, 0 이면 cohort 생성 시에만 삭제)
+    cohort_default_ttl_minutes: int = 60
+    cohort_max_ttl_minutes: int = 24 * 60
+    cohort_cleanup_interval_minutes: float = 10.0
+    
+    # sql_generator_log 월별 파티션 관리 (보관 기간, 미리 만들어 둘 달 수, 실행 주기)
+    log_retention_months: int = 6
+    log_partitions_ahead_months: int = 2
+    log_partition_maintenance_interval_hours: float = 6.0
+    
     model_config = SettingsConfigDict(
         env_file=".env",
         env_file_encoding="utf-8",
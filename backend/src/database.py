@@ -5,14 +5,30 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.ext.declarative import declarative_base
 from typing import Generator
+from src.modules.metrics import service as metrics_service
+from src.modules.tracing import service as tracing_service
 
 # SQLAlchemy 엔진 생성
 # connect_args는 필요에 따라 추가 (예: SSL 설정)
 _engine = create_engine(os.getenv("DATABASE_URL")) # .env에서 로드한 URL 사용
 
+# 실행되는 SQL 에 request id 주석 추가
+tracing_service.instrument_engine(_engine)
+
 # 데이터베이스 세션 생성기
 _SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=_engine)
 print("DB connected.")
+
+# 커넥션 풀 사용량 metric
+metrics_service.register_gauge_callback(
+    "db_pool_checked_out", "Number of DB connections currently checked out of the pool", lambda: _engine.pool.checkedout()
+)
+metrics_service.register_gauge_callback(
+    "db_pool_size", "Configured size of the DB connection pool", lambda: _engine.pool.size()
+)
+
+# gunicorn preload 로 fork 된 worker 가 부모의 커넥션을 같이 쓰지 않도록 pool 을 새로 만듦
+os.register_at_fork(after_in_child=lambda: _engine.dispose(close=False))
 # 모든 모델이 상속할 기본 클래스
 # 이 Base 객체가 Alembic과 모델을 연결하는 핵심입니다.
 Base = declarative_base()
@@ -28,6 +44,14 @@ def get_db() -> Generator[Session, None, None]:
     finally:
         db.close()
 
+def create_dedicated_connection():
+    """
+    pool 을 거치지 않는 새 DBAPI(psycopg2) 커넥션을 만듭니다.
+    export 처럼 오래 걸리는 작업이 API 요청용 커넥션 풀을 점유하지 않도록 사용하며, 호출한 쪽에서 닫아야 합니다.
+    """
+    cargs, cparams = _engine.dialect.create_connect_args(_engine.url)
+    return _engine.dialect.connect(*cargs, **cparams)
+
 """
     내부 service (LOG) 는 기본적으로 router 계층이 없어서
     fastapi 의존성 주입으로 작동하는 위의 코드 실행 불가로
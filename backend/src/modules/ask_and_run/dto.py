@@ -0,0 +1,20 @@
+from enum import Enum
+
+
+class AskAndRunEvent(str, Enum):
+    """
+    /ask-and-run/ 응답(NDJSON)의 한 줄마다 들어가는 event 종류
+
+    - sql: {"event": "sql", "sql": ..., "error": ...}   생성된 SQL (항상 첫 줄, 생성 실패 시 sql 은 null)
+    - columns: {"event": "columns", "columns": [...]}
+    - rows: {"event": "rows", "rows": [[...], ...]}     settings.ask_and_run_chunk_rows 행씩
+    - result: {"event": "result", "data": {...}}        행을 반환하지 않는 쿼리의 결과
+    - error: {"event": "error", "error": ...}           검증 / 실행 실패 (마지막 줄)
+    - done: {"event": "done", "row_count": ...}         정상 종료 (마지막 줄)
+    """
+    SQL = "sql"
+    COLUMNS = "columns"
+    ROWS = "rows"
+    RESULT = "result"
+    ERROR = "error"
+    DONE = "done"
@@ -0,0 +1,17 @@
+from fastapi import APIRouter
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+
+from src.modules.ask_and_run import service as ask_and_run_service
+from src.modules.sql_generator import service as sql_generator_service
+from src.modules.sql_generator.dto import SqlGeneratorRequestDto
+
+
+router = APIRouter(prefix="/ask-and-run", tags=["Text to SQL"])
+
+
+@router.post("/")
+async def ask_and_run(body: SqlGeneratorRequestDto) -> StreamingResponse:
+    # SQL 생성 실패 (429, 500 등) 는 스트림을 시작하기 전에 HTTP 상태 코드로 응답
+    generated = await run_in_threadpool(sql_generator_service.generate, body)
+    return StreamingResponse(ask_and_run_service.stream(generated), media_type="application/x-ndjson")
@@ -0,0 +1,70 @@
+import traceback
+from typing import AsyncIterator
+
+from fastapi import HTTPException
+
+from src.config import settings
+from src.database import get_db_internal
+from src.modules.ask_and_run.dto import AskAndRunEvent
+from src.modules.sql_generator.dto import SqlGeneratorResponseDto
+from src.modules.sql_executor import service as sql_executor_service
+from src.modules.sql_executor.dto import SqlExecutorRequestDto, parse_sql, validate_sql
+from src.modules.sql_executor.serializer import ResultSet, dumps
+
+"""
+    /sql-generator/ 와 /sql-executor/ 를 한 요청으로 처리합니다.
+    생성된 SQL 을 먼저 보내고 바로 실행해서 결과 행을 이어서 보내므로,
+    클라이언트 <-> 서버 왕복 한 번과 SQL 재파싱 / 재검증이 줄어듭니다.
+"""
+
+
+async def stream(sqlGeneratorResponseDto: SqlGeneratorResponseDto) -> AsyncIterator[bytes]:
+    sql = sqlGeneratorResponseDto.sql
+    if not sql:
+        yield _event(AskAndRunEvent.SQL, sql=None, error=sqlGeneratorResponseDto.error)
+        return
+
+    # 한 번 파싱한 AST 로 검증하고, 같은 AST 를 실행 단계(prepared statement shape 계산)에서도 사용
+    try:
+        ast = parse_sql(sql)
+        validate_sql(sql, ast)
+    except ValueError as e:
+        yield _event(AskAndRunEvent.SQL, sql=sql, error=None)
+        yield _event(AskAndRunEvent.ERROR, error=str(e))
+        return
+
+    yield _event(AskAndRunEvent.SQL, sql=sql, error=None)
+
+    # StreamingResponse 는 Depends(get_db) 의 정리 코드가 응답 전에 실행되므로 세션을 직접 관리
+    db = get_db_internal()
+    try:
+        # 이미 검증했으므로 DTO 검증(재파싱)을 건너뜀
+        result = await sql_executor_service.execute(SqlExecutorRequestDto.model_construct(sql=sql), db, ast)
+    except HTTPException as e:
+        yield _event(AskAndRunEvent.ERROR, error=str(e.detail))
+        return
+    except Exception as e:
+        print(f"Unexpected Error: {e}")
+        traceback.print_exc()
+        yield _event(AskAndRunEvent.ERROR, error="An unexpected server error occurred.")
+        return
+    finally:
+        db.close()
+
+    if not isinstance(result, ResultSet):
+        yield _event(AskAndRunEvent.RESULT, data=result.data)
+        yield _event(AskAndRunEvent.DONE, row_count=None)
+        return
+
+    yield _event(AskAndRunEvent.COLUMNS, columns=result.columns)
+
+    chunk_rows = max(settings.ask_and_run_chunk_rows, 1)
+    rows = result.rows
+    for start in range(0, len(rows), chunk_rows):
+        yield _event(AskAndRunEvent.ROWS, rows=[list(row) for row in rows[start:start + chunk_rows]])
+
+    yield _event(AskAndRunEvent.DONE, row_count=len(rows))
+
+
+def _event(event: AskAndRunEvent, **content) -> bytes:
+    return dumps({"event": event.value, **content}) + b"\n"
@@ -0,0 +1,24 @@
+from datetime import datetime
+from typing import Optional
+from pydantic import BaseModel, Field
+
+from src.config import settings
+from src.modules.sql_executor.dto import SqlExecutorRequestDto
+
+
+# sql 검증은 SqlExecutorRequestDto 의 validator 를 그대로 사용 (person_id 컬럼 여부는 service 에서 확인)
+class CohortCreateRequestDto(SqlExecutorRequestDto):
+    ttl_minutes: Optional[int] = Field(
+        None,
+        ge=1,
+        le=settings.cohort_max_ttl_minutes,
+        title="TTL (minutes)",
+        description="How long the cohort handle stays available (default: settings.cohort_default_ttl_minutes)",
+    )
+
+
+class CohortHandleResponseDto(BaseModel):
+    handle: str = Field(..., title="Handle", description="Table name to reference in later queries (column: person_id)")
+    row_count: int = Field(..., title="Row count", description="Number of distinct persons in the cohort")
+    created_at: datetime = Field(..., title="Created at")
+    expires_at: datetime = Field(..., title="Expires at")
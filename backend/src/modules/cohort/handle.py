@@ -0,0 +1,44 @@
+import re
+import uuid
+from typing import Optional
+
+from sqlglot import exp, parse_one
+
+"""
+    cohort handle 은 materialize 한 cohort 테이블 이름이기도 합니다.
+    (예: cohort_3f2a9c0d4b1e8a77, COHORT_SCHEMA 에 UNLOGGED 테이블로 생성)
+    sql_executor 의 search_path 에 COHORT_SCHEMA 가 포함되어 있어 이후 쿼리에서 테이블처럼 참조할 수 있습니다.
+
+    예: SELECT count(*) FROM condition_occurrence co JOIN cohort_3f2a9c0d4b1e8a77 c ON c.person_id = co.person_id
+"""
+
+COHORT_SCHEMA = "cohort_cache"
+COHORT_COLUMNS = {"person_id"}
+
+_HANDLE_PATTERN = re.compile(r"^cohort_[0-9a-f]{16}$")
+_HANDLE_SEARCH_PATTERN = re.compile(r"\bcohort_[0-9a-f]{16}\b")
+
+
+def new_handle() -> str:
+    return f"cohort_{uuid.uuid4().hex[:16]}"
+
+
+def is_cohort_handle(name: str) -> bool:
+    return bool(_HANDLE_PATTERN.match(name))
+
+
+def referenced_handles(sql: str, ast: Optional[exp.Expression] = None) -> set[str]:
+    """
+    SQL 에서 테이블로 참조한 cohort handle 목록을 반환합니다.
+    handle 처럼 보이는 이름이 없으면 파싱하지 않고, 파싱할 수 없으면 이름이 나온 곳을 모두 handle 로 봅니다.
+    """
+    names = set(_HANDLE_SEARCH_PATTERN.findall(sql))
+    if not names:
+        return set()
+
+    if ast is None:
+        try:
+            ast = parse_one(sql, read="postgres")
+        except Exception:
+            return names
+    return {table.name for table in ast.find_all(exp.Table) if is_cohort_handle(table.name)}
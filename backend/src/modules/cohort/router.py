@@ -0,0 +1,28 @@
+from fastapi import APIRouter, Depends, Response
+from sqlalchemy.orm import Session
+
+from src.database import get_db
+from src.modules.cohort import service as cohort_service
+from src.modules.cohort.dto import CohortCreateRequestDto, CohortHandleResponseDto
+
+
+router = APIRouter(prefix="/cohort", tags=["Cohort"])
+
+
+@router.post("/", status_code=201)
+async def create_cohort(
+    cohortCreateRequestDto: CohortCreateRequestDto,
+    db: Session = Depends(get_db)
+) -> CohortHandleResponseDto:
+    return await cohort_service.create(cohortCreateRequestDto, db)
+
+
+@router.get("/{handle}")
+async def get_cohort(handle: str, db: Session = Depends(get_db)) -> CohortHandleResponseDto:
+    return cohort_service.get(handle, db)
+
+
+@router.delete("/{handle}", status_code=204)
+async def delete_cohort(handle: str, db: Session = Depends(get_db)) -> Response:
+    cohort_service.delete(handle, db)
+    return Response(status_code=204)
@@ -0,0 +1,230 @@
+import os
+import threading
+import time
+import traceback
+from typing import Optional
+
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import text
+from sqlglot import exp
+
+from src.config import settings
+from src.modules.cohort.dto import CohortCreateRequestDto, CohortHandleResponseDto
+from src.database import get_db_internal
+from src.modules.cohort.handle import COHORT_SCHEMA, new_handle, is_cohort_handle, referenced_handles
+from src.modules.metrics.service import observe_stage, track_in_flight, STAGE_DB_EXECUTION
+from src.modules.sql_executor.dto import parse_sql
+from src.modules.tracing import service as tracing_service
+from src.modules.scheduler import service as scheduler_service
+from src.modules.scheduler.service import sql_scheduler, SchedulerOverloaded, LANE_INTERACTIVE
+
+TARGET_SCHEMA = "ohdsi_test"
+
+_cleanup_lock = threading.Lock()
+_cleanup_started = False
+
+"""
+    cohort 쿼리 결과의 person_id 를 한 번만 계산해서 COHORT_SCHEMA 의 UNLOGGED 테이블로 저장하고 (person_id PK),
+    테이블 이름을 handle 로 돌려줍니다. 이후 /sql-executor/ 쿼리는 cohort 서브쿼리를 매번 다시 실행하는 대신
+    작은 인덱스 테이블과 join 합니다.
+
+    커넥션 풀의 다른 커넥션에서도 보여야 하므로 세션 전용 TEMP 테이블 대신 UNLOGGED 테이블을 사용하며,
+    (WAL 을 쓰지 않아 생성이 빠르고, DB 가 비정상 종료되면 비워지지만 handle 은 어차피 임시 결과임)
+    만료 시각이 지난 handle 은 쿼리에서 참조할 수 없고 (check_handles), background 스레드가 주기적으로
+    (그리고 새 cohort 를 만들 때) 테이블째 삭제합니다.
+"""
+
+
+async def create(cohortCreateRequestDto: CohortCreateRequestDto, db: Session) -> CohortHandleResponseDto:
+    # 검증은 DTO 에서 끝났으므로 결과 컬럼만 확인
+    try:
+        named_selects = parse_sql(cohortCreateRequestDto.sql).named_selects
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if "person_id" not in named_selects:
+        raise HTTPException(status_code=400, detail="Cohort query must return a person_id column.")
+
+    try:
+        async with sql_scheduler.slot_async(LANE_INTERACTIVE, scheduler_service.get_user_id()):
+            with track_in_flight("cohort"), tracing_service.span("cohort.create"):
+                # CREATE TABLE AS 는 thread 에서 실행해서 event loop 를 막지 않음
+                return await run_in_threadpool(_create, cohortCreateRequestDto, db)
+    except SchedulerOverloaded as e:
+        raise scheduler_service.to_http_exception(e)
+
+
+def get(handle: str, db: Session) -> CohortHandleResponseDto:
+    if not is_cohort_handle(handle):
+        raise HTTPException(status_code=404, detail="Cohort handle not found.")
+
+    row = db.execute(text(
+        f"SELECT handle, row_count, created_at, expires_at FROM {COHORT_SCHEMA}.cohort_handle "
+        "WHERE handle = :handle AND expires_at > now()"
+    ), {"handle": handle}).first()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Cohort handle not found or expired.")
+
+    return CohortHandleResponseDto(**row._mapping)
+
+
+def delete(handle: str, db: Session):
+    if not is_cohort_handle(handle):
+        raise HTTPException(status_code=404, detail="Cohort handle not found.")
+
+    try:
+        deleted = db.execute(
+            text(f"DELETE FROM {COHORT_SCHEMA}.cohort_handle WHERE handle = :handle"), {"handle": handle}
+        ).rowcount
+        db.execute(text(f"DROP TABLE IF EXISTS {COHORT_SCHEMA}.{handle}"))
+        db.commit()
+    except SQLAlchemyError as db_err:
+        db.rollback()
+        print(f"Database Error: {db_err}")
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail="An error occurred while deleting the cohort.")
+
+    if not deleted:
+        raise HTTPException(status_code=404, detail="Cohort handle not found.")
+
+
+def check_handles(db: Session, sql: str, ast: Optional[exp.Expression] = None):
+    """
+    SQL 이 참조하는 cohort handle 이 모두 등록되어 있고 만료되지 않았는지 확인합니다.
+    (만료된 handle 의 테이블은 정리 스레드가 지우기 전까지 남아 있으므로 이름만으로는 허용하지 않음)
+
+    Raises:
+        HTTPException: 없거나 만료된 handle 을 참조한 경우 (400)
+    """
+    handles = referenced_handles(sql, ast)
+    if not handles:
+        return
+
+    available = set(db.execute(text(
+        f"SELECT handle FROM {COHORT_SCHEMA}.cohort_handle WHERE handle = ANY(:handles) AND expires_at > now()"
+    ), {"handles": sorted(handles)}).scalars())
+    unavailable = sorted(handles - available)
+    if unavailable:
+        raise HTTPException(status_code=400, detail=f"Cohort handle not found or expired: {', '.join(unavailable)}")
+
+
+def cleanup_expired():
+    """
+    만료된 cohort handle 과 테이블을 삭제하고 삭제한 handle 목록을 반환합니다.
+    """
+    db = get_db_internal()
+    try:
+        return _cleanup_expired(db)
+    except SQLAlchemyError as db_err:
+        db.rollback()
+        print(f"Cohort cleanup failed: {db_err}")
+        traceback.print_exc()
+        return []
+    finally:
+        db.close()
+
+
+def start_cohort_cleanup():
+    """
+    cleanup_expired 를 바로 한 번 실행하고 이후 settings.cohort_cleanup_interval_minutes 마다
+    다시 실행하는 background 스레드를 시작합니다 (worker 프로세스마다 한 번, 0 이하이면 시작하지 않음).
+    """
+    global _cleanup_started
+    if settings.cohort_cleanup_interval_minutes <= 0:
+        return
+    with _cleanup_lock:
+        if _cleanup_started:
+            return
+        _cleanup_started = True
+
+    def run():
+        while True:
+            cleanup_expired()
+            time.sleep(settings.cohort_cleanup_interval_minutes * 60)
+
+    threading.Thread(target=run, name="cohort-cleanup", daemon=True).start()
+
+
+def _reset_cleanup_after_fork():
+    global _cleanup_started
+    _cleanup_started = False
+
+
+# gunicorn preload 로 fork 된 worker 에서는 스레드를 새로 시작
+os.register_at_fork(after_in_child=_reset_cleanup_after_fork)
+
+
+def _create(cohortCreateRequestDto: CohortCreateRequestDto, db: Session) -> CohortHandleResponseDto:
+    handle = new_handle()
+    table = f"{COHORT_SCHEMA}.{handle}"
+    ttl_minutes = cohortCreateRequestDto.ttl_minutes or settings.cohort_default_ttl_minutes
+    query = cohortCreateRequestDto.sql.strip().rstrip(";")
+
+    try:
+        _cleanup_expired(db)
+        # 다른 cohort handle 을 참조하는 경우 만료되지 않았는지 확인
+        check_handles(db, query)
+
+        with observe_stage(STAGE_DB_EXECUTION):
+            # 다른 cohort handle 을 참조하는 cohort 도 만들 수 있도록 cohort schema 포함
+            db.execute(text(f"SET LOCAL search_path TO {TARGET_SCHEMA}, {COHORT_SCHEMA}, public"))
+            db.execute(text("SELECT set_config('application_name', :name, true)"), {"name": tracing_service.application_name()})
+
+            # 사용자 SQL 의 :name, % 가 bind parameter 로 해석되지 않도록 driver 에 그대로 전달
+            connection = db.connection()
+            row_count = connection.exec_driver_sql(
+                f"CREATE UNLOGGED TABLE {table} AS "
+                # SQL 이 -- 주석으로 끝나도 닫는 괄호가 주석이 되지 않도록 줄을 바꿈
+                f"SELECT DISTINCT cohort_query.person_id FROM (\n{query}\n) AS cohort_query "
+                "WHERE cohort_query.person_id IS NOT NULL",
+                execution_options={"no_parameters": True},
+            ).rowcount
+            db.execute(text(f"ALTER TABLE {table} ADD PRIMARY KEY (person_id)"))
+            # join 할 때 planner 가 cohort 크기를 알도록 통계 수집
+            db.execute(text(f"ANALYZE {table}"))
+
+            row = db.execute(text(
+                f"INSERT INTO {COHORT_SCHEMA}.cohort_handle (handle, sql, row_count, expires_at) "
+                "VALUES (:handle, :sql, :row_count, now() + make_interval(mins => :ttl_minutes)) "
+                "RETURNING handle, row_count, created_at, expires_at"
+            ), {"handle": handle, "sql": cohortCreateRequestDto.sql, "row_count": row_count, "ttl_minutes": ttl_minutes}).first()
+
+        db.commit()
+        return CohortHandleResponseDto(**row._mapping)
+
+    except HTTPException:
+        db.rollback()
+        raise
+
+    except SQLAlchemyError as db_err:
+        db.rollback()
+        print(f"Database Error: {db_err}")
+        traceback.print_exc()
+        raise HTTPException(status_code=400, detail="An error occurred while materializing the cohort query.")
+
+    except Exception as e:
+        db.rollback()
+        print(f"Unexpected Error: {e}")
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail="An unexpected server error occurred.")
+
+
+def _cleanup_expired(db: Session) -> list[str]:
+    # 다른 worker 가 정리 중인 handle 은 건너뜀
+    expired = db.execute(text(
+        f"DELETE FROM {COHORT_SCHEMA}.cohort_handle WHERE handle IN ("
+        f"SELECT handle FROM {COHORT_SCHEMA}.cohort_handle WHERE expires_at <= now() FOR UPDATE SKIP LOCKED"
+        ") RETURNING handle"
+    )).scalars().all()
+
+    for handle in expired:
+        if is_cohort_handle(handle):
+            db.execute(text(f"DROP TABLE IF EXISTS {COHORT_SCHEMA}.{handle}"))
+
+    if expired:
+        db.commit()
+        print(f"Dropped expired cohorts: {' '.join(expired)}")
+
+    return expired
@@ -0,0 +1,12 @@
+from typing import Optional
+from pydantic import BaseModel, Field
+
+
+class ConceptDto(BaseModel):
+    concept_id: int = Field(..., title="Concept ID")
+    concept_name: str = Field(..., title="Concept name")
+    domain_id: str = Field(..., title="Domain ID")
+    vocabulary_id: str = Field(..., title="Vocabulary ID")
+    standard_concept: Optional[str] = Field(None, title="Standard concept", description="S, C or null")
+    matched_name: str = Field(..., title="Matched name", description="The concept name or synonym that matched the query")
+    score: float = Field(..., title="Score", description="Trigram similarity between the query and the matched name")
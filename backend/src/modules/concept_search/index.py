@@ -0,0 +1,378 @@
+import re
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+import numpy as np
+
+_WORD = re.compile(r"\w+")
+# find_mentions 의 기본 포함 비율
+MENTION_MIN_CONTAINMENT = 0.8
+# find_mentions 후보를 만들 때 이름마다 최소 prefix 보다 더 등록하는 trigram 수 (_prefix_bounds 참고)
+_PREFIX_EXTRA = 2
+
+
+@dataclass
+class ConceptMatch:
+    concept_id: int
+    concept_name: str
+    domain_id: str
+    vocabulary_id: str
+    standard_concept: Optional[str]
+    matched_name: str
+    score: float
+
+
+def normalize(text: str) -> list[str]:
+    # 대소문자, 구두점 차이를 무시 (한글 등 유니코드 문자는 그대로 단어로 취급)
+    return _WORD.findall(text.lower())
+
+
+def trigrams(words: list[str], prefix: bool = False) -> set[str]:
+    """
+    pg_trgm 과 같이 단어마다 앞에 공백 두 개, 뒤에 공백 하나를 붙여 만든 trigram 집합을 반환합니다.
+    prefix=True 이면 입력 중인 마지막 단어 뒤에 공백을 붙이지 않아 단어 앞부분만으로도 일치합니다.
+    """
+    grams = set()
+    for i, word in enumerate(words):
+        padded = "  " + word + ("" if prefix and i == len(words) - 1 else " ")
+        grams.update(padded[j:j + 3] for j in range(len(padded) - 2))
+    return grams
+
+
+class ConceptIndex:
+    """
+    ConceptIndex 클래스는 concept 이름과 concept_synonym 이름의 trigram 역색인입니다.
+
+    이름 하나(entry)마다 번호를 매기고, trigram 별 entry 번호 목록(posting)을 하나의 int32 배열에
+    이어 붙여 offset 으로 구분합니다 (CSR). concept 정보도 컬럼별 numpy 배열과 문자열 목록으로 보관하므로
+    DB 의 ILIKE '%...%' 전체 scan 없이 posting 몇 개만 합쳐서 후보를 찾습니다.
+
+    메서드:
+    - build(cls, concepts, synonyms, version): DB 에서 읽은 행으로 색인 생성
+    - search(self, query, limit, domain_id, standard_only): 입력 중인 검색어로 typeahead 검색 (trigram Jaccard 유사도)
+    - find_mentions(self, text, limit, min_containment): 문장 안에 이름이 거의 그대로 들어 있는 concept 찾기
+    - get(self, concept_id): concept_id 로 조회
+    """
+
+    def __init__(
+        self,
+        concept_ids: np.ndarray,
+        concept_names: list[str],
+        domain_codes: np.ndarray,
+        domains: list[str],
+        vocabulary_codes: np.ndarray,
+        vocabularies: list[str],
+        standard: np.ndarray,
+        entry_concepts: np.ndarray,
+        entry_names: list[str],
+        entry_gram_counts: np.ndarray,
+        gram_ids: dict[str, int],
+        offsets: np.ndarray,
+        postings: np.ndarray,
+        version: Optional[str] = None,
+    ):
+        self.concept_ids = concept_ids
+        self.concept_names = concept_names
+        self.domain_codes = domain_codes
+        self.domains = domains
+        self.vocabulary_codes = vocabulary_codes
+        self.vocabularies = vocabularies
+        self.standard = standard
+        self.entry_concepts = entry_concepts
+        self.entry_names = entry_names
+        self.entry_gram_counts = entry_gram_counts
+        self.gram_ids = gram_ids
+        self.offsets = offsets
+        self.postings = postings
+        self.version = version
+        # entry 별 trigram 목록과 min_containment 별 prefix 색인 (find_mentions 에서 처음 사용할 때 만듦)
+        self._entry_grams: Optional[tuple[np.ndarray, np.ndarray]] = None
+        self._prefix_indexes: dict[float, tuple[np.ndarray, np.ndarray]] = {}
+
+    def __len__(self) -> int:
+        return len(self.concept_ids)
+
+    @classmethod
+    def build(
+        cls,
+        concepts: Iterable[tuple[int, str, str, str, Optional[str]]],
+        synonyms: Iterable[tuple[int, str]],
+        version: Optional[str] = None,
+    ) -> "ConceptIndex":
+        """
+        concepts: (concept_id, concept_name, domain_id, vocabulary_id, standard_concept)
+        synonyms: (concept_id, concept_synonym_name), concepts 에 없는 concept_id 는 무시
+        """
+        rows = sorted(concepts, key=lambda row: row[0])
+        concept_ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+        concept_names = [row[1] for row in rows]
+
+        domains, domain_codes = _encode_categories(row[2] for row in rows)
+        vocabularies, vocabulary_codes = _encode_categories(row[3] for row in rows)
+        standard = np.array([row[4] or "" for row in rows], dtype="U1")
+
+        entry_concepts: list[int] = []
+        entry_names: list[str] = []
+        seen_names: set[tuple[int, str]] = set()
+
+        def add_entry(position: int, name: str):
+            key = (position, name.lower())
+            if key in seen_names:
+                return
+            seen_names.add(key)
+            entry_concepts.append(position)
+            entry_names.append(name)
+
+        for position, name in enumerate(concept_names):
+            add_entry(position, name)
+        for concept_id, name in synonyms:
+            position = int(np.searchsorted(concept_ids, concept_id))
+            if position < len(concept_ids) and concept_ids[position] == concept_id:
+                add_entry(position, name)
+
+        gram_ids: dict[str, int] = {}
+        gram_column: list[int] = []
+        entry_column: list[int] = []
+        entry_gram_counts = np.zeros(len(entry_names), dtype=np.int32)
+        for entry, name in enumerate(entry_names):
+            grams = trigrams(normalize(name))
+            entry_gram_counts[entry] = len(grams)
+            for gram in grams:
+                gram_column.append(gram_ids.setdefault(gram, len(gram_ids)))
+                entry_column.append(entry)
+
+        # trigram 번호 순으로 정렬해서 posting 을 이어 붙임 (같은 trigram 안에서는 entry 번호 순)
+        grams_array = np.asarray(gram_column, dtype=np.int32)
+        entries_array = np.asarray(entry_column, dtype=np.int32)
+        order = np.argsort(grams_array, kind="stable")
+        postings = entries_array[order]
+        offsets = np.zeros(len(gram_ids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(grams_array, minlength=len(gram_ids)), out=offsets[1:])
+
+        index = cls(
+            concept_ids, concept_names, domain_codes, domains, vocabulary_codes, vocabularies, standard,
+            np.asarray(entry_concepts, dtype=np.int32), entry_names, entry_gram_counts,
+            gram_ids, offsets, postings, version,
+        )
+        # 첫 prompt 요청이 기다리지 않도록 기본 포함 비율의 prefix 색인도 함께 만듦
+        index._prefix_index(MENTION_MIN_CONTAINMENT)
+        return index
+
+    def get(self, concept_id: int) -> Optional[ConceptMatch]:
+        position = int(np.searchsorted(self.concept_ids, concept_id))
+        if position >= len(self.concept_ids) or self.concept_ids[position] != concept_id:
+            return None
+        return self._to_match(position, self.concept_names[position], 1.0)
+
+    def search(
+        self,
+        query: str,
+        limit: int = 10,
+        domain_id: Optional[str] = None,
+        standard_only: bool = False,
+    ) -> list[ConceptMatch]:
+        words = normalize(query)
+        if not words or limit <= 0:
+            return []
+
+        grams = trigrams(words, prefix=True)
+        candidates, counts = self._count_matches(grams)
+        if len(candidates) == 0:
+            return []
+
+        entry_counts = self.entry_gram_counts[candidates]
+        scores = counts / (len(grams) + entry_counts - counts)
+
+        keep = self._filter_mask(candidates, domain_id, standard_only)
+        candidates, scores = candidates[keep], scores[keep]
+
+        # 점수 상위 후보만 정렬한 뒤, 검색어로 시작하는 이름을 앞으로 (typeahead)
+        top = _top_k(scores, limit * 4)
+        prefix = " ".join(words)
+        ranked = sorted(
+            top,
+            key=lambda i: (not " ".join(normalize(self.entry_names[candidates[i]])).startswith(prefix), -scores[i]),
+        )
+        return self._collect(candidates, scores, ranked, limit)
+
+    def find_mentions(
+        self,
+        text: str,
+        limit: int = 5,
+        min_containment: float = MENTION_MIN_CONTAINMENT,
+        min_grams: int = 5,
+    ) -> list[ConceptMatch]:
+        """
+        concept 이름의 trigram 중 min_containment 이상이 text 에 들어 있는 concept 을 긴 이름 순으로 반환합니다.
+        (질문 문장 전체로 검색할 때 짧고 흔한 이름이 잡히지 않도록 min_grams 미만인 이름은 제외)
+        """
+        words = normalize(text)
+        if not words or limit <= 0:
+            return []
+
+        # 이름마다 드문 trigram 몇 개(prefix)에만 등록한 색인으로 후보를 만듦 (_build_prefix_index 참고)
+        gram_ids = self._gram_ids(trigrams(words))
+        prefix_offsets, prefix_postings = self._prefix_index(min_containment)
+        seeds = [prefix_postings[prefix_offsets[gram_id]:prefix_offsets[gram_id + 1]] for gram_id in gram_ids]
+        if not seeds:
+            return []
+        candidates, prefix_hits = np.unique(np.concatenate(seeds), return_counts=True)
+        _, min_hits = _prefix_bounds(self.entry_gram_counts[candidates], min_containment)
+        candidates = candidates[(prefix_hits >= min_hits) & (self.entry_gram_counts[candidates] >= min_grams)]
+        if len(candidates) == 0:
+            return []
+
+        # 후보 이름의 trigram 중 문장에 있는 trigram 수 (흔한 trigram 의 긴 posting 은 보지 않음)
+        entry_starts, entry_grams = self._entry_gram_index()
+        in_text = np.zeros(len(self.gram_ids), dtype=bool)
+        in_text[gram_ids] = True
+        entry_counts = self.entry_gram_counts[candidates].astype(np.int64)
+        owners = np.repeat(np.arange(len(candidates)), entry_counts)
+        positions = np.arange(len(owners)) - np.repeat(np.cumsum(entry_counts) - entry_counts, entry_counts)
+        hits = in_text[entry_grams[entry_starts[candidates][owners] + positions]]
+        counts = np.bincount(owners, weights=hits, minlength=len(candidates))
+
+        entry_counts = self.entry_gram_counts[candidates]
+        containment = counts / entry_counts
+        keep = containment >= min_containment
+        candidates, containment, entry_counts = candidates[keep], containment[keep], entry_counts[keep]
+
+        # 포함 비율이 같으면 더 긴(구체적인) 이름 우선, 그다음 standard concept 우선
+        is_standard = self.standard[self.entry_concepts[candidates]] == "S"
+        ranked = np.lexsort((~is_standard, -entry_counts, -containment))
+        return self._collect(candidates, containment, ranked, limit)
+
+    def _count_matches(self, grams: set[str]) -> tuple[np.ndarray, np.ndarray]:
+        """
+        query trigram 과 겹치는 entry 번호와 겹치는 trigram 수를 반환합니다.
+
+        posting 이 짧은(드문) trigram 절반으로 후보를 만들고, 나머지 trigram 은 후보가 posting 에
+        있는지만 이진 탐색으로 셉니다. 흔한 trigram 의 긴 posting 을 합쳐서 정렬하지 않으므로 빠르고,
+        query trigram 을 절반도 포함하지 않는 entry 는 어차피 Jaccard 유사도가 낮아 후보에서 빠져도 됩니다.
+        """
+        lists = sorted((self._postings(gram_id) for gram_id in self._gram_ids(grams)), key=len)
+        if not lists:
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.int64)
+
+        seed_count = (len(lists) + 1) // 2
+        candidates, counts = np.unique(np.concatenate(lists[:seed_count]), return_counts=True)
+        for postings in lists[seed_count:]:
+            # posting 은 entry 번호 순으로 정렬되어 있음
+            positions = np.minimum(np.searchsorted(postings, candidates), len(postings) - 1)
+            counts += postings[positions] == candidates
+        return candidates, counts
+
+    def _gram_ids(self, grams: set[str]) -> list[int]:
+        return [gram_id for gram_id in (self.gram_ids.get(gram) for gram in grams) if gram_id is not None]
+
+    def _postings(self, gram_id: int) -> np.ndarray:
+        return self.postings[self.offsets[gram_id]:self.offsets[gram_id + 1]]
+
+    def _entry_gram_index(self) -> tuple[np.ndarray, np.ndarray]:
+        """
+        entry 별 trigram 번호를 전체에서 드문 순서로 정렬해 이어 붙인 (starts, grams) CSR 을 반환합니다.
+        (posting 길이가 같으면 trigram 번호 순)
+        """
+        if self._entry_grams is None:
+            gram_sizes = np.diff(self.offsets)
+            posting_grams = np.repeat(np.arange(len(gram_sizes), dtype=np.int32), gram_sizes)
+            order = np.lexsort((posting_grams, gram_sizes[posting_grams], self.postings))
+
+            entry_starts = np.zeros(len(self.entry_gram_counts) + 1, dtype=np.int64)
+            np.cumsum(self.entry_gram_counts, out=entry_starts[1:])
+            self._entry_grams = entry_starts, posting_grams[order]
+        return self._entry_grams
+
+    def _prefix_index(self, min_containment: float) -> tuple[np.ndarray, np.ndarray]:
+        index = self._prefix_indexes.get(min_containment)
+        if index is None:
+            index = self._prefix_indexes[min_containment] = self._build_prefix_index(min_containment)
+        return index
+
+    def _build_prefix_index(self, min_containment: float) -> tuple[np.ndarray, np.ndarray]:
+        """
+        이름마다 드문 순서로 정렬한 trigram 중 앞부분(prefix, _prefix_bounds)에만 등록한 (offsets, postings) CSR 을 반환합니다.
+
+        흔한 trigram 은 대부분의 이름에서 prefix 밖이므로 posting 이 짧고, 흔한 trigram 으로만 이루어진
+        짧은 이름도 자기 prefix 에는 등록되므로 빠지지 않습니다.
+        """
+        entry_starts, entry_grams = self._entry_gram_index()
+        entry_counts = self.entry_gram_counts.astype(np.int64)
+        entries = np.repeat(np.arange(len(entry_counts), dtype=np.int32), entry_counts)
+        ranks = np.arange(len(entries)) - entry_starts[entries]
+
+        prefix_sizes, _ = _prefix_bounds(entry_counts, min_containment)
+        keep = ranks < prefix_sizes[entries]
+        entries, grams = entries[keep], entry_grams[keep]
+
+        # trigram 번호 순으로 정렬 (같은 trigram 안에서는 entry 번호 순)
+        order = np.argsort(grams, kind="stable")
+        offsets = np.zeros(len(self.gram_ids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(grams, minlength=len(self.gram_ids)), out=offsets[1:])
+        return offsets, entries[order]
+
+    def _filter_mask(self, candidates: np.ndarray, domain_id: Optional[str], standard_only: bool) -> np.ndarray:
+        positions = self.entry_concepts[candidates]
+        mask = np.ones(len(candidates), dtype=bool)
+        if domain_id is not None:
+            if domain_id not in self.domains:
+                return np.zeros(len(candidates), dtype=bool)
+            mask &= self.domain_codes[positions] == self.domains.index(domain_id)
+        if standard_only:
+            mask &= self.standard[positions] == "S"
+        return mask
+
+    def _collect(self, candidates: np.ndarray, scores: np.ndarray, ranked: Iterable[int], limit: int) -> list[ConceptMatch]:
+        # 같은 concept 의 이름과 synonym 이 함께 잡히면 순위가 높은 하나만 사용
+        matches = []
+        seen = set()
+        for i in ranked:
+            entry = candidates[i]
+            position = int(self.entry_concepts[entry])
+            if position in seen:
+                continue
+            seen.add(position)
+            matches.append(self._to_match(position, self.entry_names[entry], float(scores[i])))
+            if len(matches) >= limit:
+                break
+        return matches
+
+    def _to_match(self, position: int, matched_name: str, score: float) -> ConceptMatch:
+        return ConceptMatch(
+            concept_id=int(self.concept_ids[position]),
+            concept_name=self.concept_names[position],
+            domain_id=self.domains[self.domain_codes[position]],
+            vocabulary_id=self.vocabularies[self.vocabulary_codes[position]],
+            standard_concept=str(self.standard[position]) or None,
+            matched_name=matched_name,
+            score=score,
+        )
+
+
+def _encode_categories(values: Iterable[str]) -> tuple[list[str], np.ndarray]:
+    # domain_id, vocabulary_id 처럼 종류가 적은 문자열은 번호로 저장
+    categories: dict[str, int] = {}
+    codes = [categories.setdefault(value, len(categories)) for value in values]
+    return list(categories), np.asarray(codes, dtype=np.int16)
+
+
+def _prefix_bounds(entry_counts: np.ndarray, min_containment: float) -> tuple[np.ndarray, np.ndarray]:
+    """
+    trigram 이 n 개인 이름은 required = ceil(min_containment * n) 개 이상이 문장에 있어야 하므로,
+    드문 순서로 정렬한 trigram 중 앞의 prefix = n - required + 1 + _PREFIX_EXTRA 개 안에서
+    min_hits = required - (n - prefix) 개 이상이 문장에 있습니다. 이 두 값을 entry 별로 반환합니다.
+    (_PREFIX_EXTRA 만큼 더 등록하면 드문 trigram 하나만 겹치는 후보를 전체 확인 전에 거를 수 있음)
+    """
+    entry_counts = entry_counts.astype(np.int64)
+    # 부동소수점 오차로 required 가 커지면 prefix 가 짧아져 후보가 빠질 수 있으므로 작은 쪽으로 보정
+    required = np.maximum(np.ceil(entry_counts * min_containment - 1e-9).astype(np.int64), 1)
+    prefix_sizes = np.minimum(entry_counts - required + 1 + _PREFIX_EXTRA, entry_counts)
+    return prefix_sizes, required - (entry_counts - prefix_sizes)
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    if len(scores) > k:
+        top = np.argpartition(-scores, k)[:k]
+    else:
+        top = np.arange(len(scores))
+    return top[np.argsort(-scores[top], kind="stable")]
@@ -0,0 +1,26 @@
+from dataclasses import asdict
+from typing import Optional
+from fastapi import APIRouter, Query
+
+from src.modules.concept_search import service as concept_search_service
+from src.modules.concept_search.dto import ConceptDto
+
+
+router = APIRouter(prefix="/concepts", tags=["Concept Search"])
+
+
+# 색인 검색은 메모리에서 끝나므로 threadpool 없이 바로 실행
+@router.get("/search")
+async def search_concepts(
+    q: str = Query(..., min_length=1, max_length=200, description="Search text (typeahead)"),
+    limit: int = Query(10, ge=1, le=100),
+    domain_id: Optional[str] = Query(None, description="e.g. Condition, Drug, Measurement"),
+    standard_only: bool = Query(False),
+) -> list[ConceptDto]:
+    matches = concept_search_service.search(q, limit, domain_id, standard_only)
+    return [ConceptDto(**asdict(match)) for match in matches]
+
+
+@router.get("/{concept_id}")
+async def get_concept(concept_id: int) -> ConceptDto:
+    return ConceptDto(**asdict(concept_search_service.get_concept(concept_id)))
@@ -0,0 +1,156 @@
+import os
+import threading
+import time
+import traceback
+from functools import lru_cache
+from typing import Optional
+
+from fastapi import HTTPException
+from sqlalchemy.sql import text
+
+from src.config import settings
+from src.database import get_db_internal
+from src.modules.concept_search.index import ConceptIndex, ConceptMatch
+from src.modules.metrics import service as metrics_service
+
+TARGET_SCHEMA = "ohdsi_test"
+_FETCH_SIZE = 50_000
+
+
+class ConceptIndexLoader:
+    """
+    ConceptIndexLoader 클래스는 OMOP concept / concept_synonym 을 메모리 색인(ConceptIndex)으로 읽고,
+    vocabulary 가 다시 적재되면 background 스레드에서 새 색인을 만들어 교체합니다.
+
+    vocabulary 버전은 data_version 테이블의 version (scripts/load_omop.py 가 적재 후 올림) 과
+    concept, concept_synonym 의 pg_stat_user_tables 변경 건수로 만들며, check_interval 마다 확인합니다.
+    새 색인을 만드는 동안에는 이전 색인으로 계속 응답합니다.
+
+    메서드:
+    - get(self): 현재 색인, 처음 만드는 중이면 None
+    - refresh(self): vocabulary 버전이 바뀌었으면 색인을 다시 만듦
+    """
+
+    def __init__(self, schema: str, check_interval: float):
+        self.schema = schema
+        self.check_interval = check_interval
+        self._index: Optional[ConceptIndex] = None
+        self._started = False
+        self._lock = threading.Lock()
+
+    def get(self) -> Optional[ConceptIndex]:
+        if not self._started:
+            with self._lock:
+                if not self._started:
+                    # 첫 색인은 요청을 막지 않도록 background 에서 만듦
+                    threading.Thread(target=self._run, name="concept-index", daemon=True).start()
+                    self._started = True
+        return self._index
+
+    def refresh(self):
+        db = get_db_internal()
+        try:
+            version = self._version(db)
+            if self._index is not None and self._index.version == version:
+                return
+
+            start = time.perf_counter()
+            concepts = db.execute(text(
+                f"SELECT concept_id, concept_name, domain_id, vocabulary_id, standard_concept "
+                f"FROM {self.schema}.concept WHERE invalid_reason IS NULL"
+            ).execution_options(yield_per=_FETCH_SIZE))
+            concept_rows = [tuple(row) for row in concepts]
+
+            synonyms = db.execute(text(
+                f"SELECT concept_id, concept_synonym_name FROM {self.schema}.concept_synonym"
+            ).execution_options(yield_per=_FETCH_SIZE))
+            synonym_rows = [tuple(row) for row in synonyms]
+
+            self._index = ConceptIndex.build(concept_rows, synonym_rows, version)
+            print(
+                f"Concept index built: {len(concept_rows)} concepts, {len(synonym_rows)} synonyms "
+                f"in {time.perf_counter() - start:.1f}s"
+            )
+        except Exception as e:
+            # 색인을 만들지 못하면 이전 색인을 그대로 사용
+            print(f"Concept index refresh failed: {e}")
+            traceback.print_exc()
+        finally:
+            db.close()
+
+    def _version(self, db) -> str:
+        fingerprint = db.execute(text(
+            "SELECT md5(coalesce(string_agg("
+            "relname || ':' || n_tup_ins || ':' || n_tup_upd || ':' || n_tup_del, ',' ORDER BY relname), '')) "
+            "FROM pg_stat_user_tables WHERE schemaname = :schema AND relname IN ('concept', 'concept_synonym')"
+        ), {"schema": self.schema}).scalar()
+
+        loaded_version = None
+        if db.execute(text("SELECT to_regclass('public.data_version')")).scalar() is not None:
+            loaded_version = db.execute(
+                text("SELECT version FROM public.data_version WHERE schema_name = :schema"), {"schema": self.schema}
+            ).scalar()
+
+        return f"{loaded_version or 0}-{fingerprint}"
+
+    def _run(self):
+        while True:
+            self.refresh()
+            time.sleep(self.check_interval)
+
+
+@lru_cache(maxsize=1)
+def get_concept_index_loader() -> ConceptIndexLoader:
+    return ConceptIndexLoader(TARGET_SCHEMA, settings.concept_index_check_interval_sec)
+
+
+# gunicorn preload 로 fork 된 worker 에서는 색인 스레드를 새로 시작
+os.register_at_fork(after_in_child=get_concept_index_loader.cache_clear)
+
+metrics_service.register_gauge_callback(
+    "concept_index_size",
+    "Number of concepts in the in-memory concept search index",
+    lambda: len(get_concept_index_loader()._index or ()),
+)
+
+
+def _get_index() -> ConceptIndex:
+    index = get_concept_index_loader().get()
+    if index is None:
+        raise HTTPException(status_code=503, detail="Concept index is loading. Please retry later.")
+    return index
+
+
+def search(query: str, limit: int, domain_id: Optional[str] = None, standard_only: bool = False) -> list[ConceptMatch]:
+    return _get_index().search(query, limit, domain_id, standard_only)
+
+
+def get_concept(concept_id: int) -> ConceptMatch:
+    match = _get_index().get(concept_id)
+    if match is None:
+        raise HTTPException(status_code=404, detail="Concept not found.")
+    return match
+
+
+def get_prompt_hint(question: str) -> str:
+    """
+    질문에 이름이 들어 있는 concept 의 concept_id 목록을 prompt 에 넣을 문자열로 반환합니다.
+    색인이 아직 없거나 찾은 concept 이 없으면 빈 문자열을 반환합니다.
+    """
+    if settings.concept_prompt_max_candidates <= 0:
+        return ""
+
+    index = get_concept_index_loader().get()
+    if index is None:
+        return ""
+
+    matches = index.find_mentions(question, settings.concept_prompt_max_candidates)
+    if not matches:
+        return ""
+
+    lines = [
+        f"- concept_id {match.concept_id}: {match.concept_name} ({match.domain_id}, {match.vocabulary_id})"
+        for match in matches
+    ]
+    # PromptTemplate 변수로 해석되지 않도록 중괄호 escape
+    return "\n".join(lines).replace("{", "{{").replace("}", "}}")
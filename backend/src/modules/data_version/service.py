@@ -0,0 +1,141 @@
+import hashlib
+import os
+import threading
+import time
+import traceback
+from functools import lru_cache
+from typing import Optional
+
+from sqlalchemy.sql import text
+from sqlglot import exp, parse_one
+
+from src.config import settings
+from src.database import get_db_internal
+from src.modules.cohort.handle import referenced_handles
+
+TARGET_SCHEMA = "ohdsi_test"
+
+# 실행할 때마다 결과가 달라질 수 있는 함수가 있으면 ETag 를 만들지 않음
+_NON_DETERMINISTIC = (exp.Rand, exp.CurrentDate, exp.CurrentTime, exp.CurrentTimestamp)
+
+
+class DataVersionTracker:
+    """
+    DataVersionTracker 클래스는 OMOP 스키마의 데이터 버전을 background 스레드에서 주기적으로 확인합니다.
+
+    데이터 버전은 두 값을 합쳐서 만듭니다.
+    - data_version 테이블의 version: scripts/load_omop.py 가 적재를 마칠 때마다 1 씩 올림
+    - 스키마 테이블들의 pg_stat_user_tables 변경 건수 (n_tup_ins / upd / del) 지문:
+      loader 를 거치지 않고 psql 등으로 데이터를 바꾼 경우도 감지
+
+    요청 처리 중에는 메모리에 있는 값만 읽으므로 DB 에 접근하지 않습니다.
+    (변경 후 최대 check_interval 동안은 이전 버전이 보일 수 있음)
+
+    메서드:
+    - get(self): 현재 데이터 버전 문자열, 아직 확인하지 못했으면 None
+    - refresh(self): DB 에서 데이터 버전을 다시 읽음
+    """
+
+    def __init__(self, schema: str, check_interval: float):
+        self.schema = schema
+        self.check_interval = check_interval
+        self._version: Optional[str] = None
+        self._started = False
+        self._lock = threading.Lock()
+
+    def get(self) -> Optional[str]:
+        if not self._started:
+            with self._lock:
+                if not self._started:
+                    self.refresh()
+                    threading.Thread(target=self._run, name="data-version", daemon=True).start()
+                    self._started = True
+        return self._version
+
+    def refresh(self):
+        db = get_db_internal()
+        try:
+            fingerprint = db.execute(text(
+                "SELECT md5(coalesce(string_agg("
+                "relname || ':' || n_tup_ins || ':' || n_tup_upd || ':' || n_tup_del, ',' ORDER BY relname), '')) "
+                "FROM pg_stat_user_tables WHERE schemaname = :schema"
+            ), {"schema": self.schema}).scalar()
+
+            loaded_version = None
+            if db.execute(text("SELECT to_regclass('public.data_version')")).scalar() is not None:
+                loaded_version = db.execute(
+                    text("SELECT version FROM public.data_version WHERE schema_name = :schema"), {"schema": self.schema}
+                ).scalar()
+
+            self._version = f"{loaded_version or 0}-{fingerprint}"
+        except Exception as e:
+            # 버전을 알 수 없으면 ETag 를 쓰지 않고 항상 쿼리를 실행
+            print(f"Data version check failed: {e}")
+            traceback.print_exc()
+            self._version = None
+        finally:
+            db.close()
+
+    def _run(self):
+        while True:
+            time.sleep(self.check_interval)
+            self.refresh()
+
+
+@lru_cache(maxsize=1)
+def get_data_version_tracker() -> DataVersionTracker:
+    return DataVersionTracker(TARGET_SCHEMA, settings.data_version_check_interval_sec)
+
+
+# gunicorn preload 로 fork 된 worker 에서는 확인 스레드를 새로 시작
+os.register_at_fork(after_in_child=get_data_version_tracker.cache_clear)
+
+
+@lru_cache(maxsize=1024)
+def normalize_sql(sql: str) -> Optional[str]:
+    """
+    공백, 대소문자 등 표기만 다른 SQL 이 같은 값이 되도록 정규화합니다.
+    SELECT 문이 아니거나 결과가 매번 달라질 수 있는 SQL (cohort handle 참조 포함) 이면 None 을 반환합니다.
+    """
+    try:
+        ast = parse_one(sql, read="postgres")
+    except Exception:
+        return None
+
+    if not isinstance(ast, exp.Query) or ast.find(*_NON_DETERMINISTIC):
+        return None
+    # cohort handle 은 데이터 버전에 포함되지 않고 만료되거나 다시 만들어질 수 있으므로
+    # ETag 로 304 응답하지 않고 항상 실행 (만료된 handle 은 실행 시 check_handles 가 400 응답)
+    if referenced_handles(sql, ast):
+        return None
+    return ast.sql(dialect="postgres")
+
+
+def query_etag(sql: str) -> Optional[str]:
+    """
+    정규화된 SQL 과 데이터 버전으로 만든 ETag 를 반환합니다. 만들 수 없으면 None 을 반환합니다.
+    """
+    if settings.data_version_check_interval_sec <= 0:
+        return None
+
+    normalized = normalize_sql(sql)
+    if normalized is None:
+        return None
+
+    version = get_data_version_tracker().get()
+    if version is None:
+        return None
+
+    digest = hashlib.sha1(f"{version}\n{normalized}".encode("utf-8")).hexdigest()
+    # 행 순서가 보장되지 않는 쿼리도 있으므로 weak ETag 사용
+    return f'W/"{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # weak 비교: W/ 접두사는 무시
+    candidates = {candidate.strip().removeprefix("W/") for candidate in if_none_match.split(",")}
+    return etag.removeprefix("W/") in candidates
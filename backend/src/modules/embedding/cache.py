@@ -0,0 +1,210 @@
+import fcntl
+import hashlib
+import os
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+
+import numpy as np
+
+KEY_FILE = "keys.txt"
+VECTOR_FILE = "vectors.f32"
+LOCK_FILE = "lock"
+
+
+def normalize_text(text: str) -> str:
+    """
+    캐시 key 로 사용할 정규화된 문장을 반환합니다.
+    유니코드 정규화(NFKC), 대소문자 통일, 연속 공백 제거를 적용합니다.
+    """
+    return " ".join(unicodedata.normalize("NFKC", text).casefold().split())
+
+
+class _DiskTier:
+    """
+    np.memmap 벡터 파일과 key 목록 파일로 이루어진 append-only 디스크 캐시입니다.
+
+    - keys.txt: 한 줄에 key 하나, i 번째 줄은 vectors.f32 의 i 번째 행
+    - vectors.f32: float32 벡터를 행 단위로 이어 붙인 파일
+    여러 프로세스가 같은 디렉토리를 써도 되도록 추가는 flock 을 잡고 수행합니다.
+    keys.txt 는 마지막으로 읽은 위치 이후에 추가된 줄만 읽어 key -> 행 번호 map 에 더합니다.
+    """
+
+    def __init__(self, cache_dir: str, dimension: int):
+        self.cache_dir = cache_dir
+        self.dimension = dimension
+        os.makedirs(cache_dir, exist_ok=True)
+
+        self._rows: dict[str, int] = {}
+        # keys.txt 에서 읽은 byte 수와 줄 수
+        self._keys_size = 0
+        self._key_count = 0
+        self._vectors: np.ndarray | None = None
+        self._lock = threading.Lock()
+
+        with self._file_lock(fcntl.LOCK_SH):
+            self._reload()
+
+    def get_many(self, keys: list[str]) -> list[np.ndarray | None]:
+        with self._lock:
+            if any(key not in self._rows for key in keys) and self._changed_on_disk():
+                # 다른 worker 가 추가한 key 가 있을 수 있으므로 다시 읽음
+                with self._file_lock(fcntl.LOCK_SH):
+                    self._reload()
+
+            rows, vectors = self._rows, self._vectors
+
+        # rows 는 다른 스레드의 reload 로 늘어날 수 있으므로 가져온 vectors 범위 안의 행만 사용
+        return [
+            np.array(vectors[rows[key]]) if rows.get(key, len(vectors)) < len(vectors) else None
+            for key in keys
+        ]
+
+    def put_many(self, keys: list[str], vectors: np.ndarray):
+        with self._lock, self._file_lock(fcntl.LOCK_EX):
+            self._reload()
+
+            new = [(key, vector) for key, vector in zip(keys, vectors) if key not in self._rows]
+            new = list(dict(new).items())
+            if not new:
+                return
+
+            # 이전 쓰기가 벡터만 쓰고 (또는 key 줄을 쓰다가) 중단된 경우 남은 부분을 잘라냄
+            # (남겨 두면 이후 추가하는 key 가 다른 문장의 벡터 행을 가리키게 됨)
+            self._truncate(KEY_FILE, self._keys_size)
+            self._truncate(VECTOR_FILE, self._key_count * self.dimension * 4)
+
+            # 벡터를 먼저 쓰고 key 를 쓰므로 key 가 있으면 벡터도 항상 존재함
+            with open(self._path(VECTOR_FILE), "ab") as f:
+                f.write(np.ascontiguousarray([vector for _, vector in new], dtype=np.float32).tobytes())
+            with open(self._path(KEY_FILE), "a", encoding="utf-8") as f:
+                f.write("".join(f"{key}\n" for key, _ in new))
+
+            self._reload()
+
+    def _reload(self):
+        key_path = self._path(KEY_FILE)
+        keys_size = os.path.getsize(key_path) if os.path.exists(key_path) else 0
+        if keys_size < self._keys_size:
+            # 파일이 지워지거나 새로 만들어진 경우 처음부터 다시 읽음
+            self._rows, self._keys_size, self._key_count = {}, 0, 0
+
+        if keys_size > self._keys_size:
+            with open(key_path, "rb") as f:
+                f.seek(self._keys_size)
+                data = f.read(keys_size - self._keys_size)
+            # 아직 다 쓰이지 않은 마지막 줄은 다음에 읽음
+            end = data.rfind(b"\n") + 1
+            for key in data[:end].decode("utf-8").splitlines():
+                self._rows.setdefault(key, self._key_count)
+                self._key_count += 1
+            self._keys_size += end
+
+        vector_size = os.path.getsize(self._path(VECTOR_FILE)) if os.path.exists(self._path(VECTOR_FILE)) else 0
+        count = min(self._key_count, vector_size // (4 * self.dimension))
+        if self._vectors is not None and len(self._vectors) == count:
+            return
+        self._vectors = (
+            np.memmap(self._path(VECTOR_FILE), dtype=np.float32, mode="r", shape=(count, self.dimension))
+            if count else np.empty((0, self.dimension), dtype=np.float32)
+        )
+
+    def _truncate(self, file_name: str, size: int):
+        path = self._path(file_name)
+        if os.path.exists(path) and os.path.getsize(path) > size:
+            print(f"Embedding cache: truncating incomplete write in {path}")
+            os.truncate(path, size)
+
+    def _changed_on_disk(self) -> bool:
+        try:
+            return os.path.getsize(self._path(KEY_FILE)) != self._keys_size
+        except OSError:
+            return False
+
+    def _path(self, file_name: str) -> str:
+        return os.path.join(self.cache_dir, file_name)
+
+    def _file_lock(self, operation: int):
+        return _FileLock(self._path(LOCK_FILE), operation)
+
+
+class _FileLock:
+    def __init__(self, path: str, operation: int):
+        self.path = path
+        self.operation = operation
+
+    def __enter__(self):
+        self.file = open(self.path, "a")
+        fcntl.flock(self.file, self.operation)
+
+    def __exit__(self, *exc):
+        fcntl.flock(self.file, fcntl.LOCK_UN)
+        self.file.close()
+
+
+class EmbeddingCache:
+    """
+    EmbeddingCache 클래스는 정규화된 문장과 모델 id 를 key 로 임베딩 결과를 캐시합니다.
+
+    - 메모리 tier: 최근 사용한 memory_size 개를 보관하는 LRU
+    - 디스크 tier: cache_dir 가 주어지면 np.memmap 기반 append-only 파일에 영구 저장
+      (서버 재시작이나 RAG index 재생성 시에도 다시 encode 하지 않음)
+
+    메서드:
+    - get_many(self, texts): 정규화된 문장 목록에 대한 벡터 목록 반환 (없으면 None)
+    - put_many(self, texts, vectors): 정규화된 문장과 벡터를 저장
+    """
+
+    def __init__(self, model_id: str, dimension: int, memory_size: int = 10000, cache_dir: str = ""):
+        self.model_id = model_id
+        self.dimension = dimension
+        self.memory_size = memory_size
+
+        self._memory: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk = (
+            _DiskTier(os.path.join(cache_dir, re.sub(r"[^A-Za-z0-9_.-]", "_", model_id)), dimension)
+            if cache_dir else None
+        )
+
+    def get_many(self, texts: list[str]) -> list[np.ndarray | None]:
+        keys = [self._key(text) for text in texts]
+        results: list[np.ndarray | None] = [None] * len(keys)
+
+        with self._lock:
+            for i, key in enumerate(keys):
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    results[i] = vector
+
+        misses = [i for i, vector in enumerate(results) if vector is None]
+        if misses and self._disk is not None:
+            disk_results = self._disk.get_many([keys[i] for i in misses])
+            found = [(i, vector) for i, vector in zip(misses, disk_results) if vector is not None]
+            for i, vector in found:
+                results[i] = vector
+            self._put_memory([keys[i] for i, _ in found], [vector for _, vector in found])
+
+        return results
+
+    def put_many(self, texts: list[str], vectors: np.ndarray):
+        if not texts:
+            return
+
+        keys = [self._key(text) for text in texts]
+        self._put_memory(keys, list(vectors))
+        if self._disk is not None:
+            self._disk.put_many(keys, vectors)
+
+    def _put_memory(self, keys: list[str], vectors: list[np.ndarray]):
+        with self._lock:
+            for key, vector in zip(keys, vectors):
+                self._memory[key] = vector
+                self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_size:
+                self._memory.popitem(last=False)
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha1(f"{self.model_id}\n{text}".encode("utf-8")).hexdigest()
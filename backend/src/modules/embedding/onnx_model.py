@@ -0,0 +1,80 @@
+import os
+
+import numpy as np
+
+MODEL_FILE = "model_qint8.onnx"
+TOKENIZER_FILE = "tokenizer.json"
+CONFIG_FILE = "embedding_config.json"
+
+
+class OnnxEmbeddingModel:
+    """
+    OnnxEmbeddingModel 클래스는 int8 동적 양자화된 ONNX 모델로 문장 임베딩을 계산합니다.
+
+    SentenceTransformer 와 같은 encode / get_sentence_embedding_dimension 인터페이스를 제공하며
+    PyTorch 없이 onnxruntime 과 tokenizers 만 사용합니다.
+    모델 디렉토리는 scripts/export_onnx_embedding.py 로 생성합니다.
+
+    메서드:
+    - encode(self, sentences, batch_size): 문장 목록을 (n, dimension) float32 배열로 변환
+    - get_sentence_embedding_dimension(self): 임베딩 차원 반환
+    """
+
+    def __init__(self, model_dir: str, intra_op_num_threads: int = 0):
+        import json
+
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        with open(os.path.join(model_dir, CONFIG_FILE), "r", encoding="utf-8") as f:
+            config = json.load(f)
+
+        self.dimension = config["dimension"]
+        self.normalize = config.get("normalize", True)
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, TOKENIZER_FILE))
+        self.tokenizer.enable_truncation(max_length=config.get("max_seq_length", 256))
+        self.tokenizer.enable_padding(pad_id=config.get("pad_token_id", 0))
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if intra_op_num_threads:
+            options.intra_op_num_threads = intra_op_num_threads
+
+        self.session = ort.InferenceSession(
+            os.path.join(model_dir, MODEL_FILE), sess_options=options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {model_input.name for model_input in self.session.get_inputs()}
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dimension
+
+    def encode(self, sentences: list[str] | str, batch_size: int = 32, **kwargs) -> np.ndarray:
+        if isinstance(sentences, str):
+            sentences = [sentences]
+        if not sentences:
+            return np.empty((0, self.dimension), dtype=np.float32)
+
+        batches = [self._encode_batch(sentences[i:i + batch_size]) for i in range(0, len(sentences), batch_size)]
+        return np.concatenate(batches)
+
+    def _encode_batch(self, sentences: list[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(sentences)
+
+        input_ids = np.array([encoding.ids for encoding in encodings], dtype=np.int64)
+        attention_mask = np.array([encoding.attention_mask for encoding in encodings], dtype=np.int64)
+
+        inputs = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self.input_names:
+            inputs["token_type_ids"] = np.zeros_like(input_ids)
+
+        token_embeddings = self.session.run(None, inputs)[0]
+
+        # SentenceTransformer 의 Pooling(mean) + Normalize 와 동일한 처리
+        mask = attention_mask[..., None].astype(np.float32)
+        embeddings = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+
+        if self.normalize:
+            embeddings /= np.clip(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12, None)
+
+        return embeddings.astype(np.float32)
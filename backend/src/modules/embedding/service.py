@@ -0,0 +1,221 @@
+import asyncio
+import os
+import queue
+import threading
+import time
+import traceback
+from concurrent.futures import Future
+from functools import lru_cache
+from typing import Protocol
+
+import numpy as np
+
+from src.config import settings
+from src.modules.embedding.cache import EmbeddingCache, normalize_text
+
+
+class EmbeddingModel(Protocol):
+    """
+    임베딩 backend 가 제공해야 하는 인터페이스 (SentenceTransformer 와 동일)
+    """
+    def encode(self, sentences: list[str], batch_size: int = 32) -> np.ndarray: ...
+    def get_sentence_embedding_dimension(self) -> int: ...
+
+
+class EmbeddingBatcher:
+    """
+    EmbeddingBatcher 클래스는 동시에 들어온 encode 요청들을 모아 한 번의 forward pass 로 처리합니다.
+    
+    요청은 queue 에 쌓이고, worker 스레드가 첫 요청 이후 max_wait_ms 동안 또는
+    max_batch_size 개의 문장이 모일 때까지 기다렸다가 batch encode 후
+    각 요청의 Future 에 결과를 나눠 전달합니다.
+    
+    메서드:
+    - submit(self, texts): encode 요청을 등록하고 Future 반환
+    - encode(self, texts): 결과가 나올 때까지 기다리는 동기 encode
+    - encode_async(self, texts): asyncio 용 encode
+    """
+    
+    def __init__(self, model: EmbeddingModel, max_batch_size: int = 64, max_wait_ms: float = 5.0):
+        self.model = model
+        self.dimension = model.get_sentence_embedding_dimension()
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        
+        self._queue: queue.Queue[tuple[list[str], Future]] = queue.Queue()
+        self._worker = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+        self._worker.start()
+    
+    def submit(self, texts: list[str]) -> Future:
+        future = Future()
+        if not texts:
+            future.set_result(np.empty((0, self.dimension), dtype=np.float32))
+        else:
+            self._queue.put((list(texts), future))
+        return future
+    
+    def encode(self, texts: list[str]) -> np.ndarray:
+        return self.submit(texts).result()
+    
+    async def encode_async(self, texts: list[str]) -> np.ndarray:
+        return await asyncio.wrap_future(self.submit(texts))
+    
+    def _run(self):
+        while True:
+            try:
+                batch = self._collect()
+                if batch:
+                    self._process(batch)
+            except Exception:
+                # worker 스레드가 죽으면 이후 모든 요청이 멈추므로 예외가 나도 계속 실행
+                traceback.print_exc()
+    
+    def _collect(self) -> list[tuple[list[str], Future]]:
+        batch = []
+        size = 0
+        item = self._queue.get()
+        deadline = time.monotonic() + self.max_wait
+        
+        # 첫 요청 이후 max_wait 동안 추가 요청을 모음
+        while True:
+            # encode_async 를 기다리던 쪽이 취소(연결 종료, timeout)한 요청은 건너뜀
+            if item[1].set_running_or_notify_cancel():
+                batch.append(item)
+                size += len(item[0])
+            if size >= self.max_batch_size:
+                break
+            
+            timeout = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+        
+        return batch
+    
+    def _process(self, batch: list[tuple[list[str], Future]]):
+        texts = [text for item_texts, _ in batch for text in item_texts]
+        
+        try:
+            vectors = np.asarray(self.model.encode(texts, batch_size=len(texts)), dtype=np.float32)
+        except Exception as e:
+            traceback.print_exc()
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        
+        offset = 0
+        for item_texts, future in batch:
+            future.set_result(vectors[offset:offset + len(item_texts)])
+            offset += len(item_texts)
+
+
+@lru_cache(maxsize=1)
+def get_embedding_model() -> EmbeddingModel:
+    """
+    RAG 에 사용하는 임베딩 모델을 반환합니다.
+    settings.embedding_backend 에 따라 PyTorch(SentenceTransformer) 또는
+    int8 양자화된 ONNX 모델을 사용합니다.
+    모델 로딩은 비용이 크므로 프로세스당 한 번만 로드합니다.
+    """
+    if settings.embedding_backend == "onnx":
+        from src.modules.embedding.onnx_model import OnnxEmbeddingModel
+        return OnnxEmbeddingModel(settings.embedding_onnx_model_dir)
+    
+    if settings.embedding_backend != "torch":
+        raise ValueError(f"Unknown embedding backend: {settings.embedding_backend}")
+    
+    # 임베딩 모델 로드, 영어 지원
+    # onnx backend 에서는 torch 를 import 하지 않도록 여기서 import
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(settings.embedding_model_name)
+
+
+def get_embedding_model_id() -> str:
+    """
+    저장된 벡터가 어떤 모델로 만들어졌는지 구분하는 id 입니다.
+    backend 가 바뀌면 벡터 값도 달라지므로 id 가 다르면 다시 임베딩해야 합니다.
+    """
+    return f"{settings.embedding_model_name}:{settings.embedding_backend}"
+
+
+@lru_cache(maxsize=1)
+def get_embedding_batcher() -> EmbeddingBatcher:
+    """
+    요청 처리 중 encode 에 사용하는 EmbeddingBatcher 를 반환합니다.
+    """
+    return EmbeddingBatcher(
+        get_embedding_model(),
+        max_batch_size=settings.embedding_batch_max_size,
+        max_wait_ms=settings.embedding_batch_max_wait_ms,
+    )
+
+
+@lru_cache(maxsize=1)
+def get_embedding_cache() -> EmbeddingCache:
+    """
+    요청 처리와 RAG index 생성이 함께 사용하는 임베딩 캐시를 반환합니다.
+    settings.embedding_cache_dir 가 비어 있으면 메모리 LRU 만 사용합니다.
+    """
+    return EmbeddingCache(
+        get_embedding_model_id(),
+        get_embedding_model().get_sentence_embedding_dimension(),
+        memory_size=settings.embedding_cache_memory_size,
+        cache_dir=settings.embedding_cache_dir,
+    )
+
+
+def encode(texts: list[str]) -> np.ndarray:
+    """
+    요청 처리 중 사용하는 encode 입니다.
+    캐시에 없는 문장만 batcher 로 보내 다른 요청들과 함께 encode 합니다.
+    """
+    normalized, vectors, misses = _lookup_cache(texts)
+    if misses:
+        _fill_misses(normalized, vectors, misses, get_embedding_batcher().encode([normalized[i] for i in misses]))
+    return vectors
+
+
+async def encode_async(texts: list[str]) -> np.ndarray:
+    normalized, vectors, misses = _lookup_cache(texts)
+    if misses:
+        _fill_misses(normalized, vectors, misses, await get_embedding_batcher().encode_async([normalized[i] for i in misses]))
+    return vectors
+
+
+def encode_bulk(texts: list[str]) -> np.ndarray:
+    """
+    RAG index 생성처럼 한 번에 많은 문장을 encode 할 때 사용합니다.
+    batcher 를 거치지 않고 캐시에 없는 문장만 모델로 직접 encode 합니다.
+    """
+    normalized, vectors, misses = _lookup_cache(texts)
+    if misses:
+        model_vectors = get_embedding_model().encode([normalized[i] for i in misses], batch_size=64)
+        _fill_misses(normalized, vectors, misses, np.asarray(model_vectors, dtype=np.float32))
+    return vectors
+
+
+def _lookup_cache(texts: list[str]) -> tuple[list[str], np.ndarray, list[int]]:
+    # 같은 의미의 질문이 같은 벡터를 갖도록 정규화된 문장을 encode 함
+    normalized = [normalize_text(text) for text in texts]
+    cache = get_embedding_cache()
+    
+    vectors = np.empty((len(texts), cache.dimension), dtype=np.float32)
+    misses = []
+    for i, vector in enumerate(cache.get_many(normalized)):
+        if vector is None:
+            misses.append(i)
+        else:
+            vectors[i] = vector
+    
+    return normalized, vectors, misses
+
+
+def _fill_misses(normalized: list[str], vectors: np.ndarray, misses: list[int], miss_vectors: np.ndarray):
+    vectors[misses] = miss_vectors
+    get_embedding_cache().put_many([normalized[i] for i in misses], miss_vectors)
+
+
+# batcher 의 worker 스레드는 fork 된 자식 프로세스로 넘어가지 않으므로
+# 자식에서는 batcher 를 새로 만들도록 캐시를 비움 (모델 가중치는 copy-on-write 로 공유)
+os.register_at_fork(after_in_child=get_embedding_batcher.cache_clear)
@@ -0,0 +1,38 @@
+from datetime import datetime
+from enum import Enum
+from typing import Optional
+from pydantic import BaseModel, Field
+
+from src.modules.sql_executor.dto import SqlExecutorRequestDto
+
+
+class ExportFormat(str, Enum):
+    CSV_GZ = "csv.gz"
+    PARQUET = "parquet"
+
+
+class ExportStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
+# sql 검증은 SqlExecutorRequestDto 의 validator 를 그대로 사용
+class ExportRequestDto(SqlExecutorRequestDto):
+    format: ExportFormat = Field(ExportFormat.CSV_GZ, title="Export format", description="csv.gz or parquet")
+
+
+class ExportJobResponseDto(BaseModel):
+    job_id: str = Field(..., title="Job ID")
+    status: ExportStatus = Field(..., title="Status", description="queued, running, succeeded or failed")
+    format: ExportFormat = Field(..., title="Export format")
+    
+    created_at: datetime = Field(..., title="Created at")
+    started_at: Optional[datetime] = Field(None, title="Started at")
+    finished_at: Optional[datetime] = Field(None, title="Finished at")
+    
+    rows: Optional[int] = Field(None, title="Rows", description="Number of exported rows")
+    bytes: Optional[int] = Field(None, title="Bytes", description="Size of the exported file")
+    error: Optional[str] = Field(None, title="Error", description="The error message if the job failed")
+    download_url: Optional[str] = Field(None, title="Download URL", description="Available when the job succeeded")
@@ -0,0 +1,23 @@
+from fastapi import APIRouter
+from fastapi.responses import FileResponse
+from src.modules.export import service as export_service
+from src.modules.export.dto import ExportRequestDto, ExportJobResponseDto
+
+
+router = APIRouter(prefix="/export", tags=["Export"])
+
+
+@router.post("/", status_code=202)
+def create_export(exportRequestDto: ExportRequestDto) -> ExportJobResponseDto:
+    return export_service.submit(exportRequestDto)
+
+
+@router.get("/{job_id}")
+async def get_export(job_id: str) -> ExportJobResponseDto:
+    return export_service.get_job(job_id)
+
+
+@router.get("/{job_id}/download")
+async def download_export(job_id: str) -> FileResponse:
+    path, file_name, media_type = export_service.get_download(job_id)
+    return FileResponse(path, filename=file_name, media_type=media_type)
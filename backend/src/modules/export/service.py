@@ -0,0 +1,300 @@
+import contextvars
+import gzip
+import io
+import json
+import os
+import re
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from functools import lru_cache
+
+from fastapi import HTTPException
+
+from src.config import settings
+from src.database import create_dedicated_connection, get_db_internal
+from src.modules.cohort.handle import COHORT_SCHEMA
+from src.modules.cohort import service as cohort_service
+from src.modules.export.dto import ExportFormat, ExportJobResponseDto, ExportRequestDto, ExportStatus
+from src.modules.metrics.service import track_in_flight
+from src.modules.tracing import service as tracing_service
+from src.modules.scheduler import service as scheduler_service
+from src.modules.scheduler.service import sql_scheduler, SchedulerOverloaded, LANE_BATCH
+
+TARGET_SCHEMA = "ohdsi_test"
+_JOB_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+_WRITE_BUFFER_SIZE = 1024 * 1024
+
+MEDIA_TYPES = {
+    ExportFormat.CSV_GZ: "application/gzip",
+    ExportFormat.PARQUET: "application/vnd.apache.parquet",
+}
+
+# PostgreSQL type oid -> pyarrow type 이름 (parquet 변환 시 CSV 타입 추론 대신 사용)
+_PG_TYPE_TO_ARROW = {
+    16: "bool",
+    20: "int64",
+    21: "int64",
+    23: "int64",
+    700: "float64",
+    701: "float64",
+    1700: "float64",
+    1082: "date32",
+    1114: "timestamp",
+    1184: "timestamptz",
+}
+
+"""
+    export 작업은 API worker 와 별도의 스레드 풀에서 실행하고, 상태는 export_dir 의 <job_id>.json 파일에 기록합니다.
+    여러 worker 프로세스가 있어도 어떤 worker 에서든 상태 조회와 다운로드가 가능합니다.
+"""
+
+@lru_cache(maxsize=1)
+def get_export_executor() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=settings.export_max_concurrency, thread_name_prefix="export")
+
+
+# gunicorn preload 로 fork 된 worker 는 부모의 스레드 풀을 쓸 수 없으므로 새로 만듦
+os.register_at_fork(after_in_child=get_export_executor.cache_clear)
+
+
+def submit(exportRequestDto: ExportRequestDto) -> ExportJobResponseDto:
+    if exportRequestDto.format == ExportFormat.PARQUET:
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise HTTPException(status_code=400, detail="Parquet export is not available on this server.")
+
+    # 만료되거나 없는 cohort handle 을 참조하면 작업을 만들지 않음
+    db = get_db_internal()
+    try:
+        cohort_service.check_handles(db, exportRequestDto.sql)
+    finally:
+        db.close()
+
+    os.makedirs(settings.export_dir, exist_ok=True)
+    _cleanup_expired()
+
+    job = {
+        "job_id": uuid.uuid4().hex,
+        "status": ExportStatus.QUEUED.value,
+        "format": exportRequestDto.format.value,
+        "sql": exportRequestDto.sql,
+        "created_at": datetime.now().isoformat(),
+    }
+    _save_job(job)
+
+    # request id 가 export 작업의 로그와 application_name 에도 남도록 context 를 복사해서 실행
+    get_export_executor().submit(contextvars.copy_context().run, _run_job, job)
+    return _to_response(job)
+
+
+def get_job(job_id: str) -> ExportJobResponseDto:
+    return _to_response(_load_job(job_id))
+
+
+def get_download(job_id: str) -> tuple[str, str, str]:
+    """
+    완료된 export 파일의 (경로, 다운로드 파일 이름, media type) 을 반환합니다.
+    """
+    job = _load_job(job_id)
+    if job["status"] != ExportStatus.SUCCEEDED.value:
+        raise HTTPException(status_code=409, detail=f"Export job is {job['status']}.")
+
+    export_format = ExportFormat(job["format"])
+    path = _output_path(job_id, export_format)
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="Export file has expired.")
+
+    return path, f"export-{job_id}.{export_format.value}", MEDIA_TYPES[export_format]
+
+
+def _run_job(job: dict):
+    export_format = ExportFormat(job["format"])
+    output_path = _output_path(job["job_id"], export_format)
+    part_path = output_path + ".part"
+
+    try:
+        # batch lane 은 동시 실행 수가 제한되어 interactive 쿼리가 밀리지 않음
+        with sql_scheduler.slot(LANE_BATCH, scheduler_service.get_user_id()):
+            _run_export(job, export_format, output_path, part_path)
+    except SchedulerOverloaded:
+        job.update(status=ExportStatus.FAILED.value, error="Too many queries are waiting. Please retry later.")
+        job["finished_at"] = datetime.now().isoformat()
+        _save_job(job)
+
+
+def _run_export(job: dict, export_format: ExportFormat, output_path: str, part_path: str):
+    job.update(status=ExportStatus.RUNNING.value, started_at=datetime.now().isoformat())
+    _save_job(job)
+
+    try:
+        with track_in_flight("export"), tracing_service.span("export.run", format=export_format.value) as span:
+            start = time.perf_counter()
+
+            connection = create_dedicated_connection()
+            try:
+                # 조회 전용 트랜잭션에서 실행
+                connection.set_session(readonly=True)
+                with connection.cursor() as cursor:
+                    cursor.execute(f"SET search_path TO {TARGET_SCHEMA}, {COHORT_SCHEMA}, public")
+                    cursor.execute("SELECT set_config('application_name', %s, true)", (tracing_service.application_name(),))
+
+                    # 감싸는 괄호는 줄을 바꿔서 붙임 (SQL 이 -- 주석으로 끝나면 닫는 괄호가 주석이 됨)
+                    query = job["sql"].strip().rstrip(";")
+                    if export_format == ExportFormat.PARQUET:
+                        rows = _copy_to_parquet(cursor, query, part_path)
+                    else:
+                        rows = _copy_to_csv_gz(cursor, query, part_path)
+                connection.rollback()
+            finally:
+                connection.close()
+
+            os.replace(part_path, output_path)
+            size = os.path.getsize(output_path)
+            elapsed = time.perf_counter() - start
+            span.set_attribute("rows", rows)
+            span.set_attribute("bytes", size)
+
+        print(f"Export {job['job_id']} finished: {rows} rows, {size / 1024 / 1024:.1f} MB in {elapsed:.1f}s")
+        job.update(status=ExportStatus.SUCCEEDED.value, rows=rows, bytes=size)
+
+    except Exception as e:
+        print(f"Export Error: {e}")
+        traceback.print_exc()
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        job.update(status=ExportStatus.FAILED.value, error="An error occurred while exporting the SQL query.")
+
+    job["finished_at"] = datetime.now().isoformat()
+    _save_job(job)
+
+
+def _copy_to_csv_gz(cursor, query: str, path: str) -> int:
+    # COPY 는 row 단위로 write 를 호출하므로 버퍼를 두고 큰 단위로 압축
+    with gzip.open(path, "wb", compresslevel=settings.export_gzip_level) as gzip_file, \
+            io.BufferedWriter(gzip_file, buffer_size=_WRITE_BUFFER_SIZE) as f:
+        cursor.copy_expert(f"COPY (\n{query}\n) TO STDOUT WITH (FORMAT csv, HEADER true)", f)
+    return cursor.rowcount
+
+
+def _copy_to_parquet(cursor, query: str, path: str) -> int:
+    """
+    COPY 의 CSV 출력을 pipe 로 받아 pyarrow 로 block 단위로 변환하면서 parquet 파일에 씁니다.
+    결과 전체를 메모리에 올리지 않으며, 컬럼 타입은 결과 컬럼의 PostgreSQL 타입을 따릅니다.
+    """
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+    import pyarrow.parquet as pq
+
+    # 실행하지 않고 결과 컬럼 정보만 조회
+    cursor.execute(f"SELECT * FROM (\n{query}\n) AS export_query LIMIT 0")
+    arrow_types = {
+        "bool": pa.bool_(),
+        "int64": pa.int64(),
+        "float64": pa.float64(),
+        "date32": pa.date32(),
+        "timestamp": pa.timestamp("us"),
+        "timestamptz": pa.timestamp("us", tz="UTC"),
+    }
+    column_types = {
+        column.name: arrow_types[_PG_TYPE_TO_ARROW[column.type_code]] if column.type_code in _PG_TYPE_TO_ARROW else pa.string()
+        for column in cursor.description
+    }
+
+    cursor.execute("SET TIME ZONE 'UTC'")
+
+    read_fd, write_fd = os.pipe()
+    copy_errors = []
+
+    def copy():
+        try:
+            with os.fdopen(write_fd, "wb", buffering=_WRITE_BUFFER_SIZE) as pipe:
+                cursor.copy_expert(f"COPY (\n{query}\n) TO STDOUT WITH (FORMAT csv, HEADER true)", pipe)
+        except BaseException as e:
+            copy_errors.append(e)
+
+    copy_thread = threading.Thread(target=copy, name="export-copy", daemon=True)
+    copy_thread.start()
+
+    rows = 0
+    try:
+        with os.fdopen(read_fd, "rb") as pipe:
+            reader = pacsv.open_csv(
+                pipe,
+                read_options=pacsv.ReadOptions(block_size=settings.export_parquet_block_size),
+                convert_options=pacsv.ConvertOptions(
+                    column_types=column_types,
+                    true_values=["t"],
+                    false_values=["f"],
+                    # COPY CSV 에서 NULL 은 따옴표 없는 빈 값, 빈 문자열은 ""
+                    strings_can_be_null=True,
+                    quoted_strings_can_be_null=False,
+                ),
+            )
+            with pq.ParquetWriter(path, reader.schema) as writer:
+                for batch in reader:
+                    writer.write_batch(batch)
+                    rows += batch.num_rows
+    finally:
+        # reader 가 먼저 실패하면 pipe 가 닫혀 COPY 스레드도 종료됨
+        copy_thread.join()
+
+    if copy_errors:
+        raise copy_errors[0]
+    return rows
+
+
+def _cleanup_expired():
+    expire_before = time.time() - settings.export_retention_hours * 3600
+    for file_name in os.listdir(settings.export_dir):
+        path = os.path.join(settings.export_dir, file_name)
+        try:
+            if os.path.getmtime(path) < expire_before:
+                os.remove(path)
+        except OSError:
+            continue
+
+
+def _job_path(job_id: str) -> str:
+    return os.path.join(settings.export_dir, f"{job_id}.json")
+
+
+def _output_path(job_id: str, export_format: ExportFormat) -> str:
+    return os.path.join(settings.export_dir, f"{job_id}.{export_format.value}")
+
+
+def _save_job(job: dict):
+    # 다른 worker 가 쓰는 도중의 파일을 읽지 않도록 임시 파일에 쓰고 교체
+    tmp_path = _job_path(job["job_id"]) + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(job, f, ensure_ascii=False)
+    os.replace(tmp_path, _job_path(job["job_id"]))
+
+
+def _load_job(job_id: str) -> dict:
+    if not _JOB_ID_PATTERN.match(job_id):
+        raise HTTPException(status_code=404, detail="Export job not found.")
+    try:
+        with open(_job_path(job_id), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Export job not found.")
+
+
+def _to_response(job: dict) -> ExportJobResponseDto:
+    return ExportJobResponseDto(
+        job_id=job["job_id"],
+        status=job["status"],
+        format=job["format"],
+        created_at=job["created_at"],
+        started_at=job.get("started_at"),
+        finished_at=job.get("finished_at"),
+        rows=job.get("rows"),
+        bytes=job.get("bytes"),
+        error=job.get("error"),
+        download_url=f"/export/{job['job_id']}/download" if job["status"] == ExportStatus.SUCCEEDED.value else None,
+    )
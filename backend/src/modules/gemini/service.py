@@ -1,33 +1,179 @@
 import json
+import re
+import time
+from typing import Callable, Optional
 from fastapi import HTTPException
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.prompts import PromptTemplate
 from src.config import settings
 from src.modules.sql_generator.dto import SqlGeneratorRequestDto
 from langchain_core.messages.ai import AIMessage
+from src.modules.metrics.service import observe_stage, STAGE_DURATION, STAGE_LLM_CALL, STAGE_LLM_FIRST_TOKEN
+from src.modules.tracing import service as tracing_service
+from src.modules.scheduler import service as scheduler_service
+from src.modules.scheduler.service import llm_scheduler, SchedulerOverloaded, LANE_INTERACTIVE
 
 
-def generate_response(prompt: str, sqlGeneratorRequest: SqlGeneratorRequestDto) -> AIMessage:
+def generate_response(prompt: str, sqlGeneratorRequest: SqlGeneratorRequestDto, lane: str = LANE_INTERACTIVE) -> AIMessage:
     try:
-        _llm = ChatGoogleGenerativeAI(
-            model="gemini-1.5-flash",
-            temperature=0,
-            max_output_tokens=200,
-            google_api_key=settings.gemini_api_key
-        )
-        chain = PromptTemplate.from_template(prompt) | _llm
+        # Gemini quota 를 사용자 / batch 요청과 나눠 쓰도록 스케줄러에서 차례를 기다림
+        with llm_scheduler.slot(lane, scheduler_service.get_user_id()):
+            with tracing_service.span("gemini.generate_response", model="gemini-1.5-flash"):
+                return _generate_response(prompt, sqlGeneratorRequest)
+    except SchedulerOverloaded as e:
+        raise scheduler_service.to_http_exception(e)
+
+
+def stream_response(
+    prompt: str,
+    sqlGeneratorRequest: SqlGeneratorRequestDto,
+    on_delta: Callable[[str, str], None],
+    is_cancelled: Callable[[], bool] = lambda: False,
+    lane: str = LANE_INTERACTIVE,
+) -> Optional[AIMessage]:
+    """
+    Gemini 응답을 token 단위로 받으면서 sql / error 값이 늘어날 때마다 on_delta(key, delta) 를 호출합니다.
+    완료되면 generate_response 와 같은 형태({key: value})의 AIMessage 를, is_cancelled() 로 중단되면 None 을 반환합니다.
+    """
+    try:
+        with llm_scheduler.slot(lane, scheduler_service.get_user_id()):
+            with tracing_service.span("gemini.stream_response", model="gemini-1.5-flash"):
+                return _stream_response(prompt, sqlGeneratorRequest, on_delta, is_cancelled)
+    except SchedulerOverloaded as e:
+        raise scheduler_service.to_http_exception(e)
+
+
+class ResponseEnvelopeParser:
+    """
+    ResponseEnvelopeParser 클래스는 LLM 응답의 `sql: ...` / `error: ...` 형식을 조금씩 들어오는 token 으로 해석합니다.
+    
+    주요 처리 항목:
+    1. 앞뒤의 ``` (```sql, ```text 포함) 와 ` 제거, key 대소문자 / 콜론 앞뒤 공백 무시
+    2. key 뒤의 첫 콜론에서만 나누므로 값에 있는 콜론 (::date, 'HH24:MI') 은 그대로 유지
+    3. key 없이 SELECT / WITH 로 시작하는 응답은 sql 로 간주
+    
+    메서드:
+    - feed(self, text: str): token 을 추가하고 새로 확정된 값 부분(delta)을 반환
+    - close(self): 전체 응답을 {key: value} 로 반환, 형식이 맞지 않으면 None
+    """
+    
+    _ENVELOPE = re.compile(r"^\s*(?:```[A-Za-z]*\s*)?`?\s*(sql|error)\s*:", re.IGNORECASE)
+    _RAW_SQL = re.compile(r"^\s*(?:```[A-Za-z]*\s*)?`?\s*((?:select|with)\b)", re.IGNORECASE)
+    # 응답 끝의 ``` 일 수 있으므로 확정하지 않고 다음 token 을 기다리는 문자
+    _TRAILING = " \t\r\n`"
+    
+    def __init__(self):
+        self.key: Optional[str] = None
+        self._buffer = ""
+        self._value = ""
+        self._emitted = 0
+    
+    def feed(self, text: str) -> str:
+        if self.key is None:
+            self._buffer += text
+            match = self._ENVELOPE.match(self._buffer)
+            if match:
+                self.key = match.group(1).lower()
+                self._value = self._buffer[match.end():]
+            else:
+                match = self._RAW_SQL.match(self._buffer)
+                if not match:
+                    return ""
+                self.key = "sql"
+                self._value = self._buffer[match.start(1):]
+        else:
+            self._value += text
+        
+        if self._emitted == 0:
+            self._value = self._value.lstrip()
+        
+        stable = len(self._value.rstrip(self._TRAILING))
+        if stable <= self._emitted:
+            return ""
+        delta = self._value[self._emitted:stable]
+        self._emitted = stable
+        return delta
+    
+    def close(self) -> Optional[dict[str, str]]:
+        if self.key is None:
+            return None
+        return {self.key: self._value.strip(self._TRAILING)}
+
+
+def parse_envelope(content: str) -> Optional[dict[str, str]]:
+    parser = ResponseEnvelopeParser()
+    parser.feed(content)
+    return parser.close()
+
+
+def _build_chain(prompt: str):
+    _llm = ChatGoogleGenerativeAI(
+        model="gemini-1.5-flash",
+        temperature=0,
+        max_output_tokens=200,
+        google_api_key=settings.gemini_api_key
+    )
+    return PromptTemplate.from_template(prompt) | _llm
+
+
+def _generate_response(prompt: str, sqlGeneratorRequest: SqlGeneratorRequestDto) -> AIMessage:
+    try:
+        chain = _build_chain(prompt)
         
         input_dict = sqlGeneratorRequest.model_dump()
-        ai_message = chain.invoke(input_dict)
+        with observe_stage(STAGE_LLM_CALL):
+            ai_message = chain.invoke(input_dict)
         
-        if ai_message.content and type(ai_message.content) == str:
-            key, value = ai_message.content.split(":")
-            ai_message.content = {key.strip() : value.strip()}
-        else:
+        content = parse_envelope(ai_message.content) if isinstance(ai_message.content, str) else None
+        if content is None:
             print(ai_message.content)
             raise HTTPException(status_code=500, detail="Invalid response from AI")
+        ai_message.content = content
             
         return ai_message
     except Exception as e:
         print(e)
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def _stream_response(
+    prompt: str,
+    sqlGeneratorRequest: SqlGeneratorRequestDto,
+    on_delta: Callable[[str, str], None],
+    is_cancelled: Callable[[], bool],
+) -> Optional[AIMessage]:
+    try:
+        chain = _build_chain(prompt)
+        parser = ResponseEnvelopeParser()
+        raw = []
+        
+        start = time.perf_counter()
+        with observe_stage(STAGE_LLM_CALL):
+            stream = chain.stream(sqlGeneratorRequest.model_dump())
+            try:
+                for chunk in stream:
+                    if not raw:
+                        # 사용자가 체감하는 지연시간 (첫 token 까지)
+                        STAGE_DURATION.labels(stage=STAGE_LLM_FIRST_TOKEN).observe(time.perf_counter() - start)
+                    text = chunk.content if isinstance(chunk.content, str) else ""
+                    raw.append(text)
+                    
+                    delta = parser.feed(text)
+                    if delta:
+                        on_delta(parser.key, delta)
+                    
+                    # 클라이언트가 연결을 끊으면 Gemini 요청도 중단
+                    if is_cancelled():
+                        return None
+            finally:
+                stream.close()
+        
+        content = parser.close()
+        if content is None:
+            print("".join(raw))
+            raise HTTPException(status_code=500, detail="Invalid response from AI")
+        
+        return AIMessage(content=content)
+    except Exception as e:
+        print(e)
+        raise HTTPException(status_code=500, detail=str(e))
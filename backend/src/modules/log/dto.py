@@ -1,6 +1,6 @@
 from datetime import datetime
 from typing import Optional
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, Text, ForeignKey, Identity, Index, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.sql import func
 
@@ -10,13 +10,28 @@ from src.database import Base
 
 class SqlGeneratorLogRequestModel(Base):
     
+    # input_received_timestamp 기준 월별 range 파티션 테이블
+    # (alembic 8e41d6a0c5b7, 파티션 생성/삭제는 log service 의 maintain_log_partitions)
     __tablename__ = "sql_generator_log"
+    __table_args__ = (
+        # get_query_and_log 의 최신 성공 질문/SQL 조회용 partial index
+        Index(
+            "ix_sql_generator_log_recent_success",
+            text("input_received_timestamp DESC"),
+            postgresql_where=text(
+                "user_input_text IS NOT NULL AND user_input_text <> '' "
+                "AND generated_sql IS NOT NULL AND generated_sql <> ''"
+            ),
+        ),
+        {"postgresql_partition_by": "RANGE (input_received_timestamp)"},
+    )
     
-    log_id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    log_id: Mapped[int] = mapped_column(BigInteger, Identity(), primary_key=True)
     # user_id: Mapped[int] = mapped_column(ForeignKey("users.user_id"), nullable=False)
     # session_id: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
     
-    input_received_timestamp: Mapped[datetime] = mapped_column(DateTime, nullable=True)
+    # 파티션 키는 PK 에 포함되어야 함
+    input_received_timestamp: Mapped[datetime] = mapped_column(DateTime, primary_key=True, server_default=func.now())
     user_input_text: Mapped[str] = mapped_column(Text, nullable=True)
     
     pre_llm_filter_status: Mapped[str] = mapped_column(String(50), nullable=True)
@@ -1,6 +1,9 @@
+from datetime import date, datetime
+from typing import Optional
+
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
-from sqlalchemy import MetaData, Table, select, and_
+from sqlalchemy import select, text
 
 from fastapi import Depends
 from fastapi import HTTPException
@@ -9,16 +12,28 @@ from src.modules.log.dto import SqlGeneratorLogRequestModel
 from src.config import settings
 from src.database import get_db_internal
 
+import os
+import re
+import threading
+import time
 import traceback
 
+# 월별 range 파티션으로 관리하는 로그 테이블 (alembic 8e41d6a0c5b7)
+PARTITIONED_LOG_TABLES = ("sql_generator_log",)
+
+_RECENT_LOG_FETCH_SIZE = 200
+
+_maintenance_lock = threading.Lock()
+_maintenance_started = False
+
 
 def save_sql_generator_log (db_log : SqlGeneratorLogRequestModel):
     db = get_db_internal()
     
     try:    
         db.add(db_log)
+        # log_id 는 INSERT ... RETURNING 으로 받으므로 commit 후 다시 SELECT 하지 않음
         db.commit()
-        db.refresh(db_log)
         return db_log
     
     except SQLAlchemyError as db_err:
@@ -34,49 +49,64 @@ def save_sql_generator_log (db_log : SqlGeneratorLogRequestModel):
     finally:
         db.close()
 
-# LOG 용 query, sql 받아오는 함수    
+# batch 요청의 로그를 한 번의 commit 으로 저장
+def save_sql_generator_logs (db_logs : list[SqlGeneratorLogRequestModel]):
+    db = get_db_internal()
+    
+    try:
+        db.add_all(db_logs)
+        db.commit()
+        return db_logs
+    
+    except SQLAlchemyError as db_err:
+        db.rollback()
+        print(f"Database Error: {db_err}")
+        traceback.print_exc()
+
+    except Exception as e:
+        db.rollback()
+        print(f"Unexpected Error: {e}")
+        traceback.print_exc()
+    
+    finally:
+        db.close()
+
+# LOG 용 query, sql 받아오는 함수
 def get_query_and_log(limit : int = 50) -> tuple[list[str], list[str]]:
+    """
+    성공한(질문과 SQL 이 모두 있는) 로그에서 서로 다른 (질문, SQL) 쌍을 최신순으로 limit 개 반환합니다.
+    
+    ix_sql_generator_log_recent_success 인덱스를 최신순으로 읽으면서 중복을 건너뛰고
+    limit 개가 모이면 바로 멈추므로, 로그가 쌓여도 읽는 행 수는 limit 과 중복 수에 비례합니다.
+    """
     db = get_db_internal()
     
     query_list = []
     sql_list = []
     
     try:
-        # Session의 bind(연결된 엔진)로부터 MetaData를 가져오거나 직접 정의
-        # 여기서는 Session의 엔진을 사용하여 테이블 정보를 로드하는 방식 사용
-        metadata = MetaData()
-        # Session에 연결된 엔진을 사용하여 테이블 메타데이터를 반영
-        sql_generator_log_table = Table(
-            'sql_generator_log',
-            metadata,
-            autoload_with=db.bind, # Session에 바인딩된 엔진 사용
-        )
-
-        # select 문 작성
-        stmt = select(
-            sql_generator_log_table.c.user_input_text,
-            sql_generator_log_table.c.generated_sql
-        ).where(
-            and_(
-                # query 컬럼이 NULL이 아니고 빈 문자열이 아닌 경우
-                sql_generator_log_table.c.user_input_text.isnot(None),
-                sql_generator_log_table.c.user_input_text != '',
-                # sql 컬럼이 NULL이 아니고 빈 문자열이 아닌 경우
-                sql_generator_log_table.c.generated_sql.isnot(None),
-                sql_generator_log_table.c.generated_sql != ''
-            )
-        ).limit(limit)
-
-        # 주어진 Session을 사용하여 쿼리 실행
-        result = db.execute(stmt)
-
-        # 결과를 순회하며 각 리스트에 추가
-        # result는 ScalarResult 또는 Result 객체일 수 있으며, fetchall()을 사용하거나 직접 순회
+        log = SqlGeneratorLogRequestModel
+        stmt = select(log.user_input_text, log.generated_sql).where(
+            # 인덱스의 partial 조건과 같아야 index scan 이 가능
+            log.user_input_text.isnot(None),
+            log.user_input_text != '',
+            log.generated_sql.isnot(None),
+            log.generated_sql != ''
+        ).order_by(log.input_received_timestamp.desc())
+
+        seen = set()
+        # 서버 측 cursor 로 조금씩 읽음
+        result = db.execute(stmt.execution_options(yield_per=_RECENT_LOG_FETCH_SIZE))
         for row in result:
-             # 결과 row는 튜플처럼 접근하거나 컬럼 이름으로 속성 접근 가능
-             # row는 Row 객체이며, 인덱스 또는 컬럼 키(이름)로 접근 가능
-             query_list.append(row.user_input_text)
-             sql_list.append(row.generated_sql)
+            pair = (row.user_input_text, row.generated_sql)
+            if pair in seen:
+                continue
+            seen.add(pair)
+            query_list.append(row.user_input_text)
+            sql_list.append(row.generated_sql)
+            if len(query_list) >= limit:
+                break
+        result.close()
 
         # Query list 가 빈 경우 예시 하나씩 넣어줌
         if not query_list or not sql_list:
@@ -94,4 +124,111 @@ def get_query_and_log(limit : int = 50) -> tuple[list[str], list[str]]:
         db.close()
 
     return query_list, sql_list
-        
\ No newline at end of file
+
+
+def _add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _partition_name(table: str, month: date) -> str:
+    return f"{table}_y{month.year:04d}m{month.month:02d}"
+
+
+def maintain_log_partitions(now: Optional[datetime] = None) -> dict[str, list[str]]:
+    """
+    월별 파티션 로그 테이블의 파티션을 관리하고 {"created": [...], "dropped": [...]} 를 반환합니다.
+    
+    - 이번 달부터 settings.log_partitions_ahead_months 달 뒤까지의 파티션이 없으면 생성
+    - 끝 시각이 settings.log_retention_months 달 전(월 초 기준)보다 이전인 파티션은 detach 후 삭제
+      (DELETE 없이 파티션 단위로 지우므로 vacuum 부담이 없음, 0 이하이면 삭제하지 않음)
+    
+    여러 worker 가 동시에 호출해도 advisory lock 으로 한 곳에서만 실행되며,
+    쓰기 중인 로그 INSERT 를 오래 막지 않도록 lock_timeout 을 둡니다.
+    """
+    current = (now or datetime.now()).date().replace(day=1)
+    report = {"created": [], "dropped": []}
+    db = get_db_internal()
+
+    try:
+        if not db.execute(text("SELECT pg_try_advisory_xact_lock(hashtext('log_partition_maintenance'))")).scalar():
+            return report
+        db.execute(text("SET LOCAL lock_timeout = '5s'"))
+
+        for table in PARTITIONED_LOG_TABLES:
+            existing = set(db.execute(text(
+                "SELECT child.relname FROM pg_inherits "
+                "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+                "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+                "WHERE parent.relname = :table"
+            ), {"table": table}).scalars())
+
+            for offset in range(settings.log_partitions_ahead_months + 1):
+                month = _add_months(current, offset)
+                name = _partition_name(table, month)
+                if name in existing:
+                    continue
+                db.execute(text(
+                    f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {table} "
+                    f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_add_months(month, 1).isoformat()}')"
+                ))
+                report["created"].append(name)
+
+            if settings.log_retention_months <= 0:
+                continue
+
+            cutoff = _add_months(current, -settings.log_retention_months)
+            pattern = re.compile(rf"^{table}_y(\d{{4}})m(\d{{2}})$")
+            for name in sorted(existing):
+                match = pattern.match(name)
+                if not match:
+                    continue
+                month = date(int(match.group(1)), int(match.group(2)), 1)
+                if _add_months(month, 1) <= cutoff:
+                    db.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+                    db.execute(text(f"DROP TABLE {name}"))
+                    report["dropped"].append(name)
+
+        db.commit()
+        return report
+
+    except Exception as e:
+        db.rollback()
+        print(f"Log partition maintenance failed: {e}")
+        traceback.print_exc()
+        return {"created": [], "dropped": []}
+
+    finally:
+        db.close()
+
+
+def start_log_partition_maintenance():
+    """
+    maintain_log_partitions 를 바로 한 번 실행하고 이후 settings.log_partition_maintenance_interval_hours 마다
+    다시 실행하는 background 스레드를 시작합니다 (worker 프로세스마다 한 번, 0 이하이면 시작하지 않음).
+    """
+    global _maintenance_started
+    if settings.log_partition_maintenance_interval_hours <= 0:
+        return
+    with _maintenance_lock:
+        if _maintenance_started:
+            return
+        _maintenance_started = True
+
+    def run():
+        while True:
+            report = maintain_log_partitions()
+            if report["created"] or report["dropped"]:
+                print(f"Log partitions created: {report['created']}, dropped: {report['dropped']}")
+            time.sleep(settings.log_partition_maintenance_interval_hours * 3600)
+
+    threading.Thread(target=run, name="log-partition-maintenance", daemon=True).start()
+
+
+def _reset_maintenance_after_fork():
+    global _maintenance_started
+    _maintenance_started = False
+
+
+# gunicorn preload 로 fork 된 worker 에서는 스레드를 새로 시작
+os.register_at_fork(after_in_child=_reset_maintenance_after_fork)
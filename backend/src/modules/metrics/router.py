@@ -0,0 +1,11 @@
+from fastapi import APIRouter, Response
+
+from src.modules.metrics import service as metrics_service
+
+router = APIRouter(tags=["Metrics"])
+
+
+@router.get("/metrics")
+def metrics() -> Response:
+    content, content_type = metrics_service.render_metrics()
+    return Response(content=content, media_type=content_type)
@@ -0,0 +1,117 @@
+import os
+import time
+from contextlib import contextmanager
+from typing import Callable
+
+from fastapi.responses import JSONResponse
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Gauge, Histogram, generate_latest
+from prometheus_client.core import GaugeMetricFamily
+
+from src.modules.tracing.service import span
+
+# text-to-SQL 및 실행 파이프라인 단계 이름
+STAGE_TEXT_VALIDATION = "text_validation"
+STAGE_RAG_RETRIEVAL = "rag_retrieval"
+STAGE_PROMPT_BUILD = "prompt_build"
+STAGE_LLM_CALL = "llm_call"
+# streaming 응답에서 LLM 요청부터 첫 token 까지
+STAGE_LLM_FIRST_TOKEN = "llm_first_token"
+STAGE_SQL_VALIDATION = "sql_validation"
+STAGE_SQL_OPTIMIZATION = "sql_optimization"
+STAGE_DB_EXECUTION = "db_execution"
+STAGE_ROW_CONVERSION = "row_conversion"
+STAGE_SERIALIZATION = "serialization"
+STAGE_COMPRESSION = "compression"
+
+STAGE_DURATION = Histogram(
+    "pipeline_stage_duration_seconds",
+    "Duration of each text-to-SQL / SQL execution pipeline stage",
+    ["stage"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300),
+)
+
+IN_FLIGHT = Gauge(
+    "pipeline_in_flight_requests",
+    "Number of requests currently being processed",
+    ["kind"],
+    multiprocess_mode="livesum",
+)
+
+
+@contextmanager
+def observe_stage(stage: str):
+    """
+    with 블록의 실행 시간을 해당 stage 의 histogram 에 기록하고 같은 구간을 span 으로 남깁니다.
+    예외가 발생해도 걸린 시간은 기록합니다.
+    """
+    start = time.perf_counter()
+    try:
+        with span(f"stage.{stage}"):
+            yield
+    finally:
+        STAGE_DURATION.labels(stage=stage).observe(time.perf_counter() - start)
+
+
+@contextmanager
+def track_in_flight(kind: str):
+    gauge = IN_FLIGHT.labels(kind=kind)
+    gauge.inc()
+    try:
+        yield
+    finally:
+        gauge.dec()
+
+
+class _CallbackCollector:
+    """
+    scrape 시점에 값을 읽어오는 gauge (커넥션 풀 사용량, RAG index 크기 등) 를 모으는 collector 입니다.
+    multiprocess 모드에서는 scrape 를 처리한 worker 의 값이 노출됩니다.
+    """
+
+    def __init__(self):
+        self._callbacks: dict[str, tuple[str, Callable[[], float]]] = {}
+
+    def register(self, name: str, documentation: str, callback: Callable[[], float]):
+        self._callbacks[name] = (documentation, callback)
+
+    def collect(self):
+        for name, (documentation, callback) in self._callbacks.items():
+            try:
+                value = float(callback())
+            except Exception:
+                continue
+            yield GaugeMetricFamily(name, documentation, value=value)
+
+
+_callback_collector = _CallbackCollector()
+REGISTRY.register(_callback_collector)
+
+
+def register_gauge_callback(name: str, documentation: str, callback: Callable[[], float]):
+    _callback_collector.register(name, documentation, callback)
+
+
+def render_metrics() -> tuple[bytes, str]:
+    """
+    Prometheus text format 으로 metric 을 렌더링합니다.
+    PROMETHEUS_MULTIPROC_DIR 이 설정된 경우 (gunicorn 여러 worker) 모든 worker 의 값을 합칩니다.
+    """
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        registry.register(_callback_collector)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+
+class TimedJSONResponse(JSONResponse):
+    """
+    응답 JSON 직렬화 시간을 serialization stage 로 기록하는 JSONResponse 입니다.
+    """
+
+    def render(self, content) -> bytes:
+        with observe_stage(STAGE_SERIALIZATION):
+            return super().render(content)
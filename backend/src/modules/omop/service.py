@@ -25,6 +25,22 @@ def get_allowed_schema() -> Dict[str, Set[str]]:
     return schema
 
 
+@lru_cache(maxsize=1)
+def get_allowed_column_index() -> Dict[str, Set[str]]:
+    """
+    Returns an inverted index of the allowed schema: column name -> set of table names.
+    Used by the SQL validator to resolve unqualified columns with a single lookup
+    instead of scanning every table's column set.
+    """
+    
+    index: Dict[str, Set[str]] = {}
+    for table, columns in get_allowed_schema().items():
+        for column in columns:
+            index.setdefault(column, set()).add(table)
+    
+    return index
+
+
 @lru_cache()
 def get_prompt() -> str:
     """
@@ -0,0 +1,286 @@
+import asyncio
+import math
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Optional
+
+from fastapi import HTTPException, Request
+from prometheus_client import Counter, Gauge, Histogram
+
+from src.config import settings
+
+USER_ID_HEADER = "X-User-ID"
+
+# 요청 종류 (lane)
+LANE_INTERACTIVE = "interactive"
+LANE_BATCH = "batch"
+
+QUEUE_DEPTH = Gauge(
+    "scheduler_queue_depth",
+    "Number of calls waiting in a scheduler lane",
+    ["scheduler", "lane"],
+    multiprocess_mode="livesum",
+)
+RUNNING = Gauge(
+    "scheduler_running",
+    "Number of calls currently running in a scheduler lane",
+    ["scheduler", "lane"],
+    multiprocess_mode="livesum",
+)
+QUEUE_WAIT = Histogram(
+    "scheduler_queue_wait_seconds",
+    "Time spent waiting in a scheduler lane before running",
+    ["scheduler", "lane"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+REJECTED = Counter(
+    "scheduler_rejected_total",
+    "Number of calls rejected because a scheduler queue overflowed or waited too long",
+    ["scheduler", "lane"],
+)
+
+_user_id: ContextVar[Optional[str]] = ContextVar("user_id", default=None)
+
+
+class SchedulerOverloaded(Exception):
+    def __init__(self, retry_after: int):
+        super().__init__(f"Scheduler queue is full, retry after {retry_after} seconds")
+        self.retry_after = retry_after
+
+
+@dataclass
+class LaneConfig:
+    name: str
+    weight: float
+    max_concurrency: int
+    max_queue: int
+
+
+@dataclass
+class _Lane:
+    config: LaneConfig
+    running: int = 0
+    queued: int = 0
+    # 가상 시간: 실행을 허가받을 때마다 1 / weight 씩 증가, 가장 작은 lane 부터 허가
+    vtime: float = 0.0
+    # 평균 실행 시간 (Retry-After 계산용)
+    avg_service_sec: float = 1.0
+    # 사용자별 대기열, 사용자 사이에서는 round robin
+    waiting: "OrderedDict[str, deque[tuple[Future, float]]]" = field(default_factory=OrderedDict)
+
+
+class FairScheduler:
+    """
+    FairScheduler 클래스는 공유 자원(DB 커넥션, LLM quota) 앞에서 호출 순서를 정하는 스케줄러입니다.
+
+    - lane(interactive / batch) 별 weight 에 따라 가상 시간이 가장 작은 lane 부터 실행을 허가 (weighted fair queueing)
+    - lane 안에서는 사용자별 대기열을 round robin 으로 꺼내서 한 사용자가 많은 요청을 보내도 다른 사용자가 밀리지 않음
+    - 전체 동시 실행 수(max_concurrency)와 lane 별 동시 실행 수(max_concurrency) 제한
+    - lane 또는 사용자 대기열이 가득 차거나 max_wait 동안 허가받지 못하면 SchedulerOverloaded 발생
+
+    스케줄러는 프로세스마다 하나씩 존재하므로 여러 worker 를 쓰면 제한값도 worker 단위로 적용됩니다.
+
+    메서드:
+    - slot(self, lane, user_id): 실행 허가를 받을 때까지 기다리는 동기 context manager
+    - slot_async(self, lane, user_id): asyncio 용 context manager
+    """
+
+    def __init__(self, name: str, max_concurrency: int, lanes: list[LaneConfig], user_max_queue: int, max_wait: Optional[float]):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.user_max_queue = user_max_queue
+        self.max_wait = max_wait
+
+        self._lanes = {config.name: _Lane(config) for config in lanes}
+        self._running = 0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def slot(self, lane: str, user_id: Optional[str] = None):
+        future, enqueued = self._submit(lane, user_id)
+        try:
+            future.result(timeout=self.max_wait)
+        except FutureTimeoutError:
+            self._abandon(lane, user_id, future)
+            raise self._overloaded(lane)
+
+        granted = self._granted(lane, enqueued)
+        try:
+            yield
+        finally:
+            self._release(lane, time.monotonic() - granted)
+
+    @asynccontextmanager
+    async def slot_async(self, lane: str, user_id: Optional[str] = None):
+        future, enqueued = self._submit(lane, user_id)
+        try:
+            # 대기를 포기해도 Future 자체는 취소하지 않고 _abandon 에서 정리
+            await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), timeout=self.max_wait)
+        except asyncio.TimeoutError:
+            self._abandon(lane, user_id, future)
+            raise self._overloaded(lane)
+        except asyncio.CancelledError:
+            # 클라이언트 연결 종료 등으로 취소된 경우
+            self._abandon(lane, user_id, future)
+            raise
+
+        granted = self._granted(lane, enqueued)
+        try:
+            yield
+        finally:
+            self._release(lane, time.monotonic() - granted)
+
+    def _granted(self, lane: str, enqueued: float) -> float:
+        granted = time.monotonic()
+        QUEUE_WAIT.labels(scheduler=self.name, lane=lane).observe(granted - enqueued)
+        return granted
+
+    def _submit(self, lane_name: str, user_id: Optional[str]) -> tuple[Future, float]:
+        # 요청 context 밖의 호출처럼 사용자를 알 수 없으면 하나의 대기열을 같이 씀 (대기 수 제한도 같이 적용)
+        user_id = user_id or "anonymous"
+        future = Future()
+        enqueued = time.monotonic()
+
+        with self._lock:
+            lane = self._lanes[lane_name]
+            user_queue = lane.waiting.get(user_id)
+
+            user_queue_full = user_queue is not None and len(user_queue) >= self.user_max_queue
+            if lane.queued >= lane.config.max_queue or user_queue_full:
+                raise self._overloaded(lane_name, lane)
+
+            if not lane.queued and not lane.running:
+                # 쉬고 있던 lane 이 그동안 쌓인 가상 시간으로 다른 lane 을 밀어내지 않도록 맞춤
+                lane.vtime = max(lane.vtime, self._min_active_vtime())
+
+            lane.waiting.setdefault(user_id, deque()).append((future, enqueued))
+            lane.queued += 1
+            self._dispatch_locked()
+            self._update_gauges_locked(lane)
+
+        return future, enqueued
+
+    def _abandon(self, lane_name: str, user_id: Optional[str], future: Future):
+        user_id = user_id or "anonymous"
+        with self._lock:
+            lane = self._lanes[lane_name]
+            user_queue = lane.waiting.get(user_id)
+            if user_queue is not None:
+                for item in user_queue:
+                    if item[0] is future:
+                        user_queue.remove(item)
+                        lane.queued -= 1
+                        if not user_queue:
+                            del lane.waiting[user_id]
+                        self._update_gauges_locked(lane)
+                        return
+
+        # 이미 허가받은 뒤에 포기한 경우 자리를 반납
+        if future.done() and not future.cancelled():
+            self._release(lane_name, 0.0)
+
+    def _release(self, lane_name: str, service_sec: float):
+        with self._lock:
+            lane = self._lanes[lane_name]
+            lane.running -= 1
+            self._running -= 1
+            if service_sec:
+                lane.avg_service_sec = 0.9 * lane.avg_service_sec + 0.1 * service_sec
+            self._dispatch_locked()
+            self._update_gauges_locked(lane)
+
+    def _dispatch_locked(self):
+        while self._running < self.max_concurrency:
+            candidates = [
+                lane for lane in self._lanes.values()
+                if lane.queued and lane.running < lane.config.max_concurrency
+            ]
+            if not candidates:
+                return
+
+            lane = min(candidates, key=lambda candidate: candidate.vtime)
+            user_id, user_queue = next(iter(lane.waiting.items()))
+            future, _ = user_queue.popleft()
+            lane.queued -= 1
+
+            # 다음 사용자에게 차례를 넘김
+            if user_queue:
+                lane.waiting.move_to_end(user_id)
+            else:
+                del lane.waiting[user_id]
+
+            lane.running += 1
+            self._running += 1
+            lane.vtime += 1 / lane.config.weight
+            future.set_result(None)
+            self._update_gauges_locked(lane)
+
+    def _min_active_vtime(self) -> float:
+        active = [lane.vtime for lane in self._lanes.values() if lane.queued or lane.running]
+        return min(active, default=0.0)
+
+    def _overloaded(self, lane_name: str, lane: Optional[_Lane] = None) -> SchedulerOverloaded:
+        lane = lane or self._lanes[lane_name]
+        REJECTED.labels(scheduler=self.name, lane=lane_name).inc()
+        # 앞에 있는 요청이 모두 처리될 때까지의 예상 시간
+        retry_after = math.ceil((lane.queued + 1) * lane.avg_service_sec / lane.config.max_concurrency)
+        return SchedulerOverloaded(max(1, retry_after))
+
+    def _update_gauges_locked(self, lane: _Lane):
+        QUEUE_DEPTH.labels(scheduler=self.name, lane=lane.config.name).set(lane.queued)
+        RUNNING.labels(scheduler=self.name, lane=lane.config.name).set(lane.running)
+
+
+def _create_scheduler(name: str, max_concurrency: int, batch_max_concurrency: int) -> FairScheduler:
+    return FairScheduler(
+        name,
+        max_concurrency=max_concurrency,
+        lanes=[
+            LaneConfig(LANE_INTERACTIVE, settings.scheduler_interactive_weight, max_concurrency, settings.scheduler_max_queue),
+            LaneConfig(LANE_BATCH, settings.scheduler_batch_weight, batch_max_concurrency, settings.scheduler_max_queue),
+        ],
+        user_max_queue=settings.scheduler_user_max_queue,
+        max_wait=settings.scheduler_max_wait_sec,
+    )
+
+
+# OMOP DB 쿼리 실행 (sql_executor, export) 용 스케줄러
+sql_scheduler = _create_scheduler("sql", settings.sql_scheduler_max_concurrency, settings.sql_scheduler_batch_max_concurrency)
+# Gemini 호출 용 스케줄러
+llm_scheduler = _create_scheduler("llm", settings.llm_scheduler_max_concurrency, settings.llm_scheduler_batch_max_concurrency)
+
+
+def to_http_exception(e: SchedulerOverloaded) -> HTTPException:
+    return HTTPException(
+        status_code=429,
+        detail="Too many requests are waiting. Please retry later.",
+        headers={"Retry-After": str(e.retry_after)},
+    )
+
+
+def get_user_id() -> Optional[str]:
+    return _user_id.get()
+
+
+async def user_context_middleware(request: Request, call_next):
+    """
+    스케줄러가 사용자별 대기열을 나눌 수 있도록 요청의 사용자를 context 에 기록합니다.
+
+    X-User-ID 는 신뢰하는 frontend 프록시(Next.js API route)만 설정해야 합니다.
+    헤더 값을 검증하지 않고 그대로 사용하므로, backend 를 클라이언트에 직접 노출하면 헤더 값을 바꿔 가며
+    사용자별 대기 수 제한을 피할 수 있습니다 (lane 전체 대기 수 제한은 그대로 적용됨).
+    헤더가 없으면 클라이언트 주소를 사용자로 봅니다.
+    """
+    user_id = request.headers.get(USER_ID_HEADER)
+    if not user_id and request.client is not None:
+        user_id = f"ip:{request.client.host}"
+    token = _user_id.set(user_id[:64] if user_id else None)
+    try:
+        return await call_next(request)
+    finally:
+        _user_id.reset(token)
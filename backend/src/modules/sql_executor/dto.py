@@ -1,9 +1,38 @@
 from typing import Optional, Union
 from fastapi import HTTPException
 from pydantic import BaseModel, Field, field_validator
+from sqlglot import exp, parse_one
 
 from src.validator.sql_validator.basic_sql_validator import BasicSQLValidator   # 기본 검증
 from src.validator.sql_validator.syntax_sql_validator import SQLSyntaxStructureValidator # 문법 및 구조 검사
+from src.modules.metrics.service import observe_stage, STAGE_SQL_VALIDATION
+
+
+def parse_sql(sql: str) -> exp.Expression:
+    """
+    SQL 을 한 번 파싱합니다. 결과 AST 는 validate_sql 과 실행 단계(prepared statement)에서 재사용합니다.
+    
+    Raises:
+        ValueError: SQL 문법 오류인 경우 발생합니다.
+    """
+    try:
+        return parse_one(sql, read="postgres")
+    except Exception as e:
+        raise ValueError(f"SQL 문법 오류: {str(e)}")
+
+
+def validate_sql(sql: str, ast: Optional[exp.Expression] = None):
+    """
+    실행 전 SQL 검증 (허용 테이블/컬럼, 금지 명령어, 문법 및 구조), ast 가 있으면 다시 파싱하지 않습니다.
+    
+    Raises:
+        ValueError: 검증에 실패한 경우 발생합니다.
+    """
+    with observe_stage(STAGE_SQL_VALIDATION):
+        # 쿼리 기본 검증
+        BasicSQLValidator(sql, ast).validate()
+        # 쿼리 문법 및 구조 검사
+        SQLSyntaxStructureValidator(sql, ast).validate()
 
 
 class SqlExecutorRequestDto(BaseModel):
@@ -12,10 +41,7 @@ class SqlExecutorRequestDto(BaseModel):
     @field_validator("sql")
     def validate_text(cls, value):
         try:
-            # 쿼리 기본 검증
-            BasicSQLValidator(value).validate()
-            # 쿼리 문법 및 구조 검사
-            SQLSyntaxStructureValidator(value).validate()
+            validate_sql(value)
         except Exception as e:
             raise HTTPException(status_code=400, detail=str(e))
         
@@ -0,0 +1,226 @@
+import re
+import traceback
+from functools import lru_cache
+from typing import Optional
+
+from sqlglot import exp, parse_one
+from sqlglot.optimizer import optimize as sqlglot_optimize
+from sqlglot.optimizer.eliminate_ctes import eliminate_ctes
+from sqlglot.optimizer.eliminate_joins import eliminate_joins
+from sqlglot.optimizer.eliminate_subqueries import eliminate_subqueries
+from sqlglot.optimizer.merge_subqueries import merge_subqueries
+from sqlglot.optimizer.normalize import normalize
+from sqlglot.optimizer.optimize_joins import optimize_joins
+from sqlglot.optimizer.pushdown_predicates import pushdown_predicates
+from sqlglot.optimizer.pushdown_projections import pushdown_projections
+from sqlglot.optimizer.qualify import qualify
+from sqlglot.optimizer.simplify import simplify
+from sqlglot.optimizer.unnest_subqueries import unnest_subqueries
+from sqlglot.schema import MappingSchema
+
+from src.modules.cohort.handle import COHORT_COLUMNS, is_cohort_handle
+from src.modules.omop.service import get_allowed_schema
+
+# sqlglot 기본 RULES 에서 타입 추론(annotate_types)과 canonicalize 를 뺀 순서
+# (canonicalize 는 PostgreSQL 이 알아서 하는 형 변환을 CAST 로 바꿔 쓰기만 함)
+RULES = (
+    qualify,
+    pushdown_projections,
+    normalize,
+    unnest_subqueries,
+    pushdown_predicates,
+    optimize_joins,
+    eliminate_subqueries,
+    merge_subqueries,
+    eliminate_joins,
+    eliminate_ctes,
+    simplify,
+)
+
+# qualify 가 이름 없는 select 식(count(*) 등)에 붙이는 별칭
+_GENERATED_ALIAS = re.compile(r"_col_\d+")
+_CACHE_SIZE = 1024
+
+
+class OptimizeFailed(Exception):
+    """
+    재작성한 쿼리가 원래 쿼리와 같은 결과 형태를 보장하지 못하는 경우
+    """
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def optimize(sql: str) -> Optional[tuple[str, exp.Expression]]:
+    """
+    SELECT 문을 allowed_schema.json 의 OMOP 스키마로 sqlglot optimizer 에 통과시킨 (SQL, AST) 를 반환합니다.
+    SELECT 문이 아니거나 재작성에 실패하면 None 을 반환합니다 (원래 SQL 을 그대로 실행).
+
+    - EXTRACT(YEAR FROM col) / date_part('year', col) 비교를 col 범위 조건으로 바꿔 인덱스를 사용할 수 있게 함
+    - 사용하지 않는 CTE / 서브쿼리 컬럼 제거, 조건을 서브쿼리 안으로 push down
+    - IN (SELECT ...) 서브쿼리를 join 으로 unnest (NOT IN / <> ALL 이 있으면 제외), 불필요한 서브쿼리 / CTE 병합
+
+    같은 SQL 은 결과를 캐시하므로 반환한 AST 를 바꾸지 말아야 합니다 (prepared.parameterize 는 복사해서 사용).
+    """
+    try:
+        ast = parse_one(sql, read="postgres")
+    except Exception:
+        return None
+
+    if not isinstance(ast, exp.Query):
+        return None
+
+    # NOT IN (SELECT ...) 를 LEFT JOIN ... IS NULL 로 바꾸면 서브쿼리 결과에 NULL 이 있을 때 결과가 달라짐
+    # (NOT IN 은 0 행, join 은 일치하지 않는 행을 반환) 하므로 이 경우에는 unnest 하지 않음
+    rules = RULES if not _has_negated_subquery(ast) else tuple(rule for rule in RULES if rule is not unnest_subqueries)
+
+    try:
+        rewritten = rewrite_year_filters(ast.copy())
+        optimized = sqlglot_optimize(
+            rewritten,
+            schema=_get_schema(ast),
+            dialect="postgres",
+            rules=rules,
+            quote_identifiers=False,
+            identify=False,
+        )
+        _restore_output_names(ast, optimized)
+    except Exception as e:
+        print(f"SQL optimization skipped: {e}")
+        if not isinstance(e, OptimizeFailed):
+            traceback.print_exc()
+        return None
+
+    optimized_sql = optimized.sql(dialect="postgres")
+    print(f"SQL optimized:\n  original:  {sql}\n  rewritten: {optimized_sql}")
+    return optimized_sql, optimized
+
+
+def rewrite_year_filters(ast: exp.Expression) -> exp.Expression:
+    """
+    연도 비교 조건을 컬럼 범위 조건으로 바꿉니다. 컬럼에 함수를 씌우지 않으므로 인덱스를 사용할 수 있습니다.
+
+        EXTRACT(YEAR FROM col) = 2020              -> col >= '2020-01-01' AND col < '2021-01-01'
+        EXTRACT(YEAR FROM col) > 2020              -> col >= '2021-01-01'
+        EXTRACT(YEAR FROM col) BETWEEN 2019 AND 2020 -> col >= '2019-01-01' AND col < '2021-01-01'
+
+    date 와 timestamp 컬럼 모두 PostgreSQL 이 문자열 literal 을 컬럼 타입으로 변환합니다
+    (문자열 literal 이므로 prepared statement 의 파라미터로도 바뀜).
+    """
+    def transform(node: exp.Expression) -> exp.Expression:
+        if isinstance(node, exp.Between):
+            column = _year_column(node.this)
+            low, high = _year_value(node.args.get("low")), _year_value(node.args.get("high"))
+            if column is None or low is None or high is None:
+                return node
+            return exp.and_(exp.GTE(this=column.copy(), expression=_year_start(low)),
+                            exp.LT(this=column.copy(), expression=_year_start(high + 1)))
+
+        if not isinstance(node, (exp.EQ, exp.GT, exp.GTE, exp.LT, exp.LTE)):
+            return node
+
+        column, year, comparison = _year_column(node.this), _year_value(node.expression), type(node)
+        if column is None:
+            # 2020 = EXTRACT(YEAR FROM col) 처럼 literal 이 왼쪽에 있는 경우
+            column, year = _year_column(node.expression), _year_value(node.this)
+            comparison = {exp.GT: exp.LT, exp.GTE: exp.LTE, exp.LT: exp.GT, exp.LTE: exp.GTE}.get(comparison, comparison)
+        if column is None or year is None:
+            return node
+
+        if comparison is exp.EQ:
+            return exp.and_(exp.GTE(this=column.copy(), expression=_year_start(year)),
+                            exp.LT(this=column.copy(), expression=_year_start(year + 1)))
+        if comparison is exp.GT:
+            return exp.GTE(this=column.copy(), expression=_year_start(year + 1))
+        if comparison is exp.GTE:
+            return exp.GTE(this=column.copy(), expression=_year_start(year))
+        if comparison is exp.LT:
+            return exp.LT(this=column.copy(), expression=_year_start(year))
+        return exp.LT(this=column.copy(), expression=_year_start(year + 1))
+
+    return ast.transform(transform, copy=False)
+
+
+def _year_column(node: Optional[exp.Expression]) -> Optional[exp.Column]:
+    # 컬럼 하나에서 연도를 꺼내는 EXTRACT 만 대상 (식에 씌운 EXTRACT 는 그대로 둠)
+    if not isinstance(node, exp.Extract) or not isinstance(node.expression, exp.Column):
+        return None
+    if node.this.name.upper() != "YEAR":
+        return None
+    return node.expression
+
+
+def _year_value(node: Optional[exp.Expression]) -> Optional[int]:
+    if not isinstance(node, exp.Literal) or node.is_string or not node.this.isdigit():
+        return None
+    year = int(node.this)
+    # year + 1 이 date 로 표현 가능한 범위
+    return year if 1 <= year < 9999 else None
+
+
+def _year_start(year: int) -> exp.Literal:
+    return exp.Literal.string(f"{year:04d}-01-01")
+
+
+def _has_negated_subquery(ast: exp.Expression) -> bool:
+    # x <> ALL (SELECT ...) 도 NOT IN 과 같음
+    if ast.find(exp.All):
+        return True
+    return any(node.args.get("query") and node.find_ancestor(exp.Not) for node in ast.find_all(exp.In))
+
+
+@lru_cache(maxsize=1)
+def _get_base_schema() -> MappingSchema:
+    # 컬럼 타입은 재작성에 필요하지 않으므로 UNKNOWN 으로 둠
+    return MappingSchema(
+        {table: {column: "UNKNOWN" for column in sorted(columns)} for table, columns in get_allowed_schema().items()},
+        dialect="postgres",
+    )
+
+
+def _get_schema(ast: exp.Expression) -> MappingSchema:
+    handles = {table.name for table in ast.find_all(exp.Table) if is_cohort_handle(table.name)}
+    if not handles:
+        return _get_base_schema()
+
+    # cohort handle 테이블은 person_id 컬럼만 있음
+    schema = _get_base_schema().copy()
+    for handle in sorted(handles):
+        schema.add_table(handle, {column: "UNKNOWN" for column in sorted(COHORT_COLUMNS)})
+    return schema
+
+
+def _restore_output_names(original: exp.Expression, optimized: exp.Expression):
+    """
+    qualify 가 이름 없는 select 식에 붙인 _col_N 별칭을 떼어 결과 컬럼 이름을 원래 쿼리(PostgreSQL 기본 이름)와 같게 맞춥니다.
+    ORDER BY 에서 그 별칭을 참조하면 select 목록의 위치(ORDER BY 2)로 바꿉니다.
+
+    Raises:
+        OptimizeFailed: 결과 컬럼 수가 다르거나 떼어낸 별칭을 다른 곳에서 참조하는 경우
+    """
+    original_select, optimized_select = _leftmost_select(original), _leftmost_select(optimized)
+    if len(original_select.expressions) != len(optimized_select.expressions):
+        raise OptimizeFailed("select list changed")
+
+    positions = {}
+    for position, (before, after) in enumerate(zip(original_select.expressions, optimized_select.expressions), 1):
+        if isinstance(after, exp.Alias) and not isinstance(before, exp.Alias) and _GENERATED_ALIAS.fullmatch(after.alias):
+            positions[after.alias] = position
+            after.replace(after.this)
+
+    if not positions:
+        return
+
+    for column in list(optimized.find_all(exp.Column)):
+        if column.table or column.name not in positions:
+            continue
+        if not isinstance(column.parent, exp.Ordered) or column.find_ancestor(exp.Query) is not optimized:
+            raise OptimizeFailed(f"generated alias {column.name} is referenced")
+        column.replace(exp.Literal.number(positions[column.name]))
+
+
+def _leftmost_select(query: exp.Expression) -> exp.Select:
+    # UNION 등의 결과 컬럼 이름은 첫 번째 SELECT 를 따름
+    while isinstance(query, exp.SetOperation):
+        query = query.this
+    if isinstance(query, exp.Subquery):
+        return _leftmost_select(query.this)
+    return query
@@ -0,0 +1,182 @@
+import hashlib
+from collections import OrderedDict
+from typing import Any, Optional
+
+from prometheus_client import Counter
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+from sqlglot import exp, parse_one
+
+from src.config import settings
+
+PREPARED_LOOKUPS = Counter(
+    "prepared_statement_lookups_total",
+    "Prepared statement cache lookups by result (hit, miss, unpreparable, bypass)",
+    ["result"],
+)
+PREPARED_EVICTIONS = Counter(
+    "prepared_statement_evictions_total",
+    "Prepared statements deallocated because the per-connection cache was full",
+)
+
+# 양쪽 피연산자 중 하나가 컬럼/식이면 PostgreSQL 이 파라미터 타입을 추론할 수 있는 위치
+_PREDICATES = (exp.EQ, exp.NEQ, exp.GT, exp.GTE, exp.LT, exp.LTE, exp.Like, exp.ILike, exp.In, exp.Between)
+_CACHE_INFO_KEY = "prepared_statement_cache"
+
+
+class PrepareFailed(Exception):
+    """
+    PREPARE 가 실패한 경우 (트랜잭션은 rollback 이 필요한 상태)
+    """
+
+
+class PreparedStatementCache:
+    """
+    PreparedStatementCache 클래스는 DB 커넥션 하나에서 PREPARE 한 statement 이름을 query shape 별로 보관하는 LRU 입니다.
+
+    prepared statement 는 세션 단위이므로 커넥션(backend pid)마다 하나씩 만들며,
+    SQLAlchemy 커넥션 풀의 connection info 에 저장해서 같은 커넥션을 다시 빌려도 재사용합니다.
+    PREPARE 가 실패한 shape 는 None 으로 기록해서 다시 시도하지 않습니다.
+    """
+
+    def __init__(self, backend_pid: int, max_size: int):
+        self.backend_pid = backend_pid
+        self.max_size = max_size
+        self._statements: OrderedDict[str, Optional[str]] = OrderedDict()
+
+    def __contains__(self, shape: str) -> bool:
+        return shape in self._statements
+
+    def get(self, shape: str) -> Optional[str]:
+        self._statements.move_to_end(shape)
+        return self._statements[shape]
+
+    def put(self, shape: str, name: Optional[str]) -> list[str]:
+        """
+        shape 를 추가하고 LRU 에서 밀려나 DEALLOCATE 해야 하는 statement 이름 목록을 반환합니다.
+        """
+        self._statements[shape] = name
+        evicted = []
+        while len(self._statements) > self.max_size:
+            _, evicted_name = self._statements.popitem(last=False)
+            if evicted_name is not None:
+                evicted.append(evicted_name)
+        return evicted
+
+
+def parameterize(sql: str, ast: Optional[exp.Expression] = None) -> Optional[tuple[str, list[Any]]]:
+    """
+    SELECT 문의 비교 조건과 LIMIT / OFFSET 에 있는 literal 을 $1, $2 ... 파라미터로 바꾼
+    (query shape, 파라미터 값 목록) 을 반환합니다. SELECT 문이 아니면 None 을 반환합니다.
+    이미 파싱한 ast 가 있으면 복사해서 사용합니다 (원본은 바꾸지 않음).
+
+    문자열과 정수 literal 만 바꾸며, GROUP BY 1 / ORDER BY 1 같은 위치 참조나 select 목록의 literal 처럼
+    파라미터로 바꾸면 의미나 타입이 달라지는 literal 은 그대로 둡니다.
+    """
+    if ast is not None:
+        ast = ast.copy()
+    else:
+        try:
+            ast = parse_one(sql, read="postgres")
+        except Exception:
+            return None
+
+    if not isinstance(ast, exp.Query):
+        return None
+
+    params: list[Any] = []
+    for literal in list(ast.find_all(exp.Literal)):
+        node = literal.parent if isinstance(literal.parent, exp.Neg) else literal
+        if not _is_parameterizable(node):
+            continue
+        # 파라미터 타입은 PREPARE 시점에 비교 대상 컬럼 타입으로 정해지므로,
+        # 정수 컬럼과 비교하는 1950.5 같은 소수나 int4 범위를 넘는 정수는 반올림/overflow 되지 않도록 그대로 둠
+        if not literal.is_string and not _is_int4(literal.this):
+            continue
+
+        value = literal.this if literal.is_string else int(literal.this)
+        if node is not literal:
+            value = -value
+
+        params.append(value)
+        node.replace(exp.Parameter(this=exp.Literal.number(len(params))))
+
+    return ast.sql(dialect="postgres"), params
+
+
+def execute(db: Session, sql: str, ast: Optional[exp.Expression] = None):
+    """
+    sql 을 query shape 별 prepared statement 로 실행하고 CursorResult 를 반환합니다.
+    파라미터화할 수 없거나 캐시가 꺼져 있으면 None 을 반환합니다 (호출한 쪽에서 그대로 실행).
+
+    Raises:
+        PrepareFailed: PREPARE 가 실패한 경우. 트랜잭션을 rollback 한 뒤 일반 실행으로 다시 시도해야 합니다.
+    """
+    if settings.sql_executor_prepared_cache_size <= 0:
+        return None
+
+    parameterized = parameterize(sql, ast)
+    if parameterized is None:
+        PREPARED_LOOKUPS.labels(result="bypass").inc()
+        return None
+    shape, params = parameterized
+
+    connection = db.connection()
+    cache = _get_cache(connection.connection)
+
+    if shape in cache:
+        name = cache.get(shape)
+        if name is None:
+            PREPARED_LOOKUPS.labels(result="unpreparable").inc()
+            return None
+        PREPARED_LOOKUPS.labels(result="hit").inc()
+    else:
+        PREPARED_LOOKUPS.labels(result="miss").inc()
+        name = "omop_" + hashlib.sha1(shape.encode("utf-8")).hexdigest()[:20]
+        try:
+            _exec(connection, f"PREPARE {name} AS {shape}")
+        except DBAPIError as e:
+            cache.put(shape, None)
+            raise PrepareFailed(str(e)) from e
+
+        # prepared statement 는 트랜잭션 rollback 과 무관하게 세션에 남음
+        for evicted in cache.put(shape, name):
+            PREPARED_EVICTIONS.inc()
+            _exec(connection, f"DEALLOCATE {evicted}")
+
+    if not params:
+        return _exec(connection, f"EXECUTE {name}")
+    return connection.exec_driver_sql(f"EXECUTE {name}({', '.join(['%s'] * len(params))})", tuple(params))
+
+
+def _exec(connection, statement: str):
+    # 파라미터가 없으므로 shape 안의 % 가 포맷 문자로 해석되지 않도록 그대로 실행
+    return connection.exec_driver_sql(statement, execution_options={"no_parameters": True})
+
+
+def _get_cache(pool_connection) -> PreparedStatementCache:
+    # 커넥션이 재연결되면 이전 세션의 prepared statement 는 사라지므로 backend pid 로 확인
+    backend_pid = pool_connection.dbapi_connection.get_backend_pid()
+    cache = pool_connection.info.get(_CACHE_INFO_KEY)
+    if cache is None or cache.backend_pid != backend_pid:
+        cache = PreparedStatementCache(backend_pid, settings.sql_executor_prepared_cache_size)
+        pool_connection.info[_CACHE_INFO_KEY] = cache
+    return cache
+
+
+def _is_parameterizable(node: exp.Expression) -> bool:
+    parent = node.parent
+
+    if isinstance(parent, (exp.Limit, exp.Offset)):
+        return node.arg_key == "expression"
+
+    if not isinstance(parent, _PREDICATES):
+        return False
+
+    # 1 = 1 처럼 비교 대상도 literal 이면 파라미터 타입을 추론할 수 없음
+    subject = parent.this if node.arg_key != "this" else parent.expression
+    return subject is not None and not isinstance(subject, (exp.Literal, exp.Neg, exp.Null))
+
+
+def _is_int4(text: str) -> bool:
+    return text.isdigit() and int(text) < 2**31
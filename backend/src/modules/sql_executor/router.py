@@ -1,16 +1,39 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Header, Response
 from sqlalchemy.orm import Session
+from typing import Optional
 from src.database import get_db
 from src.modules.sql_executor import service as sql_executor_service
 from src.modules.sql_executor.dto import SqlExecutorRequestDto, SqlExecutorResponseDto
+from src.modules.sql_executor.serializer import ResultSet, ResultSetResponse
+from src.modules.metrics.service import TimedJSONResponse
+from src.modules.data_version import service as data_version_service
 
 
-router = APIRouter(prefix="/sql-executor", tags=["Text to SQL"])
+router = APIRouter(prefix="/sql-executor", tags=["Text to SQL"], default_response_class=TimedJSONResponse)
 
 
 @router.post("/")
 async def sql_executor(
     sqlExecutorRequestDto: SqlExecutorRequestDto,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None),
     db: Session = Depends(get_db)
 ) -> SqlExecutorResponseDto:
-    return await sql_executor_service.execute(sqlExecutorRequestDto, db)
\ No newline at end of file
+    headers = {}
+    
+    # 같은 SQL 이고 데이터가 바뀌지 않았으면 DB 에 접근하지 않고 304 응답
+    etag = data_version_service.query_etag(sqlExecutorRequestDto.sql)
+    if etag is not None:
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if data_version_service.etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=headers)
+
+    result = await sql_executor_service.execute(sqlExecutorRequestDto, db)
+    
+    # 조회 결과는 pydantic 검증 없이 바로 JSON bytes 로 직렬화 (+ 압축)
+    if isinstance(result, ResultSet):
+        return ResultSetResponse(result, accept_encoding=accept_encoding, headers=headers)
+    
+    response.headers.update(headers)
+    return result
@@ -0,0 +1,122 @@
+import gzip
+import json
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Any, Optional, Sequence
+from uuid import UUID
+
+from fastapi.responses import Response
+
+from src.config import settings
+from src.modules.metrics.service import observe_stage, STAGE_ROW_CONVERSION, STAGE_SERIALIZATION, STAGE_COMPRESSION
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+@dataclass
+class ResultSet:
+    """
+    SQL 실행 결과 (컬럼 이름과 DB 드라이버가 반환한 행 그대로)
+    """
+    columns: list[str]
+    rows: Sequence[Sequence[Any]]
+
+
+def _default(value: Any) -> Any:
+    # orjson / json 이 기본으로 처리하지 못하는 PostgreSQL 타입 변환
+    if isinstance(value, Decimal):
+        # FastAPI jsonable_encoder 와 동일하게 소수점 자리가 없으면 int, 있으면 float
+        return int(value) if value.is_finite() and value.as_tuple().exponent >= 0 else float(value)
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, timedelta):
+        return value.total_seconds()
+    if isinstance(value, UUID):
+        return str(value)
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return bytes(value).hex()
+    return str(value)
+
+
+def dumps(content: Any) -> bytes:
+    """
+    content 를 JSON bytes 로 변환합니다. orjson 이 없으면 표준 json 을 사용합니다.
+    """
+    if orjson is not None:
+        return orjson.dumps(content, default=_default)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def serialize_result_set(result_set: ResultSet) -> bytes:
+    """
+    ResultSet 을 SqlExecutorResponseDto 와 같은 {"data": [{컬럼: 값}, ...], "error": null} JSON bytes 로 변환합니다.
+    pydantic 검증과 jsonable_encoder 를 거치지 않고 orjson 으로 바로 씁니다 (없으면 표준 json 사용).
+    """
+    with observe_stage(STAGE_ROW_CONVERSION):
+        columns = result_set.columns
+        data = [dict(zip(columns, row)) for row in result_set.rows]
+
+    with observe_stage(STAGE_SERIALIZATION):
+        return dumps({"data": data, "error": None})
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Accept-Encoding 헤더에서 사용할 압축 방식(zstd 또는 gzip)을 고릅니다. q 값이 같으면 zstd 를 우선합니다.
+    """
+    if not accept_encoding:
+        return None
+
+    available = ["zstd", "gzip"] if zstandard is not None else ["gzip"]
+    weights = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                continue
+        weights[name.strip().lower()] = quality
+
+    candidates = [
+        (weights.get(encoding, weights.get("*", 0.0)), -priority, encoding)
+        for priority, encoding in enumerate(available)
+    ]
+    quality, _, encoding = max(candidates)
+    return encoding if quality > 0 else None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    with observe_stage(STAGE_COMPRESSION):
+        if encoding == "zstd":
+            return zstandard.ZstdCompressor(level=settings.response_zstd_level).compress(body)
+        return gzip.compress(body, compresslevel=settings.response_gzip_level)
+
+
+class ResultSetResponse(Response):
+    """
+    ResultSet 을 빠른 직렬화 경로로 JSON 응답으로 만들고, 클라이언트가 지원하면 zstd / gzip 으로 압축합니다.
+    """
+    media_type = "application/json"
+
+    def __init__(self, result_set: ResultSet, accept_encoding: Optional[str] = None, headers: Optional[dict] = None):
+        body = serialize_result_set(result_set)
+        headers = {**(headers or {}), "Vary": "Accept-Encoding"}
+
+        encoding = negotiate_encoding(accept_encoding) if len(body) >= settings.response_compression_min_size else None
+        if encoding is not None:
+            body = compress(body, encoding)
+            headers["Content-Encoding"] = encoding
+
+        super().__init__(content=body, headers=headers)
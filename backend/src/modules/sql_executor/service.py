@@ -1,25 +1,76 @@
+from typing import Optional
 from sqlalchemy.orm import Session
 from sqlalchemy.sql import text
 from sqlalchemy.exc import SQLAlchemyError
 from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from sqlglot import exp
 from src.modules.sql_executor.dto import SqlExecutorRequestDto, SqlExecutorResponseDto
+from src.modules.sql_executor import prepared, optimizer
+from src.modules.sql_executor.serializer import ResultSet
+from src.modules.cohort.handle import COHORT_SCHEMA
+from src.modules.cohort import service as cohort_service
+from src.config import settings
+from src.modules.metrics.service import observe_stage, track_in_flight, STAGE_DB_EXECUTION, STAGE_SQL_OPTIMIZATION
+from src.modules.tracing import service as tracing_service
+from src.modules.scheduler import service as scheduler_service
+from src.modules.scheduler.service import sql_scheduler, SchedulerOverloaded, LANE_INTERACTIVE
 import traceback
 
 async def execute(
     sqlExecutorRequestDto: SqlExecutorRequestDto,
-    db: Session
-) -> SqlExecutorResponseDto:
+    db: Session,
+    ast: Optional[exp.Expression] = None
+) -> ResultSet | SqlExecutorResponseDto:
+    try:
+        # 다른 사용자 / export 작업과 DB 를 나눠 쓰도록 스케줄러에서 차례를 기다림
+        async with sql_scheduler.slot_async(LANE_INTERACTIVE, scheduler_service.get_user_id()):
+            with tracing_service.span("sql_executor.execute"):
+                # 쿼리는 thread 에서 실행해서 event loop 를 막지 않고, 동시 실행 수는 스케줄러 slot 으로 제한
+                return await run_in_threadpool(_execute, sqlExecutorRequestDto, db, ast)
+    except SchedulerOverloaded as e:
+        raise scheduler_service.to_http_exception(e)
+
+
+def _execute(
+    sqlExecutorRequestDto: SqlExecutorRequestDto,
+    db: Session,
+    ast: Optional[exp.Expression] = None
+) -> ResultSet | SqlExecutorResponseDto:
     target_schema = "ohdsi_test"
     user_sql = sqlExecutorRequestDto.sql
+    original_ast = ast
+    
+    if settings.sql_executor_optimize:
+        # 재작성에 실패하면 원래 SQL 그대로 실행
+        with observe_stage(STAGE_SQL_OPTIMIZATION):
+            optimized = optimizer.optimize(user_sql)
+        if optimized is not None:
+            user_sql, ast = optimized
     
     try:
-        db.execute(text(f"SET search_path TO {target_schema}, public;"))
+        with track_in_flight("sql_executor"):
+            with observe_stage(STAGE_DB_EXECUTION):
+                _prepare_session(db, target_schema)
+                # 만료되거나 없는 cohort handle 은 테이블이 아직 남아 있어도 거부
+                cohort_service.check_handles(db, sqlExecutorRequestDto.sql, original_ast)
 
-        result = db.execute(text(user_sql))
-        if result.returns_rows:
-            rows = result.fetchall()
-            processed_data = [dict(row._mapping) for row in rows]
-            return SqlExecutorResponseDto(data=processed_data, error=None)
+                # 같은 shape 의 쿼리는 literal 만 파라미터로 바꿔 prepared statement 로 실행 (계획은 shape 마다 한 번)
+                try:
+                    result = prepared.execute(db, user_sql, ast)
+                except prepared.PrepareFailed as e:
+                    print(f"Prepare failed, executing without prepared statement: {e}")
+                    db.rollback()
+                    _prepare_session(db, target_schema)
+                    result = None
+
+                if result is None:
+                    result = db.execute(text(user_sql))
+                rows = result.fetchall() if result.returns_rows else None
+        
+        if rows is not None:
+            # 행은 그대로 반환하고 JSON 변환은 serializer 의 ResultSetResponse 에서 한 번에 처리
+            return ResultSet(columns=list(result.keys()), rows=rows)
         else:
             db.commit()
             return SqlExecutorResponseDto(
@@ -27,6 +78,10 @@ async def execute(
                 error=None
             )
 
+    except HTTPException:
+        db.rollback()
+        raise
+
     except SQLAlchemyError as db_err:
         db.rollback()
         print(f"Database Error: {db_err}")
@@ -37,4 +92,11 @@ async def execute(
         db.rollback()
         print(f"Unexpected Error: {e}")
         traceback.print_exc()
-        raise HTTPException(status_code=500, detail="An unexpected server error occurred.")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="An unexpected server error occurred.")
+
+
+def _prepare_session(db: Session, target_schema: str):
+    # cohort handle 테이블도 이름만으로 참조할 수 있도록 cohort schema 포함
+    db.execute(text(f"SET search_path TO {target_schema}, {COHORT_SCHEMA}, public;"))
+    # pg_stat_activity 에서 요청을 구분할 수 있도록 트랜잭션 동안 application_name 지정
+    db.execute(text("SELECT set_config('application_name', :name, true)"), {"name": tracing_service.application_name()})
\ No newline at end of file
@@ -1,6 +1,6 @@
 from typing import Optional
 from fastapi import HTTPException
-from pydantic import BaseModel, Field, field_validator, model_validator, PrivateAttr
+from pydantic import BaseModel, Field, field_validator, model_validator, PrivateAttr, ValidationInfo
 from datetime import datetime
 
 from src.validator.text_validator.basic_text_validator import BasicTextValidator
@@ -9,6 +9,8 @@ from src.validator.sql_validator.basic_sql_validator import BasicSQLValidator
 
 from src.modules.log.dto import SqlGeneratorLogRequestModel
 from src.modules.log.service import save_sql_generator_log
+from src.config import settings
+from src.modules.metrics.service import observe_stage, STAGE_TEXT_VALIDATION
 
 class SqlGeneratorRequestDto(BaseModel):
     text: str = Field(..., title="Text to convert to SQL", description="The text to convert to SQL")
@@ -21,16 +23,19 @@ class SqlGeneratorRequestDto(BaseModel):
     
     # LOG 에 기록 위해서 코드 구조 변경
     # 기존 코드는 dto 내부 변수 변경 불가
+    # batch 요청에서는 context={"batch": True} 로 검증하여
+    # 실패해도 예외를 던지지 않고 상태만 기록 (로그는 batch 가 모아서 저장)
     @model_validator(mode='after')
-    def validate_text(self):
+    def validate_text(self, info: ValidationInfo):
         # 필터링 상태 초기화 (혹시 모를 경우 대비, init=False로 인해 초기값은 None임)
         self._pre_llm_filter_status = 'passed' # 기본값 'passed'로 시작
         self._pre_llm_filter_reason = None
 
         try:
             # 정의한 validator 클래스들을 사용하여 검증 수행
-            BasicTextValidator(self.text).validate()
-            SecureTextValidator(self.text).validate()
+            with observe_stage(STAGE_TEXT_VALIDATION):
+                BasicTextValidator(self.text).validate()
+                SecureTextValidator(self.text).validate()
 
             # 모든 validator를 통과하면 상태는 'passed'로 유지됨
             
@@ -39,6 +44,9 @@ class SqlGeneratorRequestDto(BaseModel):
             self._pre_llm_filter_status = 'rejected'
             self._pre_llm_filter_reason = f"Unexpected validation error: {type(e).__name__} - {str(e)}"
             
+            if info.context and info.context.get("batch"):
+                return self
+            
             # 오류 사항 로그
             save_sql_generator_log(SqlGeneratorLogRequestModel(
                 user_input_text = self.text,
@@ -72,4 +80,32 @@ class SqlGeneratorRequestDto(BaseModel):
     
 class SqlGeneratorResponseDto(BaseModel):
     sql: Optional[str] = Field(None, title="SQL", description="The generated SQL")
-    error: Optional[str] = Field(None, title="Error", description="The error message if an error occurred")
\ No newline at end of file
+    error: Optional[str] = Field(None, title="Error", description="The error message if an error occurred")
+
+
+class SqlGeneratorBatchRequestDto(BaseModel):
+    texts: list[str] = Field(
+        ...,
+        min_length=1,
+        max_length=settings.sql_generator_batch_max_size,
+        title="Texts to convert to SQL",
+        description="The list of texts to convert to SQL",
+    )
+    
+    _requests: list[SqlGeneratorRequestDto] = PrivateAttr(default_factory=list)
+    
+    # 입력 하나가 검증에 실패해도 batch 전체를 거절하지 않고 항목별로 결과를 돌려줌
+    @model_validator(mode='after')
+    def validate_texts(self):
+        self._requests = [
+            SqlGeneratorRequestDto.model_validate({"text": text}, context={"batch": True})
+            for text in self.texts
+        ]
+        return self
+    
+    @property
+    def requests(self) -> list[SqlGeneratorRequestDto]:
+        return self._requests
+    
+class SqlGeneratorBatchResponseDto(BaseModel):
+    results: list[SqlGeneratorResponseDto] = Field(..., title="Results", description="The results in the same order as the request texts")
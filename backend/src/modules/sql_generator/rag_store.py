@@ -0,0 +1,135 @@
+import threading
+from dataclasses import dataclass
+
+import faiss
+import numpy as np
+
+
+@dataclass(frozen=True)
+class RagSnapshot:
+    """
+    검색에 사용하는 불변 스냅샷입니다.
+    index 의 i 번째 벡터는 항상 queries[i], sqls[i] 와 짝을 이룹니다.
+    """
+    index: faiss.Index
+    queries: tuple[str, ...]
+    sqls: tuple[str, ...]
+
+    def __len__(self) -> int:
+        return len(self.queries)
+
+
+class RagStore:
+    """
+    RagStore 클래스는 RAG 예시(query, sql)와 FAISS index 를 함께 관리합니다.
+
+    - 검색은 lock 없이 현재 스냅샷을 참조하여 수행합니다.
+      스냅샷은 게시된 뒤 절대 수정되지 않으므로 여러 스레드에서 동시에 검색해도 안전합니다.
+    - 추가는 pending 버퍼에 모았다가 index 를 복제한 새 스냅샷으로 한 번에 교체(publish)합니다.
+      pending 이 max_pending 개가 되거나 publish_interval 초가 지나면 게시됩니다.
+
+    메서드:
+    - search(self, vectors, top_k): 벡터별 (distance, query, sql) 목록 반환
+    - add(self, vectors, queries, sqls): 예시 추가 (batch 로 게시)
+    - flush(self): pending 예시를 즉시 게시
+    """
+
+    def __init__(
+        self,
+        index: faiss.Index,
+        queries: list[str],
+        sqls: list[str],
+        max_pending: int = 32,
+        publish_interval: float = 1.0,
+    ):
+        if index.ntotal != len(queries) or len(queries) != len(sqls):
+            raise ValueError("index, queries, sqls must have the same length")
+
+        self._snapshot = RagSnapshot(index, tuple(queries), tuple(sqls))
+        self.max_pending = max_pending
+        self.publish_interval = publish_interval
+
+        self._write_lock = threading.Lock()
+        self._pending_vectors: list[np.ndarray] = []
+        self._pending_queries: list[str] = []
+        self._pending_sqls: list[str] = []
+        self._flush_timer: threading.Timer | None = None
+
+    @property
+    def snapshot(self) -> RagSnapshot:
+        return self._snapshot
+
+    @property
+    def dimension(self) -> int:
+        return self._snapshot.index.d
+
+    def __len__(self) -> int:
+        return len(self._snapshot)
+
+    def search(self, vectors: np.ndarray, top_k: int = 1) -> list[list[tuple[float, str, str]]]:
+        # 참조를 한 번만 읽어서 검색과 payload 조회가 같은 스냅샷을 보도록 함
+        snapshot = self._snapshot
+
+        if len(vectors) == 0:
+            return []
+        if len(snapshot) == 0:
+            return [[] for _ in range(len(vectors))]
+
+        distances, indices = snapshot.index.search(vectors, top_k)
+
+        results = []
+        for row_distances, row_indices in zip(distances, indices):
+            results.append([
+                (float(dist), snapshot.queries[idx], snapshot.sqls[idx])
+                for dist, idx in zip(row_distances, row_indices)
+                if idx != -1
+            ])
+        return results
+
+    def add(self, vectors: np.ndarray, queries: list[str], sqls: list[str]):
+        if len(vectors) != len(queries) or len(queries) != len(sqls):
+            raise ValueError("vectors, queries, sqls must have the same length")
+        if not queries:
+            return
+
+        with self._write_lock:
+            self._pending_vectors.append(np.asarray(vectors, dtype=np.float32))
+            self._pending_queries.extend(queries)
+            self._pending_sqls.extend(sqls)
+
+            if len(self._pending_queries) >= self.max_pending:
+                self._publish_locked()
+            elif self._flush_timer is None:
+                self._flush_timer = threading.Timer(self.publish_interval, self.flush)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+
+    def flush(self):
+        with self._write_lock:
+            self._publish_locked()
+
+    def _publish_locked(self):
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+
+        if not self._pending_queries:
+            return
+
+        self._snapshot = self._build_snapshot(
+            self._snapshot,
+            np.concatenate(self._pending_vectors),
+            self._pending_queries,
+            self._pending_sqls,
+        )
+
+        self._pending_vectors = []
+        self._pending_queries = []
+        self._pending_sqls = []
+
+    def _build_snapshot(self, current: RagSnapshot, vectors: np.ndarray, queries: list[str], sqls: list[str]) -> RagSnapshot:
+        # 검색 중인 index 는 건드리지 않고 복제본에 추가한 뒤 참조만 교체
+        index = faiss.clone_index(current.index)
+        index.add(vectors)
+
+        return RagSnapshot(index, current.queries + tuple(queries), current.sqls + tuple(sqls))
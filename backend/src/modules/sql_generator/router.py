@@ -1,10 +1,31 @@
-from fastapi import APIRouter
+from typing import Optional
+from fastapi import APIRouter, Header
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 
-from src.modules.sql_generator.dto import SqlGeneratorRequestDto, SqlGeneratorResponseDto
+from src.modules.sql_generator.dto import SqlGeneratorRequestDto, SqlGeneratorResponseDto, SqlGeneratorBatchRequestDto, SqlGeneratorBatchResponseDto
 from src.modules.sql_generator import service as sql_generator_service
 
 router = APIRouter(prefix="/sql-generator", tags=["Text to SQL"])
 
 @router.post("/")
-async def text_to_sql(body: SqlGeneratorRequestDto) -> SqlGeneratorResponseDto:
-    return sql_generator_service.generate(body)
+async def text_to_sql(
+    body: SqlGeneratorRequestDto,
+    stream: bool = False,
+    accept: Optional[str] = Header(None),
+) -> SqlGeneratorResponseDto:
+    # ?stream=true 또는 Accept: text/event-stream 이면 token 이 도착하는 대로 SSE 로 응답
+    if stream or (accept and "text/event-stream" in accept):
+        return StreamingResponse(
+            sql_generator_service.generate_stream(body),
+            media_type="text/event-stream",
+            # nginx 등 proxy 가 event 를 모아서 보내지 않도록
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+    
+    # generate 는 동기 함수이므로 event loop 를 막지 않도록 threadpool 에서 실행
+    return await run_in_threadpool(sql_generator_service.generate, body)
+
+@router.post("/batch")
+async def text_to_sql_batch(body: SqlGeneratorBatchRequestDto) -> SqlGeneratorBatchResponseDto:
+    return await sql_generator_service.generate_batch(body)
@@ -1,3 +1,6 @@
+import asyncio
+import json
+import threading
 import faiss
 import numpy as np
 import os
@@ -5,31 +8,42 @@ import logging
 import traceback
 
 from datetime import datetime
-from src.modules.sql_generator.dto import SqlGeneratorRequestDto, SqlGeneratorResponseDto
+from src.modules.sql_generator.dto import SqlGeneratorRequestDto, SqlGeneratorResponseDto, SqlGeneratorBatchRequestDto, SqlGeneratorBatchResponseDto
 from src.modules.gemini import service as gemini_service
-from sentence_transformers import SentenceTransformer
 from src.modules.omop import service as omop_service
+from src.modules.concept_search import service as concept_search_service
+from src.modules.embedding import service as embedding_service
+from src.modules.sql_generator.rag_store import RagStore
+from src.modules.sql_generator.shared_rag_store import SharedRagStore
+from src.config import settings
+from src.modules.metrics import service as metrics_service
+from src.modules.metrics.service import observe_stage, track_in_flight, STAGE_RAG_RETRIEVAL, STAGE_PROMPT_BUILD
+from src.modules.tracing import service as tracing_service
+from src.modules.scheduler.service import LANE_BATCH
+from src.modules.sql_executor.dto import validate_sql
 
 from src.modules.log.dto import SqlGeneratorLogRequestModel
-from src.modules.log.service import save_sql_generator_log, get_query_and_log
+from src.modules.log.service import save_sql_generator_log, save_sql_generator_logs, get_query_and_log
 from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from typing import AsyncIterator
 
 
 def generate(sqlGeneratorRequestDto: SqlGeneratorRequestDto) -> SqlGeneratorResponseDto:
+    with track_in_flight("sql_generator"), tracing_service.span("sql_generator.generate"):
+        return _generate(sqlGeneratorRequestDto)
+
+
+def _generate(sqlGeneratorRequestDto: SqlGeneratorRequestDto) -> SqlGeneratorResponseDto:
     try:
         model_service = gemini_service
-        prompt = omop_service.get_prompt()
         
         #RAG를 사용한 Example 을 반영하는 코드
-        example =  _add_relevant_query(sqlGeneratorRequestDto.text)
-        
-        # Example 이 존재할 때만 예시 추가
-        if example:
-            prompt += "\n <EXAMPLE> \n"
-            prompt += "\n".join(example)
-            prompt += "\n </EXAMPLE> \n"
-            prompt += "\n Please use the above example for reference only and do not include it in your answer."
-
+        # 검색과 vector DB 추가에 같은 임베딩을 사용
+        with observe_stage(STAGE_RAG_RETRIEVAL):
+            query_vector = _encode([sqlGeneratorRequestDto.text])
+            example = _add_relevant_queries(query_vector)[0]
+        prompt = _build_prompt(example, sqlGeneratorRequestDto.text)
         
         llm_request_timestamp = datetime.now()
         result = model_service.generate_response(prompt, sqlGeneratorRequestDto)
@@ -42,41 +56,240 @@ def generate(sqlGeneratorRequestDto: SqlGeneratorRequestDto) -> SqlGeneratorResp
             error=content.get("error")
         )
         
-        save_sql_generator_log(SqlGeneratorLogRequestModel(
-            user_input_text = sqlGeneratorRequestDto.text,
-            input_received_timestamp = sqlGeneratorRequestDto.input_received_timestamp,
-            
-            pre_llm_filter_status = sqlGeneratorRequestDto.pre_llm_filter_status,
-            pre_llm_filter_reason = sqlGeneratorRequestDto.pre_llm_filter_reason,
-            pre_llm_filter_complete_timestamp = sqlGeneratorRequestDto.pre_llm_filter_complete_timestamp,
-            
-            generated_sql = sqlGeneratorResponseDto.sql,
-            
-            llm_request_timestamp = llm_request_timestamp,
-            llm_response_timestamp = llm_response_timestamp,
-            
-            llm_validation_reason = sqlGeneratorResponseDto.error,
-            
-            llm_model_used = "GEMINI"
-        ))
+        with tracing_service.span("log.save_sql_generator_log"):
+            save_sql_generator_log(_to_log_model(
+                sqlGeneratorRequestDto, sqlGeneratorResponseDto, llm_request_timestamp, llm_response_timestamp
+            ))
 
         if sqlGeneratorResponseDto.sql:
-            _add_query_to_vector(sqlGeneratorRequestDto.text, sqlGeneratorResponseDto.sql)
+            _add_queries_to_vector(query_vector, [sqlGeneratorRequestDto.text], [sqlGeneratorResponseDto.sql])
         
         
         return sqlGeneratorResponseDto
 
     except Exception as e:
+        # 스케줄러 대기열 초과(429)는 Retry-After 와 함께 그대로 전달
+        if isinstance(e, HTTPException) and e.status_code == 429:
+            raise
         print(f"Unexpected Error: {e}")
         traceback.print_exc()
         raise HTTPException(status_code=500, detail="An unexpected server error occurred.")
 
 
+async def generate_stream(sqlGeneratorRequestDto: SqlGeneratorRequestDto) -> AsyncIterator[str]:
+    """
+    generate 의 streaming 버전으로, Server-Sent Events 를 차례로 반환합니다.
+    
+    - token: {"key": "sql" | "error", "delta": ...}  Gemini token 이 도착할 때마다 (값은 delta 를 이어 붙인 것)
+    - result: {"sql": ..., "error": ...}              최종 결과, sql 은 실행 전 검증을 통과한 경우에만 RAG 에 추가
+    - error: {"status": ..., "detail": ...}           처리 중 오류 (스케줄러 대기열 초과 429 포함)
+    
+    LLM 호출은 worker 스레드 하나에서 처음부터 끝까지 실행하고 (span / stage 기록이 한 context 에서 끝나도록)
+    event 는 queue 로 전달받습니다. 클라이언트가 연결을 끊으면 Gemini streaming 도 중단합니다.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    cancelled = threading.Event()
+    
+    def emit(event, data):
+        loop.call_soon_threadsafe(queue.put_nowait, (event, data))
+    
+    def run():
+        try:
+            with track_in_flight("sql_generator"), tracing_service.span("sql_generator.generate_stream"):
+                response = _generate_streaming(sqlGeneratorRequestDto, emit, cancelled)
+            if response is not None:
+                emit("result", response.model_dump())
+        except HTTPException as e:
+            emit("error", {"status": e.status_code, "detail": e.detail})
+        except Exception as e:
+            print(f"Unexpected Error: {e}")
+            traceback.print_exc()
+            emit("error", {"status": 500, "detail": "An unexpected server error occurred."})
+        finally:
+            emit(None, None)
+    
+    worker = asyncio.ensure_future(run_in_threadpool(run))
+    try:
+        while True:
+            event, data = await queue.get()
+            if event is None:
+                break
+            yield f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+        # run 이 끝났으므로 바로 완료되며, task 에서 발생한 예외가 있으면 여기서 올라옴
+        await worker
+    finally:
+        # 연결이 끊기면 스레드는 다음 token 에서 Gemini streaming 을 닫고 종료됨
+        cancelled.set()
+        if not worker.done():
+            worker.cancel()
+
+
+def _generate_streaming(sqlGeneratorRequestDto: SqlGeneratorRequestDto, emit, cancelled: threading.Event) -> SqlGeneratorResponseDto | None:
+    with observe_stage(STAGE_RAG_RETRIEVAL):
+        query_vector = _encode([sqlGeneratorRequestDto.text])
+        example = _add_relevant_queries(query_vector)[0]
+    prompt = _build_prompt(example, sqlGeneratorRequestDto.text)
+    
+    llm_request_timestamp = datetime.now()
+    result = gemini_service.stream_response(
+        prompt,
+        sqlGeneratorRequestDto,
+        on_delta=lambda key, delta: emit("token", {"key": key, "delta": delta}),
+        is_cancelled=cancelled.is_set,
+    )
+    llm_response_timestamp = datetime.now()
+    
+    if result is None:
+        return None
+    
+    content = result.content
+    sqlGeneratorResponseDto = SqlGeneratorResponseDto(sql=content.get("sql"), error=content.get("error"))
+    
+    # 사용자가 바로 실행할 수 있도록 실행 전과 같은 검증을 미리 수행
+    is_valid = False
+    if sqlGeneratorResponseDto.sql:
+        try:
+            validate_sql(sqlGeneratorResponseDto.sql)
+            is_valid = True
+        except Exception as e:
+            sqlGeneratorResponseDto.error = str(e)
+    
+    with tracing_service.span("log.save_sql_generator_log"):
+        save_sql_generator_log(_to_log_model(
+            sqlGeneratorRequestDto, sqlGeneratorResponseDto, llm_request_timestamp, llm_response_timestamp
+        ))
+    
+    if is_valid:
+        _add_queries_to_vector(query_vector, [sqlGeneratorRequestDto.text], [sqlGeneratorResponseDto.sql])
+    
+    return sqlGeneratorResponseDto
+
+
+async def generate_batch(sqlGeneratorBatchRequestDto: SqlGeneratorBatchRequestDto) -> SqlGeneratorBatchResponseDto:
+    """
+    여러 질문을 한 번에 SQL 로 변환합니다.
+    
+    임베딩은 한 번의 batch encode, 유사 질문 검색은 한 번의 FAISS search 로 처리하고
+    LLM 호출은 settings.sql_generator_batch_concurrency 개까지 동시에 실행합니다.
+    로그는 마지막에 한 번에 저장합니다.
+    """
+    try:
+        requests = sqlGeneratorBatchRequestDto.requests
+        results: list[SqlGeneratorResponseDto | None] = [None] * len(requests)
+        log_models: list[SqlGeneratorLogRequestModel] = []
+        
+        # 사전 필터에서 거절된 항목은 LLM 호출 없이 바로 결과 작성
+        passed = []
+        for i, request in enumerate(requests):
+            if request.pre_llm_filter_status == 'rejected':
+                results[i] = SqlGeneratorResponseDto(sql=None, error=request.pre_llm_filter_reason)
+                log_models.append(SqlGeneratorLogRequestModel(
+                    user_input_text = request.text,
+                    input_received_timestamp = request.input_received_timestamp,
+                    
+                    pre_llm_filter_status = request.pre_llm_filter_status,
+                    pre_llm_filter_reason = request.pre_llm_filter_reason
+                ))
+            else:
+                passed.append(i)
+        
+        with observe_stage(STAGE_RAG_RETRIEVAL):
+            query_vectors = await embedding_service.encode_async([requests[i].text for i in passed])
+            examples = _add_relevant_queries(query_vectors)
+        
+        semaphore = asyncio.Semaphore(settings.sql_generator_batch_concurrency)
+        
+        async def call_llm(i: int, example: list[str]):
+            request = requests[i]
+            async with semaphore:
+                llm_request_timestamp = datetime.now()
+                try:
+                    # generate_response 는 동기 함수이므로 스레드에서 실행
+                    result = await asyncio.to_thread(gemini_service.generate_response, _build_prompt(example, request.text), request, LANE_BATCH)
+                    content = result.content
+                    response = SqlGeneratorResponseDto(sql=content.get("sql"), error=content.get("error"))
+                except HTTPException as e:
+                    response = SqlGeneratorResponseDto(sql=None, error=str(e.detail))
+                llm_response_timestamp = datetime.now()
+            
+            results[i] = response
+            return _to_log_model(request, response, llm_request_timestamp, llm_response_timestamp)
+        
+        log_models += await asyncio.gather(*(call_llm(i, example) for i, example in zip(passed, examples)))
+        
+        with tracing_service.span("log.save_sql_generator_logs", count=len(log_models)):
+            save_sql_generator_logs(log_models)
+        
+        # 이미 계산한 임베딩을 재사용하여 vector DB 에 추가
+        added = [(pos, i) for pos, i in enumerate(passed) if results[i].sql]
+        if added:
+            _add_queries_to_vector(
+                query_vectors[[pos for pos, _ in added]],
+                [requests[i].text for _, i in added],
+                [results[i].sql for _, i in added],
+            )
+        
+        return SqlGeneratorBatchResponseDto(results=results)
+
+    except Exception as e:
+        print(f"Unexpected Error: {e}")
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail="An unexpected server error occurred.")
+
+
+def _build_prompt(example: list[str], question: str = "") -> str:
+    with observe_stage(STAGE_PROMPT_BUILD):
+        prompt = omop_service.get_prompt()
+        
+        # 질문에 나온 의학 용어의 concept_id 후보 (메모리 concept 색인에서 검색)
+        concepts = concept_search_service.get_prompt_hint(question) if question else ""
+        if concepts:
+            prompt += "\n <CONCEPT> \n"
+            prompt += concepts
+            prompt += "\n </CONCEPT> \n"
+            prompt += "\n Use these concept_id values when the question refers to these terms."
+        
+        # Example 이 존재할 때만 예시 추가
+        if example:
+            prompt += "\n <EXAMPLE> \n"
+            prompt += "\n".join(example)
+            prompt += "\n </EXAMPLE> \n"
+            prompt += "\n Please use the above example for reference only and do not include it in your answer."
+        
+        return prompt
+
+
+def _to_log_model(
+    sqlGeneratorRequestDto: SqlGeneratorRequestDto,
+    sqlGeneratorResponseDto: SqlGeneratorResponseDto,
+    llm_request_timestamp: datetime,
+    llm_response_timestamp: datetime,
+) -> SqlGeneratorLogRequestModel:
+    return SqlGeneratorLogRequestModel(
+        user_input_text = sqlGeneratorRequestDto.text,
+        input_received_timestamp = sqlGeneratorRequestDto.input_received_timestamp,
+        
+        pre_llm_filter_status = sqlGeneratorRequestDto.pre_llm_filter_status,
+        pre_llm_filter_reason = sqlGeneratorRequestDto.pre_llm_filter_reason,
+        pre_llm_filter_complete_timestamp = sqlGeneratorRequestDto.pre_llm_filter_complete_timestamp,
+        
+        generated_sql = sqlGeneratorResponseDto.sql,
+        
+        llm_request_timestamp = llm_request_timestamp,
+        llm_response_timestamp = llm_response_timestamp,
+        
+        llm_validation_reason = sqlGeneratorResponseDto.error,
+        
+        llm_model_used = "GEMINI"
+    )
+
+
 """ RAG(Retrieval-Augmented Generation) """ 
 
-def _rag_init() -> tuple[SentenceTransformer, list[str], list[str], faiss.IndexFlatL2]:
+def _rag_init() -> RagStore:
     # 임베딩 모델 로드, 영어 지원
-    embedding_model = SentenceTransformer("all-MiniLM-L6-v2")
+    embedding_model = embedding_service.get_embedding_model()
     
     # file_names
     file_path = "src/modules/sql_generator/"
@@ -108,58 +321,81 @@ def _rag_init() -> tuple[SentenceTransformer, list[str], list[str], faiss.IndexF
     
     # 현재는 서버 시작할 때마다 생성하게 함 추후 변경 가능
     # query, sql list 를 저장함
-    query_list, sql_list = get_query_and_log()
-        
-    try:
-        with open(file_path + query_file, 'w', encoding='utf-8') as f:
-            for item in query_list:
-                f.write(str(item) + '\n')
-            
-        with open(file_path + sql_file, 'w', encoding='utf-8') as f:
-            for item in sql_list:
-                f.write(str(item) + '\n')
+    def build() -> tuple[np.ndarray, list[str], list[str]]:
+        query_list, sql_list = get_query_and_log()
             
-            
-    except IOError as e:
-        print("Error occur during make query, sql list file")
+        try:
+            with open(file_path + query_file, 'w', encoding='utf-8') as f:
+                for item in query_list:
+                    f.write(str(item) + '\n')
+                
+            with open(file_path + sql_file, 'w', encoding='utf-8') as f:
+                for item in sql_list:
+                    f.write(str(item) + '\n')
+                
+                
+        except IOError as e:
+            print("Error occur during make query, sql list file")
         
+        # _query_list 를 vector 화, 이전 기동에서 encode 한 문장은 캐시에서 가져옴
+        return embedding_service.encode_bulk(query_list), query_list, sql_list
+    
+    dimension = embedding_model.get_sentence_embedding_dimension()
+    
+    # 여러 worker 로 실행하는 경우 memory-mapped 파일 하나를 모든 worker 가 공유
+    # 같은 기동에서 처음 시작한 worker 만 build 를 실행함
+    if settings.rag_shared_dir:
+        return SharedRagStore.open_or_create(
+            settings.rag_shared_dir,
+            dimension,
+            embedding_service.get_embedding_model_id(),
+            build,
+            max_pending=settings.rag_publish_batch_size,
+            publish_interval=settings.rag_publish_interval_sec,
+            sync_interval=settings.rag_sync_interval_sec,
+        )
+    
+    query_vectors, query_list, sql_list = build()
         
-    query_index = faiss.IndexFlatL2(embedding_model.get_sentence_embedding_dimension())
+    query_index = faiss.IndexFlatL2(dimension)
 
-    # _query_list 를 vector 화 시켜서  vector DB 에 추가
-    query_index.add(np.array(embedding_model.encode(query_list)))
+    # vector DB 에 추가
+    query_index.add(query_vectors)
     faiss.write_index(query_index, index_path)
     
     
-    return embedding_model, query_list, sql_list, query_index
+    return RagStore(
+        query_index,
+        query_list,
+        sql_list,
+        max_pending=settings.rag_publish_batch_size,
+        publish_interval=settings.rag_publish_interval_sec,
+    )
 
-_embedding_model, _query_list, _sql_list, _query_index = _rag_init()
+# index 와 (query, sql) 목록은 RagStore 가 스냅샷 단위로 함께 관리
+_rag_store = _rag_init()
+
+metrics_service.register_gauge_callback(
+    "rag_index_size", "Number of (query, sql) examples in the RAG index", lambda: len(_rag_store)
+)
+
+# 캐시에 없는 문장만 동시에 들어온 요청들과 모아서 한 번에 encode
+def _encode(queries: list[str]) -> np.ndarray:
+    return embedding_service.encode(queries)
 
 # Query 와 유사했던 이전의 Query 와 그에 대한 SQL을 Example 로 보내는 함수, top_k개의 example 선정
+# 여러 Query 벡터에 대해 한 번의 search 로 example 을 찾음
 # sql_generator 의 service.py 에서만 실행하므로 private 함수로 설정
-def _add_relevant_query(query: str, top_k: int = 1, max_distance_threshold : float = 1.0) -> list[str]:
-    
-    if not _query_list or not _sql_list:
-        return []
-    
-    # 사용자의 Query 를 Vector 화 후 Vector DB 에서 비슷하다고 판단되는 Query의 index 를 찾고 반환
-    query_vector = _embedding_model.encode([query])
-    distances, indices = _query_index.search(query_vector, top_k)
+def _add_relevant_queries(query_vectors: np.ndarray, top_k: int = 1, max_distance_threshold : float = 1.0) -> list[list[str]]:
     
+    # Vector DB 에서 비슷하다고 판단되는 Query 와 SQL 을 찾아서 반환
     # max_distance_threshold 보다 낮은 경우에만 result 에 반영함
-    result = []
-    for dist, idx in zip(distances[0], indices[0]):
-        if dist <= max_distance_threshold:
-            result.append(f"query : {_query_list[idx]}, sql : {_sql_list[idx]}")
-            
-    return result
+    return [
+        [f"query : {query}, sql : {sql}" for dist, query, sql in matches if dist <= max_distance_threshold]
+        for matches in _rag_store.search(query_vectors, top_k)
+    ]
 
 # vector db 에 query 추가 및 (query, sql) 쌍 추가
-# 순서 유지 필수
-def _add_query_to_vector(query: str, sql: str):
-    query_vector = _embedding_model.encode([query])
-    _query_index.add(query_vector)
-    
-    _query_list.append(query)
-    _sql_list.append(sql)
-    
\ No newline at end of file
+# 추가된 예시는 RagStore 가 모아서 새 스냅샷으로 게시함
+def _add_queries_to_vector(query_vectors: np.ndarray, queries: list[str], sqls: list[str]):
+    _rag_store.add(query_vectors, queries, sqls)
@@ -0,0 +1,214 @@
+import fcntl
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+from src.modules.sql_generator.rag_store import RagSnapshot, RagStore
+
+VECTOR_FILE = "vectors.f32"
+PAYLOAD_FILE = "payload.jsonl"
+META_FILE = "meta.json"
+LOCK_FILE = "lock"
+
+
+class MmapFlatIndex:
+    """
+    MmapFlatIndex 클래스는 memory-mapped 벡터 위에서 brute-force L2 검색을 수행하는 읽기 전용 index 입니다.
+
+    벡터 파일은 append-only 이므로 앞쪽 ntotal 행에 대한 view 는 변하지 않으며,
+    여러 worker 가 같은 파일을 mmap 하면 page cache 를 공유합니다.
+    faiss.IndexFlatL2 와 같은 (distances, indices) 형식으로 결과를 반환합니다.
+    """
+
+    def __init__(self, vectors: np.ndarray, norms: np.ndarray | None = None):
+        self.vectors = vectors
+        self.ntotal, self.d = vectors.shape
+        self.norms = norms if norms is not None else np.einsum("ij,ij->i", vectors, vectors)
+
+    def search(self, x: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+        x = np.asarray(x, dtype=np.float32)
+        distances = np.full((len(x), k), np.inf, dtype=np.float32)
+        indices = np.full((len(x), k), -1, dtype=np.int64)
+
+        if self.ntotal == 0:
+            return distances, indices
+
+        # ||x - y||^2 = ||x||^2 - 2 x.y + ||y||^2
+        all_distances = np.einsum("ij,ij->i", x, x)[:, None] - 2 * (x @ self.vectors.T) + self.norms[None, :]
+        np.maximum(all_distances, 0, out=all_distances)
+
+        top = min(k, self.ntotal)
+        candidates = np.argpartition(all_distances, top - 1, axis=1)[:, :top]
+        candidate_distances = np.take_along_axis(all_distances, candidates, axis=1)
+        order = np.argsort(candidate_distances, axis=1)
+
+        distances[:, :top] = np.take_along_axis(candidate_distances, order, axis=1)
+        indices[:, :top] = np.take_along_axis(candidates, order, axis=1)
+        return distances, indices
+
+
+class SharedRagStore(RagStore):
+    """
+    SharedRagStore 클래스는 여러 worker 프로세스가 하나의 RAG 저장소를 공유하도록 하는 RagStore 입니다.
+
+    shared_dir 아래의 파일 구성:
+    - vectors.f32: float32 벡터를 행 단위로 이어 붙인 append-only 파일 (np.memmap 으로 읽음)
+    - payload.jsonl: 벡터와 같은 순서의 {"query", "sql"} append-only 로그
+    - meta.json: 차원, 임베딩 모델 id, 파일을 만든 프로세스 그룹 정보
+    - lock: 파일 쓰기/읽기용 flock
+
+    각 worker 는 새 예시를 lock 을 잡고 파일 끝에 추가하고,
+    sync_interval 마다 파일에서 다른 worker 가 추가한 부분을 이어 읽어 스냅샷을 갱신합니다.
+    """
+
+    def __init__(
+        self,
+        shared_dir: str,
+        dimension: int,
+        max_pending: int = 32,
+        publish_interval: float = 1.0,
+        sync_interval: float = 1.0,
+    ):
+        self.shared_dir = shared_dir
+        self.sync_interval = sync_interval
+        self._payload_offset = 0
+        self._last_sync = 0.0
+
+        empty = np.empty((0, dimension), dtype=np.float32)
+        super().__init__(MmapFlatIndex(empty), [], [], max_pending, publish_interval)
+
+        self._sync_lock = threading.Lock()
+        self.sync()
+
+    @classmethod
+    def open_or_create(cls, shared_dir: str, dimension: int, model_id: str, build, **kwargs) -> "SharedRagStore":
+        """
+        같은 기동(부모 프로세스)에서 같은 임베딩 모델로 만든 파일이 있으면 그대로 열고,
+        없으면 build() 가 반환한 (vectors, queries, sqls) 로 파일을 새로 만든 뒤 SharedRagStore 를 반환합니다.
+        여러 worker 가 동시에 시작해도 build 는 lock 안에서 한 번만 실행됩니다.
+        """
+        os.makedirs(shared_dir, exist_ok=True)
+
+        with _file_lock(shared_dir, fcntl.LOCK_EX):
+            if not cls._is_initialized(shared_dir, dimension, model_id):
+                vectors, queries, sqls = build()
+
+                with open(os.path.join(shared_dir, VECTOR_FILE), "wb") as f:
+                    f.write(np.ascontiguousarray(vectors, dtype=np.float32).tobytes())
+                with open(os.path.join(shared_dir, PAYLOAD_FILE), "w", encoding="utf-8") as f:
+                    for query, sql in zip(queries, sqls):
+                        f.write(json.dumps({"query": query, "sql": sql}, ensure_ascii=False) + "\n")
+                with open(os.path.join(shared_dir, META_FILE), "w", encoding="utf-8") as f:
+                    json.dump({"dimension": dimension, "model_id": model_id, "boot_key": shared_boot_key()}, f)
+
+        return cls(shared_dir, dimension, **kwargs)
+
+    @staticmethod
+    def _is_initialized(shared_dir: str, dimension: int, model_id: str) -> bool:
+        try:
+            with open(os.path.join(shared_dir, META_FILE), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return False
+
+        # 다른 backend 로 만든 벡터는 섞어 쓸 수 없으므로 다시 임베딩
+        return (
+            meta.get("dimension") == dimension
+            and meta.get("model_id") == model_id
+            and meta.get("boot_key") == shared_boot_key()
+        )
+
+    def search(self, vectors: np.ndarray, top_k: int = 1) -> list[list[tuple[float, str, str]]]:
+        if time.monotonic() - self._last_sync > self.sync_interval:
+            self.sync(blocking=False)
+        return super().search(vectors, top_k)
+
+    def sync(self, blocking: bool = True):
+        """
+        다른 worker 가 파일에 추가한 예시를 읽어 새 스냅샷으로 게시합니다.
+        blocking=False 이면 이미 다른 스레드가 sync 중일 때 바로 반환합니다.
+        """
+        if not self._sync_lock.acquire(blocking=blocking):
+            return
+        try:
+            with self._write_lock:
+                self._publish_locked()
+                with _file_lock(self.shared_dir, fcntl.LOCK_SH):
+                    self._snapshot = self._read_new_records(self._snapshot)
+            self._last_sync = time.monotonic()
+        finally:
+            self._sync_lock.release()
+
+    def _build_snapshot(self, current: RagSnapshot, vectors: np.ndarray, queries: list[str], sqls: list[str]) -> RagSnapshot:
+        # 벡터를 먼저 쓰고 payload 를 쓰므로, payload 줄 수만큼의 벡터는 항상 파일에 존재함
+        with _file_lock(self.shared_dir, fcntl.LOCK_EX):
+            # 이전 쓰기가 벡터만 쓰고 (또는 payload 줄을 쓰다가) 중단된 경우 남은 부분을 잘라냄
+            # (남겨 두면 이후 추가하는 payload 가 다른 예시의 벡터 행과 짝지어짐)
+            current = self._read_new_records(current)
+            self._truncate(PAYLOAD_FILE, self._payload_offset)
+            self._truncate(VECTOR_FILE, current.index.ntotal * current.index.d * 4)
+
+            with open(os.path.join(self.shared_dir, VECTOR_FILE), "ab") as f:
+                f.write(np.ascontiguousarray(vectors, dtype=np.float32).tobytes())
+            with open(os.path.join(self.shared_dir, PAYLOAD_FILE), "a", encoding="utf-8") as f:
+                for query, sql in zip(queries, sqls):
+                    f.write(json.dumps({"query": query, "sql": sql}, ensure_ascii=False) + "\n")
+
+            return self._read_new_records(current)
+
+    def _truncate(self, file_name: str, size: int):
+        path = os.path.join(self.shared_dir, file_name)
+        if os.path.exists(path) and os.path.getsize(path) > size:
+            print(f"Shared RAG store: truncating incomplete write in {path}")
+            os.truncate(path, size)
+
+    def _read_new_records(self, current: RagSnapshot) -> RagSnapshot:
+        new_queries = []
+        new_sqls = []
+
+        with open(os.path.join(self.shared_dir, PAYLOAD_FILE), "rb") as f:
+            f.seek(self._payload_offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                record = json.loads(line)
+                new_queries.append(record["query"])
+                new_sqls.append(record["sql"])
+                self._payload_offset += len(line)
+
+        if not new_queries:
+            return current
+
+        index = current.index
+        total = index.ntotal + len(new_queries)
+        vectors = np.memmap(
+            os.path.join(self.shared_dir, VECTOR_FILE), dtype=np.float32, mode="r", shape=(total, index.d)
+        )
+        new_vectors = vectors[index.ntotal:]
+        norms = np.concatenate([index.norms, np.einsum("ij,ij->i", new_vectors, new_vectors)])
+
+        return RagSnapshot(
+            MmapFlatIndex(vectors, norms),
+            current.queries + tuple(new_queries),
+            current.sqls + tuple(new_sqls),
+        )
+
+
+def shared_boot_key() -> str:
+    # uvicorn --workers 로 뜬 worker 들은 같은 부모 프로세스를 가지므로
+    # 부모 pid 로 "이번 기동에서 이미 만든 파일인지" 구분
+    return os.getenv("RAG_SHARED_BOOT_KEY") or str(os.getppid())
+
+
+@contextmanager
+def _file_lock(shared_dir: str, operation: int):
+    with open(os.path.join(shared_dir, LOCK_FILE), "a") as lock_file:
+        fcntl.flock(lock_file, operation)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
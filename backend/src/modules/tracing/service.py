@@ -0,0 +1,197 @@
+import json
+import os
+import queue
+import re
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+from fastapi import Request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from src.config import settings
+
+REQUEST_ID_HEADER = "X-Request-ID"
+APPLICATION_NAME_PREFIX = "hyu-cdw"
+
+# 외부에서 받은 request id 는 SQL 주석과 application_name 에 들어가므로 안전한 문자만 허용
+_REQUEST_ID_PATTERN = re.compile(r"^[A-Za-z0-9_.\-]{1,64}$")
+
+_request_id: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+
+class Span:
+    """
+    하나의 작업 구간을 나타내는 span 입니다.
+    trace_id 는 request id 이며, 같은 요청 안의 span 들은 parent_id 로 연결됩니다.
+    """
+
+    def __init__(self, name: str, trace_id: Optional[str], parent_id: Optional[str], attributes: dict[str, Any]):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.attributes = attributes
+        self.start_time = datetime.now(timezone.utc)
+        self._start = time.perf_counter()
+        self.duration_ms: Optional[float] = None
+        self.error: Optional[str] = None
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def end(self):
+        self.duration_ms = (time.perf_counter() - self._start) * 1000
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_time": self.start_time.isoformat(),
+            "duration_ms": self.duration_ms,
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+class JsonlSpanExporter:
+    """
+    JsonlSpanExporter 클래스는 끝난 span 을 JSONL 파일에 한 줄씩 기록합니다.
+    요청 처리 스레드가 파일 I/O 를 기다리지 않도록 별도 스레드에서 기록합니다.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        self._queue: queue.Queue[dict[str, Any]] = queue.Queue()
+        self._worker = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+        self._worker.start()
+
+    def export(self, span: Span):
+        self._queue.put(span.to_dict())
+
+    def _run(self):
+        while True:
+            records = [self._queue.get()]
+            while not self._queue.empty() and len(records) < 1000:
+                records.append(self._queue.get_nowait())
+
+            try:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write("".join(json.dumps(record, ensure_ascii=False, default=str) + "\n" for record in records))
+            except OSError as e:
+                print(f"Span export error: {e}")
+
+
+_exporter: Optional[JsonlSpanExporter] = None
+_exporter_lock = threading.Lock()
+
+
+def _get_exporter() -> Optional[JsonlSpanExporter]:
+    global _exporter
+    if not settings.trace_export_path:
+        return None
+    if _exporter is None:
+        with _exporter_lock:
+            if _exporter is None:
+                _exporter = JsonlSpanExporter(settings.trace_export_path)
+    return _exporter
+
+
+def _reset_exporter():
+    global _exporter
+    _exporter = None
+
+
+# exporter 스레드는 fork 된 worker 로 넘어가지 않으므로 자식에서 새로 만들도록 함
+os.register_at_fork(after_in_child=_reset_exporter)
+
+
+def get_request_id() -> Optional[str]:
+    return _request_id.get()
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """
+    with 블록을 하나의 span 으로 기록합니다.
+    현재 요청의 request id 와 바깥 span 을 자동으로 이어 붙입니다.
+    """
+    parent = _current_span.get()
+    current = Span(name, _request_id.get(), parent.span_id if parent else None, attributes)
+    token = _current_span.set(current)
+
+    try:
+        yield current
+    except Exception as e:
+        current.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _current_span.reset(token)
+        current.end()
+
+        exporter = _get_exporter()
+        if exporter is not None:
+            exporter.export(current)
+
+
+async def tracing_middleware(request: Request, call_next):
+    """
+    요청마다 request id 를 정하고 (X-Request-ID 헤더가 있으면 그대로 사용)
+    요청 전체를 root span 으로 기록한 뒤 응답 헤더로 request id 를 돌려줍니다.
+    """
+    request_id = request.headers.get(REQUEST_ID_HEADER)
+    if not request_id or not _REQUEST_ID_PATTERN.match(request_id):
+        request_id = uuid.uuid4().hex
+
+    token = _request_id.set(request_id)
+    try:
+        with span("http.request", method=request.method, path=request.url.path) as root:
+            response = await call_next(request)
+            root.set_attribute("status_code", response.status_code)
+    finally:
+        _request_id.reset(token)
+
+    response.headers[REQUEST_ID_HEADER] = request_id
+    return response
+
+
+def application_name() -> str:
+    """
+    pg_stat_activity 에서 요청을 찾을 수 있도록 사용하는 application_name 입니다.
+    PostgreSQL 의 application_name 최대 길이(63)에 맞춰 자릅니다.
+    """
+    request_id = _request_id.get()
+    name = f"{APPLICATION_NAME_PREFIX} {request_id}" if request_id else APPLICATION_NAME_PREFIX
+    return name[:63]
+
+
+def instrument_engine(engine: Engine):
+    """
+    engine 으로 실행되는 모든 SQL 끝에 request id 와 span id 를 주석으로 붙입니다.
+    (pg_stat_activity.query 와 slow query 로그에서 요청을 추적할 수 있음)
+    """
+
+    @event.listens_for(engine, "before_cursor_execute", retval=True)
+    def _add_trace_comment(conn, cursor, statement, parameters, context, executemany):
+        request_id = _request_id.get()
+        if not request_id:
+            return statement, parameters
+
+        current = _current_span.get()
+        comment = f"request_id='{request_id}'"
+        if current is not None:
+            comment += f",span_id='{current.span_id}'"
+
+        # 사용자 SQL 이 한 줄 주석(--)으로 끝나도 영향이 없도록 줄을 바꿔서 붙임
+        return f"{statement}\n/*{comment}*/", parameters
@@ -1,25 +1,30 @@
 from sqlglot import parse_one, exp
-from typing import Dict, Set
+from sqlglot.optimizer.scope import Scope, traverse_scope
+from typing import Dict, Optional, Set
 
-from src.modules.omop.service import get_allowed_schema
+from src.modules.omop.service import get_allowed_schema, get_allowed_column_index
+from src.modules.cohort.handle import COHORT_COLUMNS, is_cohort_handle
 
 class BasicSQLValidator:
     """
     BasicSQLValidator 클래스는 LLM이 변환한 SQL문 검증을 담당합니다.
     
     주요 검증 항목:
-    1. 혀용되지 않은 테이블, 컬럼 사용
+    1. 혀용되지 않은 테이블, 컬럼 사용 (테이블 별칭, CTE, 서브쿼리 scope 기준으로 컬럼 해석)
+       /cohort 로 만든 cohort handle 테이블 (person_id 컬럼) 도 허용
     2. 허용되지 않은 DML 명령어 사용
     3. 허용되지 않은 DDL 명령어 사용
     
     메서드:
-    - __init__(self, sql: str): 초기화 메서드
+    - __init__(self, sql: str, ast: Optional[exp.Expression] = None): 초기화 메서드 (이미 파싱한 AST 가 있으면 재사용)
     - validate(self): 검증 메서드를 호출하여 SQL문 검증
     """
     
-    def __init__(self, sql: str):
+    def __init__(self, sql: str, ast: Optional[exp.Expression] = None):
         self.sql = sql
+        self.ast = ast
         self.allowed_schema = get_allowed_schema()  # 허용된 스키마 목록
+        self.column_index = get_allowed_column_index()  # 컬럼 -> 테이블 목록
         
     def validate(self):
         """
@@ -28,10 +33,11 @@ class BasicSQLValidator:
         Raises:
             ValueError: SQL 문법 오류 또는 금지된 명령어가 포함된 경우 발생합니다.
         """
-        try:
-            self.ast = parse_one(self.sql, read="postgres")
-        except Exception as e:
-            raise ValueError(str(e))
+        if self.ast is None:
+            try:
+                self.ast = parse_one(self.sql, read="postgres")
+            except Exception as e:
+                raise ValueError(str(e))
         
         self._validate_allowed_tables()
         self._validate_allowed_columns()
@@ -46,8 +52,23 @@ class BasicSQLValidator:
         Raises:
             ValueError: 허용되지 않은 테이블이 포함된 경우 발생합니다.
         """
-        used_tables = {table.name for table in self.ast.find_all(exp.Table)}
-        invalid_tables = used_tables - self.allowed_schema.keys()
+        try:
+            scopes = traverse_scope(self.ast)
+        except Exception as e:
+            raise ValueError(str(e))
+
+        # 그 테이블이 속한 scope 에서 CTE 로 해석되는 참조만 제외
+        # (안쪽 서브쿼리의 CTE 이름이 바깥 scope 의 같은 이름 실제 테이블을 가리지 않도록 scope 별로 확인)
+        cte_references = {
+            id(table)
+            for scope in scopes
+            for table in scope.tables
+            if isinstance(scope.sources.get(table.alias_or_name), Scope)
+        }
+        used_tables = {table.name for table in self.ast.find_all(exp.Table) if id(table) not in cte_references}
+        invalid_tables = {
+            table for table in used_tables - self.allowed_schema.keys() if not is_cohort_handle(table)
+        }
 
         if invalid_tables:
             raise ValueError(f"허용되지 않은 테이블 사용: {', '.join(invalid_tables)}")
@@ -55,28 +76,85 @@ class BasicSQLValidator:
     def _validate_allowed_columns(self) -> None:
         """
         SQL에 사용된 컬럼이 허용된 테이블 내 컬럼인지 확인하는 메서드입니다.
+        
+        SELECT 문마다 scope 를 나누어 FROM / JOIN 에 나온 source (테이블 별칭, CTE, 서브쿼리) 기준으로 컬럼을 해석합니다.
+        - p.person_id: 별칭 p 가 가리키는 테이블(또는 CTE, 서브쿼리 결과)에 컬럼이 있는지 확인
+        - person_id: 컬럼 -> 테이블 역색인으로 현재 scope 의 테이블 중 컬럼을 가진 테이블이 있는지 확인
+        - 현재 scope 에서 찾지 못하면 바깥 scope 에서 찾음 (상관 서브쿼리)
 
         Raises:
             ValueError: 허용되지 않은 컬럼이 포함된 경우 발생합니다.
         """
         invalid_columns = set()
 
-        for col in self.ast.find_all(exp.Column):
-            table = col.table
-            column = col.name
+        try:
+            scopes = traverse_scope(self.ast)
+        except Exception as e:
+            raise ValueError(str(e))
 
-            if table:
-                # table.column 형태
-                if table not in self.allowed_schema or column not in self.allowed_schema[table]:
-                    invalid_columns.add(f"{table}.{column}")
-            else:
-                # 컬럼 이름만 있는 경우 > 모든 테이블에 대해 검사
-                found = any(column in cols for cols in self.allowed_schema.values())
-                if not found:
-                    invalid_columns.add(column)
+        for scope in scopes:
+            for col in scope.columns:
+                if col.is_star:
+                    # p.* 는 별칭만 확인
+                    if not self._find_source(scope, col.table):
+                        invalid_columns.add(f"{col.table}.*")
+                elif not self._resolve_column(scope, col):
+                    invalid_columns.add(f"{col.table}.{col.name}" if col.table else col.name)
 
         if invalid_columns:
             raise ValueError(f"허용되지 않은 컬럼 사용: {', '.join(invalid_columns)}")
+
+    def _resolve_column(self, scope: Scope, col: exp.Column) -> bool:
+        """
+        컬럼이 scope 또는 바깥 scope 의 source 로 해석되는지 확인하는 메서드입니다.
+        """
+        if col.table:
+            source = self._find_source(scope, col.table)
+            return source is not None and self._source_has_column(source, col.name)
+
+        while scope is not None:
+            tables = self.column_index.get(col.name, set())
+            for _, source in scope.selected_sources.values():
+                if isinstance(source, exp.Table):
+                    if source.name in tables or (is_cohort_handle(source.name) and col.name in COHORT_COLUMNS):
+                        return True
+                elif self._source_has_column(source, col.name):
+                    return True
+
+            # ORDER BY / GROUP BY / HAVING 에서 select 별칭을 참조하는 경우
+            if col.find_ancestor(exp.Order, exp.Group, exp.Having) and col.name in scope.expression.named_selects:
+                return True
+
+            scope = scope.parent
+
+        return False
+
+    def _find_source(self, scope: Scope, name: str) -> Optional[exp.Expression | Scope]:
+        """
+        별칭(또는 테이블 이름)이 가리키는 source 를 현재 scope 부터 바깥 scope 순서로 찾습니다.
+        """
+        while scope is not None:
+            if name in scope.selected_sources:
+                return scope.selected_sources[name][1]
+            scope = scope.parent
+        return None
+
+    def _source_has_column(self, source: exp.Expression | Scope, column: str) -> bool:
+        """
+        source (허용 테이블, CTE, 서브쿼리) 의 결과 컬럼에 column 이 있는지 확인합니다.
+        """
+        if isinstance(source, exp.Table):
+            if is_cohort_handle(source.name):
+                return column in COHORT_COLUMNS
+            return column in self.allowed_schema.get(source.name, set())
+
+        if isinstance(source, Scope) and isinstance(source.expression, exp.Query):
+            named_selects = source.expression.named_selects
+            # select * 를 감싼 CTE / 서브쿼리는 내부 scope 에서 이미 검증됨
+            return column in named_selects or "*" in named_selects
+
+        # unnest 등 결과 컬럼을 알 수 없는 source 는 DB 에 맡김
+        return True
     
     def _check_forbidden_dml(self) -> None:
         """
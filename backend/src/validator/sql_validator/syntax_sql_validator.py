@@ -1,3 +1,4 @@
+from typing import Optional
 from sqlglot import parse_one, ParseError, exp
 
 class SQLSyntaxStructureValidator:
@@ -9,13 +10,16 @@ class SQLSyntaxStructureValidator:
     2. 불완전한 쿼리 구조 감지 (예: SELECT만 있고 FROM 없음 등)
 
     메서드:
-    - __init__(self, sql: str): SQL 문자열을 저장하고 파싱
+    - __init__(self, sql: str, ast: Optional[exp.Expression] = None): SQL 문자열을 저장하고 파싱 (이미 파싱한 AST 가 있으면 재사용)
     - validate(self): 전체 문법 및 구조 검증 실행
     - _check_required_clauses(self): SELECT, FROM, WHERE 구조 검사
     """
 
-    def __init__(self, sql: str):
+    def __init__(self, sql: str, ast: Optional[exp.Expression] = None):
         self.sql = sql
+        self.ast = ast
+        if ast is not None:
+            return
 
         # 파싱 시 문법 오류 발생하면 예외 처리
         try:
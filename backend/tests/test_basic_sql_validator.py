@@ -0,0 +1,21 @@
+import pytest
+
+from src.validator.sql_validator.basic_sql_validator import BasicSQLValidator
+
+
+@pytest.mark.parametrize("sql", [
+    # 안쪽 서브쿼리의 CTE 이름이 바깥 scope 의 같은 이름 테이블을 가리면 안 됨
+    "SELECT * FROM sql_generator_log WHERE EXISTS (WITH sql_generator_log AS (SELECT 1) SELECT 1)",
+    "SELECT * FROM pg_shadow, (WITH pg_shadow AS (SELECT person_id FROM person) SELECT person_id FROM pg_shadow) t",
+])
+def test_rejects_table_shadowed_by_nested_cte(sql):
+    with pytest.raises(ValueError, match="허용되지 않은 테이블"):
+        BasicSQLValidator(sql).validate()
+
+
+@pytest.mark.parametrize("sql", [
+    "WITH p AS (SELECT person_id FROM person) SELECT person_id FROM p",
+    "SELECT person_id FROM person WHERE person_id IN (WITH d AS (SELECT person_id FROM death) SELECT person_id FROM d)",
+])
+def test_allows_cte_references(sql):
+    BasicSQLValidator(sql).validate()
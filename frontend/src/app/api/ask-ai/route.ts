@@ -1,9 +1,14 @@
 import { NextRequest, NextResponse } from 'next/server';
+import { getUserId } from "@/utils/userId";
 //import { setTimeout } from 'timers/promises'; // Node.js 내장 타이머
 
 export async function POST(req: NextRequest) {
     const { question } = await req.json();
 
+    // 백엔드 span, DB 쿼리와 연결하기 위한 request id (클라이언트가 보낸 값이 있으면 그대로 사용)
+    const requestId = req.headers.get("x-request-id") ?? crypto.randomUUID();
+    const startedAt = Date.now();
+
     const controller = new AbortController();
     const timeout = 300_000; // 5분 (ms)
 
@@ -12,12 +17,15 @@ export async function POST(req: NextRequest) {
 
     try {
         const token = req.headers.get("authorization");
+        const userId = getUserId(req);
         const baseUrl = process.env.NEXT_PUBLIC_OPEN_API;
 
         const res = await fetch(`${baseUrl}/sql-generator/`, {
             method: "POST",
             headers: {
                 "Content-Type": "application/json",
+                "X-Request-ID": requestId,
+                ...(userId && { "X-User-ID": userId }),
                 ...(token && { Authorization: token })
             },
             body: JSON.stringify({ text: question }),
@@ -27,6 +35,7 @@ export async function POST(req: NextRequest) {
         clearTimeout(timeoutId);
 
         const data = await res.json();
+        console.log(`[ask-ai] request_id=${requestId} status=${res.status} duration_ms=${Date.now() - startedAt}`);
 
         if (res.status === 422) {
             const errorMsg = data?.detail?.[0]?.msg || "유효성 오류가 발생했습니다.";
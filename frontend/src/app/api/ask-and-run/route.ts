@@ -0,0 +1,78 @@
+import { NextRequest, NextResponse } from "next/server";
+import { getUserId } from "@/utils/userId";
+
+// 질문 -> SQL 생성 -> 실행을 한 번의 요청으로 처리
+// 백엔드의 NDJSON 스트림 ({"event": "sql"} 다음 columns / rows / done) 을 그대로 전달
+export async function POST(req: NextRequest) {
+    const controller = new AbortController();
+    const timeout = 300_000; // 5분
+    const timeoutId = setTimeout(() => controller.abort(), timeout);
+
+    const onClientAbort = () => controller.abort();
+    req.signal?.addEventListener?.("abort", onClientAbort);
+
+    // 백엔드 span, DB 쿼리와 연결하기 위한 request id (클라이언트가 보낸 값이 있으면 그대로 사용)
+    const requestId = req.headers.get("x-request-id") ?? crypto.randomUUID();
+    const startedAt = Date.now();
+
+    try {
+        const { question } = await req.json();
+        if (!question || typeof question !== "string") {
+            return NextResponse.json({ error: "질문이 없습니다." }, { status: 400 });
+        }
+
+        const token = req.headers.get("authorization");
+        const userId = getUserId(req);
+        const baseUrl = process.env.NEXT_PUBLIC_OPEN_API;
+
+        const apiRes = await fetch(`${baseUrl}/ask-and-run/`, {
+            method: "POST",
+            headers: {
+                "Content-Type": "application/json",
+                "X-Request-ID": requestId,
+                ...(userId && { "X-User-ID": userId }),
+                ...(token && { Authorization: token }),
+            },
+            body: JSON.stringify({ text: question }),
+            signal: controller.signal,
+        });
+
+        console.log(`[ask-and-run] request_id=${requestId} status=${apiRes.status} ttfb_ms=${Date.now() - startedAt}`);
+
+        if (!apiRes.ok || !apiRes.body) {
+            const errorResult = await apiRes.json().catch(() => ({}));
+            const detail = errorResult?.detail;
+            return NextResponse.json(
+                { error: typeof detail === "string" ? detail : `서버 오류: ${apiRes.status}` },
+                { status: apiRes.status }
+            );
+        }
+
+        // 스트림이 끝날 때까지 timeout / abort 리스너 유지
+        const body = apiRes.body.pipeThrough(new TransformStream({
+            flush() {
+                clearTimeout(timeoutId);
+                // @ts-ignore
+                req.signal?.removeEventListener?.("abort", onClientAbort);
+            },
+        }));
+
+        return new NextResponse(body, {
+            headers: {
+                "Content-Type": "application/x-ndjson",
+                "Cache-Control": "no-cache",
+                "X-Request-ID": requestId,
+            },
+        });
+    } catch (err: any) {
+        clearTimeout(timeoutId);
+        if (err?.name === "AbortError") {
+            return NextResponse.json(
+                { error: "❌ 요청이 사용자 취소 또는 5분 초과로 중단되었습니다." },
+                { status: 408 }
+            );
+        }
+        const message = err instanceof Error ? err.message : "서버 오류 발생";
+        return NextResponse.json({ error: message }, { status: 500 });
+    }
+}
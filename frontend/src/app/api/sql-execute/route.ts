@@ -1,4 +1,5 @@
 import { NextRequest, NextResponse } from "next/server";
+import { getUserId } from "@/utils/userId";
 
 export async function POST(req: NextRequest) {
     const controller = new AbortController();
@@ -8,6 +9,10 @@ export async function POST(req: NextRequest) {
     const onClientAbort = () => controller.abort();
     req.signal?.addEventListener?.("abort", onClientAbort);
 
+    // 백엔드 span, DB 쿼리와 연결하기 위한 request id (클라이언트가 보낸 값이 있으면 그대로 사용)
+    const requestId = req.headers.get("x-request-id") ?? crypto.randomUUID();
+    const startedAt = Date.now();
+
     try {
         const { sql } = await req.json();
         if (!sql || typeof sql !== "string") {
@@ -16,6 +21,9 @@ export async function POST(req: NextRequest) {
 
 
         const token = req.headers.get("authorization");
+        const userId = getUserId(req);
+        // 대시보드 polling: 이전 응답의 ETag 를 보내면 데이터가 그대로일 때 304 를 받음
+        const ifNoneMatch = req.headers.get("if-none-match");
         const baseUrl = process.env.NEXT_PUBLIC_OPEN_API;
 
         const apiRes = await fetch(`${baseUrl}/sql-executor/`, {
@@ -23,12 +31,22 @@ export async function POST(req: NextRequest) {
             headers: {
                 "Content-Type": "application/json",
                 Accept: "application/json",
+                "X-Request-ID": requestId,
+                ...(userId && { "X-User-ID": userId }),
                 ...(token && { Authorization: token }),
+                ...(ifNoneMatch && { "If-None-Match": ifNoneMatch }),
             },
             body: JSON.stringify({ sql }),
             signal: controller.signal, // ★ Abort 전파
         });
 
+        console.log(`[sql-execute] request_id=${requestId} status=${apiRes.status} duration_ms=${Date.now() - startedAt}`);
+
+        const etag = apiRes.headers.get("etag");
+        if (apiRes.status === 304) {
+            return new NextResponse(null, { status: 304, headers: etag ? { ETag: etag } : undefined });
+        }
+
         // ---- (1) content-type 확인 ----
         const contentType = apiRes.headers.get("content-type") || "";
 
@@ -69,7 +87,7 @@ export async function POST(req: NextRequest) {
 
         const rows = Array.isArray(result.data) ? result.data : [];
         const execToken = result.token ?? result.executionId ?? null;
-        return NextResponse.json({ data: rows, token: execToken });
+        return NextResponse.json({ data: rows, token: execToken }, { headers: etag ? { ETag: etag } : undefined });
     } catch (err: any) {
         if (err?.name === "AbortError") {
             return NextResponse.json(
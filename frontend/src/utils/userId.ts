@@ -0,0 +1,19 @@
+// utils/userId.ts
+// 백엔드 스케줄러가 사용자별 대기열을 나눌 수 있도록 요청한 사용자를 식별하는 X-User-ID 값
+// (모든 요청이 Next.js 서버에서 나가므로 헤더가 없으면 백엔드에서는 한 사용자로 보임)
+
+import { createHash } from "crypto";
+import { NextRequest } from "next/server";
+
+export function getUserId(req: NextRequest): string | undefined {
+    // 로그인 토큰이 있으면 토큰 자체가 아닌 hash 를 사용
+    const token = req.headers.get("authorization");
+    if (token) {
+        return "token:" + createHash("sha256").update(token).digest("hex").slice(0, 32);
+    }
+
+    // 없으면 브라우저 주소 (프록시 뒤에 있으면 x-forwarded-for 의 첫 번째 값)
+    const forwardedFor = req.headers.get("x-forwarded-for")?.split(",")[0]?.trim();
+    const address = forwardedFor || req.headers.get("x-real-ip");
+    return address ? "ip:" + address : undefined;
+}